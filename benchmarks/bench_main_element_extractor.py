@@ -0,0 +1,47 @@
+"""
+main要素の抽出処理のマイクロベンチマーク
+
+使い方:
+    python -m benchmarks.bench_main_element_extractor [--pages a.html,b.html] [--number 200] [--repeat 5]
+"""
+import os
+import timeit
+from glob import glob
+
+from classopt import classopt, config
+
+from periodically_scraper.shared.extractor.bs4_main_element_extractor import Bs4MainElementExtractor
+from periodically_scraper.shared.extractor.lxml_main_element_extractor import LxmlMainElementExtractor
+
+CASES_DIR = os.path.join(os.path.dirname(__file__), os.pardir, "tests", "cases", "news_site_1_scraper")
+
+EXTRACTORS = {
+    "bs4": Bs4MainElementExtractor(),
+    "lxml": LxmlMainElementExtractor(),
+}
+
+
+if __name__ == "__main__":
+    # 引数を設定
+    @classopt(default_long=True)
+    class Args:
+        pages: str = config(default="", help="Comma-separated HTML files to extract (default: recorded test pages)")
+        number: int = config(default=200, help="Calls per measurement (default: 200)")
+        repeat: int = config(default=5, help="Measurements per page, the fastest is reported (default: 5)")
+
+    args = Args.from_args()
+    page_paths = args.pages.split(",") if args.pages else sorted(glob(os.path.join(CASES_DIR, "article_*.html")))
+
+    print(f"{'page':<30} {'size [KiB]':>10} " + " ".join(f"{name + ' [ms]':>10}" for name in EXTRACTORS) + f" {'speedup':>8}")
+    for page_path in page_paths:
+        with open(page_path, "r") as f:
+            html = f.read()
+        times = {
+            name: min(timeit.repeat(lambda: extractor.extract(html), number=args.number, repeat=args.repeat)) / args.number * 1000
+            for name, extractor in EXTRACTORS.items()
+        }
+        print(
+            f"{os.path.basename(page_path):<30} {len(html.encode()) / 1024:>10.1f} "
+            + " ".join(f"{time:>10.3f}" for time in times.values())
+            + f" {times['bs4'] / times['lxml']:>7.1f}x"
+        )
@@ -0,0 +1,389 @@
+"""
+ローカルのHTTPサーバーに対してスクレイピング全体を実行するベンチマーク
+
+ニュースサイト1を模した記事一覧ページと記事本文ページを返すスタブサーバーを別プロセスで起動し、
+NewsSite1Scraper.execute を LocalStorageRepository に保存しながら最後まで実行する。
+スループット（記事/秒）、記事本文ページの取得時間の p50/p95、最大RSSを表示し、
+コミットごとに比較できるようにJSONファイルへ保存する
+
+使い方:
+    python -m benchmarks.bench_scraper [--pages 5] [--articles_per_page 20] [--article_size 50000]
+        [--latency 0.01] [--error_rate 0.0] [--max_workers 4] [--baseline benchmarks/results/xxx.json]
+"""
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import random
+import re
+import resource
+import subprocess
+import tempfile
+import threading
+import time
+from datetime import datetime
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+from classopt import classopt, config
+
+# スラックへは通知しない（下の _NullSlack に差し替える）が、インポート時にトークンを読むため空で設定する
+os.environ.setdefault("SLACK_BOT_TOKEN", "")
+
+from periodically_scraper.services import base_scraper
+from periodically_scraper.services.news_site_1_scraper import NewsSite1Scraper
+from periodically_scraper.shared.codec.article_codec_registry import get_article_codec
+from periodically_scraper.shared.const import codec_type, parser_type
+from periodically_scraper.shared.extractor.bs4_main_element_extractor import Bs4MainElementExtractor
+from periodically_scraper.shared.extractor.lxml_main_element_extractor import LxmlMainElementExtractor
+from periodically_scraper.shared.rate_limiter import TokenBucketRateLimiter
+from periodically_scraper.shared.repository.local_storage_repository import LocalStorageRepository
+from periodically_scraper.shared.scraping_tools import HtmlFetcher
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+EXTRACTORS = {
+    parser_type.BS4: Bs4MainElementExtractor,
+    parser_type.LXML: LxmlMainElementExtractor,
+}
+
+
+class StubNewsSiteServer(object):
+    """
+    ニュースサイト1を模したページを返すHTTPサーバー（別プロセスで起動する）
+
+    /page/{n}/ は記事一覧ページ、/article/{id} は記事本文ページを返す。
+    記事本文ページは error_rate の確率で 503 Service Unavailable を返す
+    """
+
+    def __init__(
+        self,
+        pages: int,
+        articles_per_page: int,
+        article_size: int,
+        latency: float,
+        error_rate: float,
+        seed: int,
+    ) -> None:
+        self.pages = pages
+        self.articles_per_page = articles_per_page
+        self.article_size = article_size
+        self.latency = latency
+        self.error_rate = error_rate
+        self.seed = seed
+        self.__process: Optional[multiprocessing.Process] = None
+        self.base_url: Optional[str] = None
+
+    def __enter__(self) -> "StubNewsSiteServer":
+        self.start()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.stop()
+
+    def start(self) -> None:
+        """
+        サーバーを起動し、ポート番号が決まるまで待つ
+        """
+        port_queue: multiprocessing.Queue = multiprocessing.Queue()
+        self.__process = multiprocessing.Process(target=self._serve, args=(port_queue,), daemon=True)
+        self.__process.start()
+        self.base_url = f"http://127.0.0.1:{port_queue.get(timeout=10)}"
+
+    def stop(self) -> None:
+        """
+        サーバーを終了する
+        """
+        if self.__process is not None:
+            self.__process.terminate()
+            self.__process.join()
+            self.__process = None
+
+    def _serve(self, port_queue: multiprocessing.Queue) -> None:
+        """
+        サーバープロセスの処理
+        """
+        stub = self
+        rng = random.Random(self.seed)
+        rng_lock = threading.Lock()
+        # 記事本文ページは同じ内容を使い回す（main要素の外側にも同じくらいの量の要素を置く）
+        padding = "<p>" + "x" * 80 + "</p>"
+        n_paragraphs = max(1, self.article_size // 2 // len(padding))
+        article_body = padding * n_paragraphs
+        page_padding = f'<nav>{padding * n_paragraphs}</nav>'
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # ヘッダーと本文を別々に書き込むため、Nagleアルゴリズムによる遅延を避ける
+            disable_nagle_algorithm = True
+
+            def do_GET(self) -> None:
+                if stub.latency > 0:
+                    time.sleep(stub.latency)
+                list_match = re.fullmatch(r"/page/(\d+)/?", self.path)
+                article_match = re.fullmatch(r"/article/(\d+)", self.path)
+                if list_match is not None and 1 <= int(list_match.group(1)) <= stub.pages:
+                    self.__send(HTTPStatus.OK, stub._list_page_html(int(list_match.group(1))))
+                elif article_match is not None:
+                    with rng_lock:
+                        failed = rng.random() < stub.error_rate
+                    if failed:
+                        self.__send(HTTPStatus.SERVICE_UNAVAILABLE, "")
+                        return
+                    article_id = article_match.group(1)
+                    self.__send(
+                        HTTPStatus.OK,
+                        f"<html><head><meta charset='utf-8'><title>article {article_id}</title></head><body>"
+                        f"{page_padding}<main><article><h1>article {article_id}</h1>{article_body}</article></main>"
+                        "<footer>footer</footer></body></html>",
+                    )
+                else:
+                    self.__send(HTTPStatus.NOT_FOUND, "")
+
+            def __send(self, status: int, body: str) -> None:
+                data = body.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                # リトライの待ち時間を短くする
+                if status == HTTPStatus.SERVICE_UNAVAILABLE:
+                    self.send_header("Retry-After", "0")
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format: str, *args) -> None:
+                pass
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        server.daemon_threads = True
+        port_queue.put(server.server_address[1])
+        server.serve_forever()
+
+    def _list_page_html(self, page_count: int) -> str:
+        """
+        記事一覧ページのHTMLを作成する（新しい記事ほど大きいIDにする）
+        """
+        first_id = (self.pages - page_count + 1) * self.articles_per_page
+        articles = "".join(
+            f'<article><a href="/article/{article_id}"><h2>article {article_id}</h2></a></article>'
+            for article_id in range(first_id, first_id - self.articles_per_page, -1)
+        )
+        return (
+            "<html><body>"
+            f"<main>{articles}</main>"
+            f'<a class="pagenavi-item pagenavi-item--last" href="/page/{self.pages}/">last</a>'
+            "</body></html>"
+        )
+
+
+class TimedHtmlFetcher(HtmlFetcher):
+    """
+    リクエストごとの取得時間を記録するフェッチャー
+    """
+
+    def __init__(self, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.latencies: Dict[str, List[float]] = {"list": [], "article": []}
+        self.__lock = threading.Lock()
+
+    def get_html(self, url: str, N_RETRY: int = 3, use_cache: bool = False) -> Tuple[str, int]:
+        start = time.perf_counter()
+        result = super().get_html(url, N_RETRY, use_cache)
+        self.__record("list" if "/page/" in url else "article", time.perf_counter() - start)
+        return result
+
+    def get_main_html(self, url: str, *args, **kwargs) -> Tuple[str, int]:
+        start = time.perf_counter()
+        result = super().get_main_html(url, *args, **kwargs)
+        self.__record("article", time.perf_counter() - start)
+        return result
+
+    def __record(self, kind: str, elapsed: float) -> None:
+        with self.__lock:
+            self.latencies[kind].append(elapsed)
+
+
+class _NullSlack(object):
+    """
+    ベンチマーク中はスラックへ通知しない
+    """
+
+    def post_message(self, text: str) -> None:
+        pass
+
+    def post_error(self) -> None:
+        pass
+
+
+class _BenchLogger(object):
+    """
+    GDriveLogger の代わりに標準のロガーへ出力する（Googleドライブの設定を必要としない）
+    """
+
+    def __init__(self) -> None:
+        self.log = logging.getLogger("bench_scraper")
+
+    def info(self, msg: str) -> None:
+        self.log.info(msg)
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """
+    最近傍順位法でパーセンタイルを計算する
+    """
+    if len(values) == 0:
+        return None
+    sorted_values = sorted(values)
+    return sorted_values[min(len(sorted_values) - 1, max(0, int(round(q / 100 * len(sorted_values) + 0.5)) - 1))]
+
+
+def get_git_commit() -> Optional[str]:
+    """
+    計測したコミットのハッシュを取得する（未コミットの変更があれば "-dirty" を付ける）
+    """
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return f"{commit}-dirty" if dirty else commit
+
+
+def run_benchmark(args) -> dict:
+    """
+    スタブサーバーに対してスクレイピングを実行し、計測結果を返す
+    """
+    base_scraper.slack = _NullSlack()
+    with StubNewsSiteServer(
+        args.pages, args.articles_per_page, args.article_size, args.latency, args.error_rate, args.seed
+    ) as server, tempfile.TemporaryDirectory() as save_folder:
+        scraper_class = type(
+            "StubNewsSite1Scraper", (NewsSite1Scraper,), {"SITE": NewsSite1Scraper.SITE._replace(base_url=server.base_url)}
+        )
+        fetcher = TimedHtmlFetcher(
+            pool_size=args.pool_size,
+            max_connections_per_host=args.max_connections_per_host or None,
+            rate_limiter=TokenBucketRateLimiter(args.requests_per_second) if args.requests_per_second > 0 else None,
+            backoff_base=args.backoff_base,
+        )
+        storage_repository = LocalStorageRepository(
+            save_folder=save_folder, codec=get_article_codec(args.codec), sharded=args.sharded
+        )
+        scraper = scraper_class(
+            _BenchLogger(),
+            storage_repository,
+            fetcher,
+            max_workers=args.max_workers,
+            extractor=EXTRACTORS[args.parser](),
+            streaming=args.streaming,
+            parse_processes=args.parse_processes,
+        )
+
+        start = time.perf_counter()
+        scraper.execute()
+        elapsed = time.perf_counter() - start
+
+        # サーバープロセスを終了する前に計測する（解析用のプロセスプールは終了済み）
+        peak_rss_kib = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        peak_children_rss_kib = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+        saved_articles = len(storage_repository.get_saved_article_urls())
+        storage_repository.close()
+        fetcher.close()
+
+    article_latencies = fetcher.latencies["article"]
+    return {
+        "articles": args.pages * args.articles_per_page,
+        "saved_articles": saved_articles,
+        "elapsed_s": elapsed,
+        "articles_per_s": saved_articles / elapsed if elapsed > 0 else None,
+        "article_requests": len(article_latencies),
+        "article_latency_p50_ms": _to_ms(percentile(article_latencies, 50)),
+        "article_latency_p95_ms": _to_ms(percentile(article_latencies, 95)),
+        "list_latency_p50_ms": _to_ms(percentile(fetcher.latencies["list"], 50)),
+        "peak_rss_kib": peak_rss_kib,
+        "peak_children_rss_kib": peak_children_rss_kib,
+    }
+
+
+def _to_ms(seconds: Optional[float]) -> Optional[float]:
+    return seconds * 1000 if seconds is not None else None
+
+
+def print_results(results: dict, baseline: Optional[dict]) -> None:
+    """
+    計測結果を表示する（比較対象があれば比を並べる）
+    """
+    header = f"{'metric':<26} {'value':>12}"
+    if baseline is not None:
+        header += f" {'baseline':>12} {'ratio':>8}"
+    print(header)
+    for key, value in results.items():
+        line = f"{key:<26} {_format(value):>12}"
+        if baseline is not None:
+            baseline_value = baseline["results"].get(key)
+            ratio = value / baseline_value if isinstance(value, (int, float)) and baseline_value else None
+            line += f" {_format(baseline_value):>12} {(f'{ratio:.2f}x' if ratio is not None else '-'):>8}"
+        print(line)
+
+
+def _format(value) -> str:
+    if value is None:
+        return "-"
+    return f"{value:.2f}" if isinstance(value, float) else str(value)
+
+
+if __name__ == "__main__":
+    # 引数を設定
+    @classopt(default_long=True)
+    class Args:
+        pages: int = config(default=5, help="Article list pages served (default: 5)")
+        articles_per_page: int = config(default=20, help="Articles per list page (default: 20)")
+        article_size: int = config(default=50000, help="Approximate bytes per article page (default: 50000)")
+        latency: float = config(default=0.01, help="Seconds the server waits before every response (default: 0.01)")
+        error_rate: float = config(default=0.0, help="Probability of 503 for article pages, retried by the fetcher (default: 0.0)")
+        seed: int = config(default=0, help="Random seed for the error injection (default: 0)")
+        max_workers: int = config(default=4, help="Article pages fetched concurrently (default: 4)")
+        max_connections_per_host: int = config(default=0, help="Maximum concurrent requests, 0 for unlimited (default: 0)")
+        pool_size: int = config(default=10, help="Connection pool size (default: 10)")
+        requests_per_second: float = config(default=0.0, help="Rate limit, 0 for unlimited (default: 0.0)")
+        backoff_base: float = config(default=0.01, help="Backoff base in seconds for retried requests (default: 0.01)")
+        parser: str = config(default=parser_type.BS4, choices=[parser_type.BS4, parser_type.LXML], help="Parser for <main> (default: 'bs4')")
+        parse_processes: int = config(default=0, help="Processes extracting <main>, 0 to extract on the fetch threads (default: 0)")
+        streaming: bool = config(default=False, help="Stream article pages and stop reading at </main>")
+        codec: str = config(default=codec_type.NONE, choices=[codec_type.NONE, codec_type.GZIP, codec_type.ZSTD], help="Codec for saved articles (default: 'none')")
+        sharded: bool = config(default=False, help="Save articles into hash-prefix subfolders")
+        output: str = config(default="", help="JSON file to save the results (default: benchmarks/results/bench_scraper_<commit>_<time>.json)")
+        baseline: str = config(default="", help="JSON results of an earlier run to compare with (default: none)")
+
+    args = Args.from_args()
+
+    results = run_benchmark(args)
+    commit = get_git_commit()
+    report = {
+        "benchmark": "bench_scraper",
+        "commit": commit,
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "params": {key: value for key, value in vars(args).items() if key not in ("output", "baseline")},
+        "results": results,
+    }
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+    print_results(results, baseline)
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"bench_scraper_{commit or 'unknown'}_{datetime.now().strftime('%Y%m%d%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Saved results: {output}")
@@ -1,41 +1,235 @@
 import os
+import socket
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Dict
 
 from classopt import classopt, config
 
-from periodically_scraper.shared.const import storage_type
+from periodically_scraper.shared.const import codec_type, parser_type, storage_type
 from periodically_scraper.shared.gdrive_client import GDriveClient
 from periodically_scraper.shared.gdrive_logger import GDriveLogger
+from periodically_scraper.shared.scraping_tools import HtmlFetcher
+from periodically_scraper.shared.rate_limiter import TokenBucketRateLimiter
+from periodically_scraper.shared.http_cache import HttpCache
+from periodically_scraper.shared.crawl_checkpoint import CrawlCheckpoint
+from periodically_scraper.shared.shard_lease_table import ShardLeaseTable
 from periodically_scraper.shared.slack_client import slack
 from periodically_scraper.shared.repository.gdrive_storage_repository import GDriveStorageRepository
 from periodically_scraper.shared.repository.local_storage_repository import LocalStorageRepository
-from periodically_scraper.services.news_site_1_scraper import NewsSite1Scraper
+from periodically_scraper.shared.repository.pack_storage_repository import PackStorageRepository
+from periodically_scraper.shared.repository.article_manifest import ArticleManifest
+from periodically_scraper.shared.codec.article_codec_registry import get_article_codec
+from periodically_scraper.shared.extractor.bs4_main_element_extractor import Bs4MainElementExtractor
+from periodically_scraper.shared.extractor.lxml_main_element_extractor import LxmlMainElementExtractor
+from periodically_scraper.shared.repository.abstract_storage_repository import AbstractStorageRepository
+from periodically_scraper.services.base_scraper import BaseScraper
+from periodically_scraper.services.site_config import NEWS_SITE_1, SITES
 
 
 if __name__ == "__main__":
     # 引数を設定
     @classopt(default_long=True, default_short=True)
     class Args:
+        sites: str = config(
+            short=False,
+            help=f"Comma-separated sites to scrape concurrently, from: {', '.join(SITES)} (default: 'news_site_1')",
+            default=NEWS_SITE_1.name,
+        )
         save_folder: str = config(
-            help="Save article folder (default: 'gdrive')",
+            help="Save article folder, or 'pack:<folder>' to append articles to pack files (default: 'gdrive')",
             default=storage_type.GDRIVE,
         )
+        pool_size: int = config(
+            short=False,
+            help="Connection pool size per host (default: 10)",
+            default=10,
+        )
+        connect_timeout: float = config(
+            short=False,
+            help="HTTP connect timeout in seconds (default: 5.0)",
+            default=5.0,
+        )
+        read_timeout: float = config(
+            short=False,
+            help="HTTP read timeout in seconds (default: 30.0)",
+            default=30.0,
+        )
+        max_workers: int = config(
+            short=False,
+            help="Number of article pages fetched concurrently (default: 1)",
+            default=1,
+        )
+        max_connections_per_host: int = config(
+            short=False,
+            help="Maximum concurrent requests per host, 0 for unlimited (default: 4)",
+            default=4,
+        )
+        requests_per_second: float = config(
+            short=False,
+            help="Maximum requests per second per host (default: 2.0)",
+            default=2.0,
+        )
+        http_cache_dir: str = config(
+            short=False,
+            help="Folder to cache article list pages, empty to cache in memory only (default: '')",
+            default="",
+        )
+        manifest_path: str = config(
+            short=False,
+            help="SQLite manifest of saved articles, empty to list the save folder every run (default: '')",
+            default="",
+        )
+        log_flush_interval: float = config(
+            short=False,
+            help="Seconds between log uploads to Google Drive, 0 to disable; with both log flush options 0 every line is uploaded (default: 30.0)",
+            default=30.0,
+        )
+        log_flush_bytes: int = config(
+            short=False,
+            help="Upload the log once this many bytes are pending, 0 to disable (default: 65536)",
+            default=65536,
+        )
+        log_segment_max_bytes: int = config(
+            short=False,
+            help="Upload only new log lines as numbered segments of at most this size, 0 to disable (default: 0)",
+            default=0,
+        )
+        slack_interval: float = config(
+            short=False,
+            help="Seconds to coalesce Slack messages before posting them in the background (default: 5.0)",
+            default=5.0,
+        )
+        parser: str = config(
+            short=False,
+            help="Parser used to extract the main element of articles; 'lxml' is faster but serializes differently from the articles saved so far, so their content hashes no longer match (default: 'bs4')",
+            default=parser_type.BS4,
+            choices=[parser_type.BS4, parser_type.LXML],
+        )
+        parse_processes: int = config(
+            short=False,
+            help="Processes extracting <main>, 0 to extract on the fetch threads (default: 0)",
+            default=0,
+        )
+        pipeline_queue_size: int = config(
+            short=False,
+            help="Maximum articles buffered between pipeline stages (default: 32)",
+            default=32,
+        )
+        checkpoint_dir: str = config(
+            short=False,
+            help="Folder for per-site crawl checkpoints, which also keep the high-water mark (newest saved article) that stops normal runs and the failed articles retried by the next run; empty to disable, in which case a run stops at the first list page whose articles are all saved (default: none)",
+            default="",
+        )
+        resume: bool = config(
+            short=False,
+            help="Resume interrupted crawls from the checkpoints in --checkpoint_dir",
+            default=False,
+        )
+        backfill: bool = config(
+            short=False,
+            help="Binary-search the boundary of saved list pages and crawl from there to the last page",
+            default=False,
+        )
+        lease_db: str = config(
+            short=False,
+            help="SQLite table shared by backfill workers; run this command on several processes or machines to split the list pages into shards (default: none)",
+            default="",
+        )
+        pages_per_shard: int = config(
+            short=False,
+            help="List pages per backfill shard (default: 50)",
+            default=50,
+        )
+        lease_seconds: float = config(
+            short=False,
+            help="Seconds before a shard leased by a stopped worker is re-queued; renewed on every list page (default: 600.0)",
+            default=600.0,
+        )
+        worker_id: str = config(
+            short=False,
+            help="Unique name of this backfill worker (default: '<hostname>-<pid>')",
+            default="",
+        )
+        streaming: bool = config(
+            short=False,
+            help="Stream article pages and stop reading once </main> has been parsed; the main element is serialized with --parser",
+            default=False,
+        )
+        codec: str = config(
+            short=False,
+            help="Compression codec for saved articles (default: 'none')",
+            choices=[codec_type.NONE, codec_type.GZIP, codec_type.ZSTD],
+            default=codec_type.NONE,
+        )
+        sharded: bool = config(
+            short=False,
+            help="Save local articles into hash-prefix subfolders (see migrate_local_storage)",
+            default=False,
+        )
+        reconcile_manifest: bool = config(
+            short=False,
+            help="Reconcile the manifest with the save folder before scraping",
+            default=False,
+        )
 
     args = Args.from_args()
 
+    # Slackへの通知をバックグラウンドで送信する
+    slack.start_background(args.slack_interval)
+
     try:
+        # スクレイピングするサイトを設定
+        site_names = [site_name.strip() for site_name in args.sites.split(",") if site_name.strip()]
+        for site_name in site_names:
+            if site_name not in SITES:
+                raise Exception(f"Unknown site '{site_name}'. Choose from: {', '.join(SITES)}")
+        sites = [SITES[site_name] for site_name in dict.fromkeys(site_names)]
+        if args.resume and not args.checkpoint_dir:
+            raise Exception("--resume requires --checkpoint_dir.")
+        if args.lease_db and args.resume:
+            raise Exception("--lease_db resumes from the expired leases and cannot be used with --resume.")
+        if args.lease_db and args.save_folder.startswith(storage_type.PACK_PREFIX):
+            raise Exception("Pack files cannot be shared between backfill workers.")
+
         # GDriveClientインスタンスを作成
         gdrive = GDriveClient()
 
+        # 保存済み記事のマニフェストを設定（GDriveではサイトごとの保存先フォルダで記録を分ける）
+        manifest = ArticleManifest(args.manifest_path) if args.manifest_path else None
+
+        # 記事を保存するときのコーデックを設定
+        codec = get_article_codec(args.codec)
+
         # ストレージを設定
         if args.save_folder == storage_type.GDRIVE:
             # GDriveLoggerインスタンスを作成
-            logger = GDriveLogger(gdrive)
+            logger = GDriveLogger(
+                gdrive,
+                flush_interval=args.log_flush_interval or None,
+                flush_bytes=args.log_flush_bytes or None,
+                segment_max_bytes=args.log_segment_max_bytes or None,
+            )
             logger.initialize()
 
-            # StorageRepositoryインスタンスを作成
-            save_folder = NewsSite1Scraper.get_gdrive_save_folder_id(os.environ["HTML_FOLDER_ID"], gdrive)
-            storage_repository: GDriveStorageRepository = GDriveStorageRepository(save_folder, gdrive)
+            # StorageRepositoryインスタンスを作成（サイトごとに保存先フォルダが分かれている）
+            storage_repositories: Dict[str, AbstractStorageRepository] = {}
+            for site in sites:
+                save_folder = BaseScraper.get_gdrive_save_folder_id(os.environ["HTML_FOLDER_ID"], gdrive, site.base_url)
+                site_manifest = ArticleManifest(args.manifest_path, scope=save_folder) if args.manifest_path else None
+                storage_repositories[site.name] = GDriveStorageRepository(save_folder, gdrive, site_manifest, codec)
+
+        elif args.save_folder.startswith(storage_type.PACK_PREFIX):
+            # GDriveLoggerインスタンスを作成
+            logger = GDriveLogger(gdrive, use_gdrive=False)
+
+            # StorageRepositoryインスタンスを作成（フォルダが無ければ作成する）
+            storage_repository = PackStorageRepository(
+                save_folder=args.save_folder[len(storage_type.PACK_PREFIX):],
+                manifest=manifest,
+                codec=codec,
+            )
+            storage_repositories = {site.name: storage_repository for site in sites}
 
         else:
             # GDriveLoggerインスタンスを作成
@@ -47,13 +241,88 @@ if __name__ == "__main__":
                 raise Exception(f"Save folder '{save_folder}' does not exist.")
             if save_folder.is_dir() == False:
                 raise Exception(f"Save folder '{save_folder}' is not directory.")
-            storage_repository = LocalStorageRepository(save_folder=args.save_folder)
+            storage_repository = LocalStorageRepository(
+                save_folder=args.save_folder,
+                manifest=manifest,
+                codec=codec,
+                sharded=args.sharded,
+            )
+            storage_repositories = {site.name: storage_repository for site in sites}
 
-        # スクレイピングを実行
-        news_site_1_scraper = NewsSite1Scraper(
-            logger,
-            storage_repository,
+        # マニフェストを保存先と突き合わせる
+        if manifest is not None and args.reconcile_manifest:
+            for storage_repository in set(storage_repositories.values()):
+                storage_repository.reconcile_manifest()
+
+        # サイトごとのリクエスト頻度の上限を設定
+        rate_limiter = TokenBucketRateLimiter(args.requests_per_second)
+        for site in sites:
+            if site.requests_per_second is not None:
+                rate_limiter.set_rate(site.base_url, site.requests_per_second, site.burst)
+
+        # 全てのサイトでコネクションを使い回すフェッチャーを作成
+        fetcher = HtmlFetcher(
+            pool_size=args.pool_size,
+            connect_timeout=args.connect_timeout,
+            read_timeout=args.read_timeout,
+            max_connections_per_host=args.max_connections_per_host or None,
+            rate_limiter=rate_limiter,
+            cache=HttpCache(args.http_cache_dir or None),
         )
-        news_site_1_scraper.execute()
+
+        # main要素を抽出するパーサーを設定
+        if args.parser == parser_type.LXML:
+            extractor = LxmlMainElementExtractor()
+        else:
+            extractor = Bs4MainElementExtractor()
+
+        # サイトごとにスクレイピングを並行して実行する
+        scrapers = [
+            BaseScraper(
+                site,
+                logger,
+                storage_repositories[site.name],
+                fetcher,
+                max_workers=args.max_workers,
+                extractor=extractor,
+                streaming=args.streaming,
+                parse_processes=args.parse_processes,
+                queue_size=args.pipeline_queue_size,
+                checkpoint=CrawlCheckpoint(f"{args.checkpoint_dir}/{site.name}.json") if args.checkpoint_dir else None,
+                resume=args.resume,
+                backfill=args.backfill,
+            )
+            for site in sites
+        ]
+
+        # 分散バックフィルでは、シャードの調整テーブルを他のワーカーと共有する
+        lease_table = ShardLeaseTable(args.lease_db, args.lease_seconds) if args.lease_db else None
+        worker_id = args.worker_id or f"{socket.gethostname()}-{os.getpid()}"
+
+        def execute(scraper: BaseScraper) -> None:
+            # 1つのサイトで失敗しても、他のサイトのスクレイピングは続ける
+            try:
+                if lease_table is not None:
+                    scraper.execute_shards(
+                        lease_table,
+                        f"{worker_id}-{scraper.site.name}",
+                        args.pages_per_shard,
+                        # 止まったワーカーのリースが切れたら、すぐに引き継げる間隔で待つ
+                        poll_interval=min(30.0, args.lease_seconds / 4),
+                    )
+                else:
+                    scraper.execute()
+            except Exception:
+                slack.post_error()
+
+        with ThreadPoolExecutor(max_workers=len(scrapers), thread_name_prefix="Scraper") as executor:
+            list(executor.map(execute, scrapers))
+        if lease_table is not None:
+            lease_table.close()
+        for storage_repository in set(storage_repositories.values()):
+            storage_repository.close()
+        logger.close()
     except:
         slack.post_error()
+    finally:
+        slack.shutdown()
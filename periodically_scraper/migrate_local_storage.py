@@ -0,0 +1,31 @@
+from pathlib import Path
+
+from classopt import classopt, config
+
+from periodically_scraper.shared.repository.article_manifest import ArticleManifest
+from periodically_scraper.shared.repository.local_storage_repository import LocalStorageRepository
+
+
+if __name__ == "__main__":
+    # 引数を設定
+    @classopt(default_long=True, default_short=True)
+    class Args:
+        save_folder: str = config(
+            help="Save article folder with the flat layout",
+        )
+        manifest_path: str = config(
+            help="SQLite manifest whose storage ids are rewritten to the new paths (default: none)",
+            default="",
+        )
+
+    args = Args.from_args()
+
+    save_folder = Path(args.save_folder)
+    if save_folder.is_dir() == False:
+        raise Exception(f"Save folder '{save_folder}' is not directory.")
+
+    # 保存先フォルダの直下の記事をサブフォルダへ移動する
+    manifest = ArticleManifest(args.manifest_path) if args.manifest_path else None
+    storage_repository = LocalStorageRepository(save_folder=args.save_folder, manifest=manifest, sharded=True)
+    n_moved = storage_repository.migrate_to_sharded()
+    print(f"Moved {n_moved} articles to the sharded layout: {save_folder}")
@@ -0,0 +1,753 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from http import HTTPStatus
+import time
+from typing import Dict, Optional, Set, Tuple
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup, SoupStrainer
+import requests
+
+from periodically_scraper.shared import scraping_tools
+from periodically_scraper.shared.article_pipeline import ArticlePipeline
+from periodically_scraper.shared.crawl_checkpoint import CrawlCheckpoint
+from periodically_scraper.shared.shard_lease_table import Shard, ShardLeaseTable
+from periodically_scraper.shared.extractor.abstract_main_element_extractor import AbstractMainElementExtractor
+from periodically_scraper.shared.extractor.bs4_main_element_extractor import Bs4MainElementExtractor
+from ..shared.repository.abstract_storage_repository import AbstractStorageRepository
+from periodically_scraper.shared.slack_client import slack
+from periodically_scraper.shared.gdrive_client import GDriveClient
+from periodically_scraper.shared.gdrive_logger import GDriveLogger
+from periodically_scraper.services.site_config import SiteConfig
+
+
+class BaseScraper(object):
+    """
+    サイトの設定に従って記事一覧ページを巡回し、未保存の記事を保存するクラス
+
+    Attributes
+    ----------
+    site : SiteConfig
+        スクレイピングするサイトの設定
+    """
+
+    @staticmethod
+    def get_gdrive_save_folder_id(html_folder_id: str, gdrive: GDriveClient, base_url: str) -> str:
+        """
+        GDriveに保存するフォルダのIDを取得する
+
+        Parameters
+        ----------
+        html_folder_id : str
+            HTMLフォルダのID
+        gdrive : GDriveClient
+            GDriveクライアント
+        base_url : str
+            サイトURL（フォルダ名に含まれる文字列）
+
+        Returns
+        -------
+        str
+            GDriveに保存するフォルダのID
+        """
+        # 最初に見つかったフォルダで打ち切る
+        save_folder = next(
+            gdrive.iter_file(f"'{html_folder_id}' in parents and title contains '{base_url}'", page_size=10, fields="id"),
+            None,
+        )
+        if save_folder is None:
+            raise Exception(f"Save folder for '{base_url}' does not exist.")
+        return save_folder["id"]
+
+    def __init__(
+        self,
+        site: SiteConfig,
+        logger: GDriveLogger,
+        storage_repository: AbstractStorageRepository,
+        fetcher: Optional[scraping_tools.HtmlFetcher] = None,
+        max_workers: int = 1,
+        extractor: Optional[AbstractMainElementExtractor] = None,
+        streaming: bool = False,
+        parse_processes: int = 0,
+        queue_size: int = 32,
+        checkpoint: Optional[CrawlCheckpoint] = None,
+        resume: bool = False,
+        max_attempts: int = 3,
+        backfill: bool = False,
+    ) -> None:
+        """
+        コンストラクタ
+
+        Parameters
+        ----------
+        site : SiteConfig
+            スクレイピングするサイトの設定
+        logger : GDriveLogger
+            ロガー
+        storage_repository : AbstractStorageRepository
+            記事の保存先
+        fetcher : Optional[scraping_tools.HtmlFetcher], optional
+            HTMLの取得に使うフェッチャー, by default None（新しく作成する）
+        max_workers : int, optional
+            記事本文ページを並行して取得するスレッド数, by default 1（逐次実行）
+        extractor : Optional[AbstractMainElementExtractor], optional
+            main要素の抽出に使うパーサー, by default None（Bs4MainElementExtractor）
+        streaming : bool, optional
+            記事本文ページをストリーミングで取得し、main要素を読み終えた時点で読み込みを止めるかどうか,
+            by default False（読み込んだmain要素も extractor で抽出し直し、保存する形式を揃える）
+        parse_processes : int, optional
+            main要素の抽出に使うプロセス数, by default 0（取得したスレッドで抽出する）。
+            1以上の場合、取得・抽出・保存をパイプラインで並行して行う
+        queue_size : int, optional
+            パイプラインのステージ間のキューに溜める記事の最大数, by default 32
+        checkpoint : Optional[CrawlCheckpoint], optional
+            巡回の途中経過を保存するチェックポイント, by default None（保存しない）。
+            ハイウォーターマークと取得に失敗した記事もここに記録するため、None の場合は
+            全ての記事が保存済みのページで止める
+        resume : bool, optional
+            チェックポイントに中断した巡回があれば、その続きから再開するかどうか, by default False
+        max_attempts : int, optional
+            再開時に、取得に失敗した記事の取得を試みる最大回数, by default 3
+        backfill : bool, optional
+            保存済みの記事と未保存の記事の境界のページを二分探索し、そこから最終ページまで巡回するかどうか,
+            by default False（1ページ目から巡回する）
+        """
+        self.site = site
+        # 記事一覧ページで解析する要素
+        self.list_page_strainer = SoupStrainer(list(site.list_page_tags)) if site.list_page_tags is not None else None
+        self.logger = logger
+        self.storage_repository = storage_repository
+        self.fetcher = fetcher if fetcher is not None else scraping_tools.HtmlFetcher()
+        self.max_workers = max_workers
+        self.extractor = extractor if extractor is not None else Bs4MainElementExtractor()
+        self.streaming = streaming
+        self.parse_processes = parse_processes
+        self.queue_size = queue_size
+        self.pipeline: Optional[ArticlePipeline] = None
+        self.checkpoint = checkpoint
+        self.resume = resume
+        self.max_attempts = max_attempts
+        self.backfill = backfill
+        # 保存済みと分かった記事のURLの集合（記事一覧ページごとに保存先へ問い合わせ、保存のたびに更新する）
+        self.saved_article_urls: Set[str] = set()
+
+    def execute(self) -> None:
+        """
+        スクレイピングを実行する
+        """
+        try:
+            self._crawl()
+        finally:
+            self.close()
+
+    def execute_shards(
+        self,
+        lease_table: ShardLeaseTable,
+        worker_id: str,
+        pages_per_shard: int,
+        poll_interval: float = 30.0,
+    ) -> None:
+        """
+        記事一覧ページの全範囲をシャードに分け、リースできたシャードを巡回する（分散バックフィル）
+
+        同じ調整テーブルを使う複数のプロセスやマシンで実行すると、シャードを分け合って巡回する。
+        他のワーカーがリースしているシャードは、そのワーカーが止まって期限が切れたら引き継げるように、
+        全てのシャードが完了するか、リースできる回数の上限に達するまで待ち続ける
+
+        Parameters
+        ----------
+        lease_table : ShardLeaseTable
+            シャードの調整テーブル
+        worker_id : str
+            このワーカーの名前（ワーカー間で一意であること）
+        pages_per_shard : int
+            1つのシャードのページ数
+        poll_interval : float, optional
+            リースできるシャードが無いときに、他のワーカーのリースが切れるのを待つ間隔 [秒], by default 30.0
+        """
+        try:
+            log_msg = f"Start distributed backfill: {self.site.base_url} (worker: {worker_id})"
+            self.logger.info(log_msg)
+            slack.post_message(log_msg)
+
+            # 最終ページのページカウントを取得し、シャードを作成する（作成済みのシャードはそのまま）
+            list_page = self._fetch_list_page(1)
+            if list_page is None:
+                return
+            last_page_count = self._get_last_page_count(list_page)
+            lease_table.create_shards(self.site.name, last_page_count, pages_per_shard)
+
+            while True:
+                shard = lease_table.claim(self.site.name, worker_id, self.max_attempts)
+                if shard is None:
+                    if lease_table.count_claimable(self.site.name, self.max_attempts) == 0:
+                        break
+                    time.sleep(poll_interval)
+                    continue
+                log_msg = f"Claim shard: pages {shard.start_page}-{shard.end_page} (attempt {shard.attempts})"
+                self.logger.info(log_msg)
+                slack.post_message(log_msg)
+                try:
+                    completed = self._crawl_shard(shard, lease_table, worker_id)
+                except Exception as e:
+                    # 他のワーカーに任せ、このワーカーは次のシャードへ進む
+                    log_msg = f"Failed to crawl shard: pages {shard.start_page}-{shard.end_page}, error={e!r}"
+                    self.logger.log.error(log_msg)
+                    slack.post_message(log_msg)
+                    lease_table.release(shard, worker_id)
+                    continue
+                if completed:
+                    lease_table.complete(shard, worker_id)
+
+            log_msg = f"Finish distributed backfill. Remaining shards: {lease_table.count_remaining(self.site.name)}"
+            self.logger.info(log_msg)
+            slack.post_message(log_msg)
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        """
+        パイプラインのプロセスプールを終了する
+        """
+        if self.pipeline is not None:
+            self.pipeline.close()
+            self.pipeline = None
+
+    def _crawl(self) -> None:
+        """
+        記事一覧ページを巡回し、未保存の記事を保存する
+
+        通常は前回までに取得に失敗した記事を取得し直してから1ページ目から順に巡回し、
+        前回の実行で保存した最新の記事（ハイウォーターマーク）が載っているページ、
+        または全ての記事が保存済みのページで止める（ハイウォーターマークはチェックポイントに記録するため、
+        チェックポイントが無い場合は後者のみ）。
+        バックフィルでは、保存済みの記事と未保存の記事の境界のページを二分探索で見つけ、
+        そこから最終ページまで巡回する
+        """
+        # 開始ログを出力する
+        log_msg = f"Start scraping: {self.site.base_url}"
+        self.logger.info(log_msg)
+        slack.post_message(log_msg)
+
+        # 解析済みの記事一覧ページ（境界の探索で取得したページを巡回で使い回す）
+        list_pages: Dict[int, BeautifulSoup] = {}
+        # 1ページ目の記事（最後まで巡回できたら、このうち保存済みの最新の記事をハイウォーターマークにする）
+        first_page_article_urls: list = []
+        high_water_mark = self.checkpoint.high_water_mark if self.checkpoint is not None else None
+
+        # 中断した巡回があれば、未保存の記事を保存してから続きのページから再開する
+        start_page_count = 1
+        if self.resume and self.checkpoint is not None and self.checkpoint.is_in_progress():
+            start_page_count = self.checkpoint.page_count + 1
+            last_page_count = self.checkpoint.last_page_count
+            log_msg = f"Resume scraping: page {self.checkpoint.page_count} / {last_page_count}"
+            self.logger.info(log_msg)
+            slack.post_message(log_msg)
+            self._resume_articles()
+        else:
+            # 前回までに取得に失敗した記事を取得し直す（ハイウォーターマークより古い記事は巡回しないため）
+            if self.checkpoint is not None and len(self.checkpoint.get_retry_urls(self.max_attempts)) > 0:
+                self._resume_articles()
+
+            # 記事一覧ページを取得・解析し、最終ページのページカウントを取得
+            list_page = self._fetch_list_page(1)
+            if list_page is None:
+                return
+            list_pages[1] = list_page
+            last_page_count = self._get_last_page_count(list_page)
+            log_msg = f"Get last page count: {last_page_count}"
+            self.logger.info(log_msg)
+            slack.post_message(log_msg)
+
+            if self.backfill:
+                # 保存済みの記事と未保存の記事の境界のページから始める
+                start_page_count = self._find_backfill_start_page(last_page_count, list_pages)
+                if start_page_count is None:
+                    return
+                log_msg = f"Start backfill from page: {start_page_count} / {last_page_count}"
+                self.logger.info(log_msg)
+                slack.post_message(log_msg)
+            else:
+                first_page_article_urls = self._extract_article_page_urls(list_page)
+
+        for page_count in range(start_page_count, last_page_count + 1):
+            # 現在の記事一覧ページのページ数をログへ出力する
+            log_msg = f"Scraping page: {page_count} / {last_page_count}"
+            self.logger.info(log_msg)
+            slack.post_message(log_msg)
+
+            # 記事一覧ページを取得して解析する（解析済みのページは使い回す）
+            list_page = list_pages.pop(page_count, None)
+            if list_page is None:
+                list_page = self._fetch_list_page(page_count)
+                if list_page is None:
+                    return
+
+            # 記事一覧ページから記事本文ページへのリンクを抽出する
+            article_url_list = self._extract_article_page_urls(list_page)
+            self.logger.info(f"Get article page urls: {len(article_url_list)} articles")
+
+            # ハイウォーターマークより古い記事は前回までに巡回済み
+            reached_high_water_mark = not self.backfill and high_water_mark in article_url_list
+            if reached_high_water_mark:
+                article_url_list = article_url_list[:article_url_list.index(high_water_mark)]
+                self.logger.info(f"Reached high water mark: {high_water_mark}")
+
+            # 保存済みの記事のURLを除外する（保存先の全件は列挙せず、このページの記事だけを問い合わせる）
+            self.saved_article_urls |= self._get_saved_article_urls(article_url_list)
+            new_article_url_list = self._drop_saved_articles(article_url_list, self.saved_article_urls)
+            self.logger.info(f"Drop saved articles: Drop {len(article_url_list) - len(new_article_url_list)} articles")
+            slack.post_message(f"Save articles in this page: {len(new_article_url_list)} articles")
+
+            # そのページの全ての記事が既に保存済みだったら、処理終了（バックフィルでは最終ページまで続ける）
+            if len(new_article_url_list) == 0 and not self.backfill:
+                self.logger.info("All articles are saved. Break scraping.")
+                break
+
+            # 未保存の記事をスクレイピングして保存する
+            if len(new_article_url_list) > 0:
+                if self.checkpoint is not None:
+                    self.checkpoint.start_page(page_count, last_page_count, new_article_url_list)
+                self.logger.info("Start new articles scraping...")
+                self._scrape_articles(new_article_url_list)
+                if self.checkpoint is not None:
+                    self.checkpoint.save()
+
+            if reached_high_water_mark:
+                break
+
+        if self.checkpoint is not None:
+            # 取得・保存に失敗した記事より新しい記事をハイウォーターマークにすると、次回その記事を巡回しないため、
+            # 実際に保存済みの最新の記事にする（失敗した記事は次回の実行の最初に取得し直す）
+            newest_saved_url = next((url for url in first_page_article_urls if url in self.saved_article_urls), None)
+            self.checkpoint.finish(newest_saved_url)
+
+        # 終了ログを出力する
+        log_msg = "Finish scraping."
+        self.logger.info(log_msg)
+        slack.post_message(log_msg)
+
+    def _fetch_list_page(self, page_count: int) -> Optional[BeautifulSoup]:
+        """
+        記事一覧ページを取得して解析する
+
+        Parameters
+        ----------
+        page_count : int
+            ページ番号
+
+        Returns
+        -------
+        Optional[BeautifulSoup]
+            解析した記事一覧ページ（取得に失敗した場合はNone）
+        """
+        url = self.site.get_list_page_url(page_count)
+        self.logger.info(f"Scraping article list page: {url} ")
+        html, http_status = self.fetcher.get_html(url, use_cache=True)
+        if http_status != HTTPStatus.OK:
+            log_msg = f"Failed to get HTML: url={url}, http_status={http_status}"
+            self.logger.log.error(log_msg)
+            slack.post_message(log_msg)
+            return None
+        return self._parse_list_page(html)
+
+    def _crawl_shard(self, shard: Shard, lease_table: ShardLeaseTable, worker_id: str) -> bool:
+        """
+        シャードの記事一覧ページを巡回し、未保存の記事を保存する
+
+        前回までにこのシャードで保存できなかった記事を取得し直してから、ページごとにリースを延長しながら巡回する。
+        他のシャードに割り当て済みの記事は保存しない。保存できなかった記事が残っていれば例外を送出し、
+        シャードを他のワーカーに任せる
+
+        Parameters
+        ----------
+        shard : Shard
+            リースしたシャード
+        lease_table : ShardLeaseTable
+            シャードの調整テーブル
+        worker_id : str
+            このワーカーの名前
+
+        Returns
+        -------
+        bool
+            最後まで巡回できればTrue（リースの期限が切れて他のワーカーに移った場合はFalse）
+
+        Raises
+        ------
+        Exception
+            記事一覧ページの取得に失敗した場合、または保存できなかった記事が残っている場合
+        """
+        # ページがずれて、このシャードのページに載らなくなった記事もあるため、URLから取得し直す
+        self._scrape_shard_articles(shard, lease_table, lease_table.get_pending_articles(shard))
+
+        for page_count in range(shard.start_page, shard.end_page + 1):
+            if not lease_table.renew(shard, worker_id):
+                self.logger.log.warning(f"Lost lease of shard: pages {shard.start_page}-{shard.end_page}")
+                return False
+
+            self.logger.info(f"Scraping page: {page_count} (shard {shard.start_page}-{shard.end_page})")
+            list_page = self._fetch_list_page(page_count)
+            if list_page is None:
+                raise Exception(f"Failed to get article list page: {page_count}")
+
+            # 他のシャードに割り当て済みの記事を除外する
+            article_url_list = lease_table.claim_articles(shard, self._extract_article_page_urls(list_page))
+            self._scrape_shard_articles(shard, lease_table, article_url_list)
+
+        pending_urls = lease_table.get_pending_articles(shard)
+        if len(pending_urls) > 0:
+            raise Exception(f"Failed to save {len(pending_urls)} articles in shard")
+        return True
+
+    def _scrape_shard_articles(self, shard: Shard, lease_table: ShardLeaseTable, article_url_list: list) -> None:
+        """
+        シャードに割り当てた記事のうち未保存のものを保存し、保存済みの記事を記録する
+
+        Parameters
+        ----------
+        shard : Shard
+            リースしたシャード
+        lease_table : ShardLeaseTable
+            シャードの調整テーブル
+        article_url_list : list
+            シャードに割り当てた記事のURLのリスト
+        """
+        if len(article_url_list) == 0:
+            return
+        self.saved_article_urls |= self._get_saved_article_urls(article_url_list)
+        new_article_url_list = self._drop_saved_articles(article_url_list, self.saved_article_urls)
+        self.logger.info(f"Save articles in this page: {len(new_article_url_list)} articles")
+        if len(new_article_url_list) > 0:
+            self._scrape_articles(new_article_url_list)
+        lease_table.mark_articles_done(shard, (url for url in article_url_list if url in self.saved_article_urls))
+
+    def _find_backfill_start_page(self, last_page_count: int, list_pages: Dict[int, BeautifulSoup]) -> Optional[int]:
+        """
+        保存済みの記事が載っている最後のページを二分探索で見つける
+
+        記事一覧ページは新しい順に並んでおり、保存済みの記事は1ページ目から続くページに載っていると仮定する
+        （最新の記事が1ページ分以上溜まっている場合は、通常の巡回で先に保存する）。
+        取得する記事一覧ページは O(log ページ数) で済む
+
+        Parameters
+        ----------
+        last_page_count : int
+            最終ページのページ番号
+        list_pages : Dict[int, BeautifulSoup]
+            解析済みの記事一覧ページ（取得したページを追加する）
+
+        Returns
+        -------
+        Optional[int]
+            巡回を始めるページ番号（記事一覧ページの取得に失敗した場合はNone）
+        """
+        def has_saved_article(page_count: int) -> Optional[bool]:
+            if page_count not in list_pages:
+                list_page = self._fetch_list_page(page_count)
+                if list_page is None:
+                    return None
+                list_pages[page_count] = list_page
+            article_url_list = self._extract_article_page_urls(list_pages[page_count])
+            self.saved_article_urls |= self._get_saved_article_urls(article_url_list)
+            return any(url in self.saved_article_urls for url in article_url_list)
+
+        # 1ページ目にも保存済みの記事が無ければ、最初から巡回する
+        found = has_saved_article(1)
+        if not found:
+            return None if found is None else 1
+
+        # has_saved_article(low) が真である範囲を狭めていく
+        low, high = 1, last_page_count
+        while low < high:
+            middle = (low + high + 1) // 2
+            found = has_saved_article(middle)
+            if found is None:
+                return None
+            if found:
+                low = middle
+            else:
+                high = middle - 1
+        return low
+
+    def _resume_articles(self) -> None:
+        """
+        チェックポイントに記録された、未保存の記事と取得に失敗した記事を取得し直して保存する
+        """
+        retry_urls = self.checkpoint.get_retry_urls(self.max_attempts)
+        self.saved_article_urls |= self._get_saved_article_urls(retry_urls)
+        # 保存済みの記事は記録から取り除く
+        self.checkpoint.mark_saved(url for url in retry_urls if url in self.saved_article_urls)
+        retry_urls = self._drop_saved_articles(retry_urls, self.saved_article_urls)
+        self.logger.info(f"Retry pending and failed articles: {len(retry_urls)} articles")
+        if len(retry_urls) > 0:
+            self._scrape_articles(retry_urls)
+        self.checkpoint.save()
+
+    def _scrape_articles(self, article_url_list: list) -> None:
+        """
+        記事本文ページを取得して保存する
+
+        parse_processes が1以上の場合、取得・main要素の抽出・保存をパイプラインで並行して行う。
+        それ以外で max_workers が2以上の場合、取得とmain要素の抽出はスレッドプールで並行して行う。
+        取得に失敗した記事は記録して飛ばし、取得できた記事は最後にまとめて保存する
+
+        Parameters
+        ----------
+        article_url_list : list
+            記事本文ページのURLのリスト
+        """
+        if self.parse_processes > 0:
+            for article_url in article_url_list:
+                self.logger.info(f"Scraping article page: {article_url}")
+            self._get_pipeline().run(article_url_list)
+            return
+
+        articles = []
+        if self.max_workers <= 1:
+            for article_url in article_url_list:
+                self.logger.info(f"Scraping article page: {article_url}")
+                article = self._fetch_article(article_url)
+                if article is not None:
+                    articles.append(article)
+        else:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = {}
+                for article_url in article_url_list:
+                    self.logger.info(f"Scraping article page: {article_url}")
+                    futures[executor.submit(self._fetch_article, article_url)] = article_url
+                for future in as_completed(futures):
+                    # 1つの記事で失敗しても、取得できた他の記事は保存する
+                    try:
+                        article = future.result()
+                    except Exception as e:
+                        self._log_fetch_failure(futures[future], None, e)
+                        continue
+                    if article is not None:
+                        articles.append(article)
+
+        # 記事をまとめて保存する
+        self._save_articles(articles)
+
+    def _get_pipeline(self) -> ArticlePipeline:
+        """
+        取得・main要素の抽出・保存のパイプラインを取得する（最初に使うときに作成し、ページ間で使い回す）
+
+        Returns
+        -------
+        ArticlePipeline
+            パイプライン
+        """
+        if self.pipeline is None:
+            self.pipeline = ArticlePipeline(
+                fetch=self._fetch_html,
+                parse=self.extractor.extract,
+                save=self._save_articles,
+                on_fetch_failure=self._log_fetch_failure,
+                fetch_workers=self.max_workers,
+                parse_workers=self.parse_processes,
+                queue_size=self.queue_size,
+            )
+        return self.pipeline
+
+    def _fetch_html(self, article_url: str) -> Tuple[str, int]:
+        """
+        記事本文ページのHTMLを取得する（ストリーミングの場合はmain要素のみ）
+
+        Parameters
+        ----------
+        article_url : str
+            記事本文ページのURL
+
+        Returns
+        -------
+        str
+            HTML文書
+        int
+            HTTP status code
+        """
+        if self.streaming:
+            return self.fetcher.get_main_html(article_url)
+        return self.fetcher.get_html(article_url)
+
+    def _log_fetch_failure(self, article_url: str, http_status: Optional[int], error: Optional[Exception] = None) -> None:
+        """
+        記事本文ページの取得に失敗したことをログへ出力する
+
+        Parameters
+        ----------
+        article_url : str
+            記事本文ページのURL
+        http_status : Optional[int]
+            HTTP status code（レスポンスを受け取れなかった場合はNone）
+        error : Optional[Exception], optional
+            取得中に送出された例外, by default None
+        """
+        if error is not None:
+            log_msg = f"Failed to get HTML: url={article_url}, error={error!r}"
+        else:
+            log_msg = f"Failed to get HTML: url={article_url}, http_status={http_status}"
+        self.logger.log.error(log_msg)
+        slack.post_message(log_msg)
+        if self.checkpoint is not None:
+            self.checkpoint.mark_failed(article_url)
+
+    def _fetch_article(self, article_url: str) -> Optional[Tuple[str, str]]:
+        """
+        記事本文ページのHTMLを取得し、main要素を抽出する
+
+        取得に失敗した場合（リトライしても接続できなかった場合を含む）はログへ出力し、Noneを返す
+
+        Parameters
+        ----------
+        article_url : str
+            記事本文ページのURL
+
+        Returns
+        -------
+        Optional[Tuple[str, str]]
+            (main要素, 記事本文ページのURL)（取得に失敗した場合はNone）
+        """
+        try:
+            html, http_status = self._fetch_html(article_url)
+        except requests.RequestException as e:
+            self._log_fetch_failure(article_url, None, e)
+            return None
+        if http_status != HTTPStatus.OK:
+            self._log_fetch_failure(article_url, http_status)
+            return None
+
+        # 容量削減のため、main要素のみを抽出する（ストリーミングで取得したmain要素も、
+        # extractor に合わせたシリアライズにする）
+        main_html = self._extract_main_element(html)
+        return main_html, article_url
+
+    def _parse_list_page(self, html: str) -> BeautifulSoup:
+        """
+        記事一覧ページを解析する
+
+        抽出に必要な要素だけを解析し、結果は全ての抽出処理で使い回す
+
+        Parameters
+        ----------
+        html : str
+            記事一覧ページのHTML文書
+
+        Returns
+        -------
+        BeautifulSoup
+            解析した記事一覧ページ
+        """
+        return BeautifulSoup(html, "lxml", parse_only=self.list_page_strainer)
+
+    def _extract_article_page_urls(self, soup: BeautifulSoup) -> list:
+        """
+        記事一覧ページから記事本文ページへのリンクを抽出する
+        Parameters
+        ----------
+        soup : BeautifulSoup
+            解析した記事一覧ページ
+
+        Returns
+        -------
+        list
+            記事本文ページへのリンクのリスト
+        """
+        article_url_list = []
+        for article_html in soup.select(self.site.article_selector):
+            link = article_html.select_one(self.site.article_link_selector)
+            if link is not None and link.get("href"):
+                article_url_list.append(urljoin(self.site.base_url, link.get("href")))
+        return article_url_list
+
+    def _save_articles(self, articles: list) -> None:
+        """
+        記事をまとめて保存する
+
+        Parameters
+        ----------
+        articles : list
+            (記事のHTML文書, 記事のURL) のリスト
+        """
+        if len(articles) == 0:
+            return
+        failures = dict(self.storage_repository.save_articles(articles))
+        for _, url in articles:
+            if url in failures:
+                log_msg = f"Failed to save article: url={url}, error={failures[url]!r}"
+                self.logger.log.error(log_msg)
+                slack.post_message(log_msg)
+                if self.checkpoint is not None:
+                    self.checkpoint.mark_failed(url)
+                continue
+            self.saved_article_urls.add(url)
+            self.logger.info(f"Saved article: {url}")
+        if self.checkpoint is not None:
+            self.checkpoint.mark_saved(url for _, url in articles if url not in failures)
+            self.checkpoint.save()
+
+    def _get_saved_article_urls(self, article_url_list: list) -> Set[str]:
+        """
+        記事のうち保存済みのもののURLを取得する
+
+        Parameters
+        ----------
+        article_url_list : list
+            記事本文ページのURLのリスト
+
+        Returns
+        -------
+        Set[str]
+            保存済み記事のURLの集合
+        """
+        unknown_urls = [url for url in dict.fromkeys(article_url_list) if url not in self.saved_article_urls]
+        return self.storage_repository.contains_many(unknown_urls)
+
+    def _drop_saved_articles(self, current_article_list: list, saved_article_urls: Set[str]) -> list:
+        """
+        保存済みの記事を除外する
+
+        Parameters
+        ----------
+        current_article_list : list
+            現在の記事のリスト
+        saved_article_urls : Set[str]
+            保存済みの記事のURLの集合
+
+        Returns
+        -------
+        list
+            除外済みの記事のリスト（記事一覧ページでの順序を保つ）
+        """
+        return [article_url for article_url in dict.fromkeys(current_article_list) if article_url not in saved_article_urls]
+
+    def _get_last_page_count(self, soup: BeautifulSoup) -> int:
+        """
+        最終ページ番号を取得する
+        Parameters
+        ----------
+        soup : BeautifulSoup
+            解析した記事一覧ページ
+
+        Returns
+        -------
+        int
+            最終ページ番号
+        """
+        last_page_link = soup.select_one(self.site.last_page_link_selector)
+        last_page_count = int(last_page_link.get("href").split("/")[self.site.page_count_pos])
+        return last_page_count
+
+    def _extract_main_element(self, html: str) -> str:
+        """
+        メイン要素を抽出する
+        Parameters
+        ----------
+        html : str
+            記事一覧ページのHTML文書
+
+        Returns
+        -------
+        str
+            メイン要素
+        """
+        return self.extractor.extract(html)
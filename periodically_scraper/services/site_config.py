@@ -0,0 +1,74 @@
+from typing import Dict, NamedTuple, Optional, Tuple
+
+
+class SiteConfig(NamedTuple):
+    """
+    スクレイピングするサイトの設定
+
+    Attributes
+    ----------
+    name : str
+        サイト名（コマンドライン引数で指定する名前）
+    base_url : str
+        サイトURL
+    list_page_url_template : str
+        記事一覧ページURLのテンプレート（{base_url} と {page_count} を置き換える）
+    article_selector : str
+        記事一覧ページで記事を選択するCSSセレクタ
+    article_link_selector : str
+        記事の中で記事本文ページへのリンクを選択するCSSセレクタ
+    last_page_link_selector : str
+        記事一覧ページで最終ページへのリンクを選択するCSSセレクタ
+    page_count_pos : int
+        最終ページへのリンクを "/" で区切ったときの、ページ番号の位置
+    list_page_tags : Optional[Tuple[str, ...]]
+        記事一覧ページで解析する要素のタグ名（セレクタで選択する要素を全て含むこと。Noneなら全て解析する）
+    requests_per_second : Optional[float]
+        サイトへの1秒あたりのリクエスト数の上限（Noneならコマンドライン引数の値）
+    burst : int
+        サイトへ連続して送れるリクエスト数の上限
+    """
+    name: str
+    base_url: str
+    list_page_url_template: str
+    article_selector: str
+    article_link_selector: str
+    last_page_link_selector: str
+    page_count_pos: int
+    list_page_tags: Optional[Tuple[str, ...]] = None
+    requests_per_second: Optional[float] = None
+    burst: int = 1
+
+    def get_list_page_url(self, page_count: int) -> str:
+        """
+        記事一覧ページのURLを取得する
+
+        Parameters
+        ----------
+        page_count : int
+            ページ番号
+
+        Returns
+        -------
+        str
+            記事一覧ページのURL
+        """
+        return self.list_page_url_template.format(base_url=self.base_url, page_count=page_count)
+
+
+# ニュースサイト1
+NEWS_SITE_1 = SiteConfig(
+    name="news_site_1",
+    base_url="https://www.news-site-1.com",
+    list_page_url_template="{base_url}/page/{page_count}",
+    article_selector="main article",
+    article_link_selector="a",
+    last_page_link_selector="a.pagenavi-item.pagenavi-item--last",
+    page_count_pos=-2,
+    list_page_tags=("main", "a"),
+)
+
+# サイト名とサイトの設定の対応辞書（サイトを追加する場合はここに設定を追加する）
+SITES: Dict[str, SiteConfig] = {
+    NEWS_SITE_1.name: NEWS_SITE_1,
+}
@@ -0,0 +1,260 @@
+import multiprocessing
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from http import HTTPStatus
+from typing import Callable, Iterable, List, Optional, Tuple
+
+
+class ArticlePipeline(object):
+    """
+    記事の取得・解析・保存をステージに分けて並行して実行するパイプライン
+
+    取得はI/O用のスレッド、解析はGILの影響を受けないプロセスプール、保存は書き込み用のスレッドで行い、
+    ステージの間は上限付きのキューでつなぐ。後段が詰まると前段はキューへの追加で待つため、
+    メモリ上に溜まる記事の数は上限を超えない
+
+    Attributes
+    ----------
+    fetch_workers : int
+        取得するスレッド数
+    parse_workers : int
+        解析するプロセス数
+    save_workers : int
+        保存するスレッド数
+    queue_size : int
+        ステージ間のキューに溜める記事の最大数
+    save_batch_size : int
+        まとめて保存する記事の最大数
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[str], Tuple[Optional[str], int]],
+        parse: Optional[Callable[[str], str]],
+        save: Callable[[List[Tuple[str, str]]], None],
+        on_fetch_failure: Callable[[str, int], None],
+        fetch_workers: int = 4,
+        parse_workers: int = 2,
+        save_workers: int = 1,
+        queue_size: int = 32,
+        save_batch_size: int = 20,
+    ) -> None:
+        """
+        コンストラクタ
+
+        Parameters
+        ----------
+        fetch : Callable[[str], Tuple[Optional[str], int]]
+            URLから (HTML文書, HTTP status code) を取得する関数
+        parse : Optional[Callable[[str], str]]
+            HTML文書から保存する文書を抽出する関数（プロセス間で受け渡すため pickle できること。
+            Noneなら取得した文書をそのまま保存する）
+        save : Callable[[List[Tuple[str, str]]], None]
+            (文書, URL) のリストをまとめて保存する関数
+        on_fetch_failure : Callable[[str, int], None]
+            取得に失敗したときに (URL, HTTP status code) を受け取る関数
+        fetch_workers : int, optional
+            取得するスレッド数, by default 4
+        parse_workers : int, optional
+            解析するプロセス数, by default 2
+        save_workers : int, optional
+            保存するスレッド数, by default 1
+        queue_size : int, optional
+            ステージ間のキューに溜める記事の最大数, by default 32
+        save_batch_size : int, optional
+            まとめて保存する記事の最大数, by default 20
+        """
+        self.__fetch = fetch
+        self.__parse = parse
+        self.__save = save
+        self.__on_fetch_failure = on_fetch_failure
+        self.fetch_workers = fetch_workers
+        self.parse_workers = parse_workers
+        self.save_workers = save_workers
+        self.queue_size = queue_size
+        self.save_batch_size = save_batch_size
+        self.__process_pool: Optional[ProcessPoolExecutor] = None
+
+    def __enter__(self) -> "ArticlePipeline":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def run(self, urls: Iterable[str]) -> None:
+        """
+        全ての記事を取得・解析・保存し終えるまで実行する
+
+        いずれかのステージで例外が発生しても残りの記事の処理は続け、最後に最初の例外を送出する
+
+        Parameters
+        ----------
+        urls : Iterable[str]
+            記事のURL
+        """
+        url_queue: "queue.Queue[str]" = queue.Queue()
+        for url in urls:
+            url_queue.put(url)
+        parse_queue: "queue.Queue[Optional[Tuple[str, str]]]" = queue.Queue(maxsize=self.queue_size)
+        save_queue: "queue.Queue[Optional[Tuple[str, str]]]" = queue.Queue(maxsize=self.queue_size)
+        errors: List[Exception] = []
+
+        # 解析しない場合は、取得した文書を直接保存のキューへ入れる
+        next_queue = parse_queue if self.__parse is not None else save_queue
+        fetchers = self.__start_threads(self.fetch_workers, "Fetcher", self.__run_fetcher, url_queue, next_queue, errors)
+        parsers = []
+        if self.__parse is not None:
+            process_pool = self.__get_process_pool()
+            parsers = self.__start_threads(
+                self.parse_workers, "Parser", self.__run_parser, process_pool, parse_queue, save_queue, errors
+            )
+        savers = self.__start_threads(self.save_workers, "Saver", self.__run_saver, save_queue, errors)
+
+        # 前段のステージが終わったら、後段のステージへ終了を伝える
+        self.__join(fetchers)
+        if self.__parse is not None:
+            for _ in parsers:
+                parse_queue.put(None)
+            self.__join(parsers)
+        for _ in savers:
+            save_queue.put(None)
+        self.__join(savers)
+
+        if len(errors) > 0:
+            raise errors[0]
+
+    def close(self) -> None:
+        """
+        解析用のプロセスプールを終了する
+        """
+        if self.__process_pool is not None:
+            self.__process_pool.shutdown()
+            self.__process_pool = None
+
+    def __start_threads(self, n_threads: int, name: str, target: Callable, *args) -> List[threading.Thread]:
+        """
+        ステージのスレッドを開始する
+
+        Parameters
+        ----------
+        n_threads : int
+            スレッド数
+        name : str
+            スレッド名
+        target : Callable
+            スレッドの処理
+
+        Returns
+        -------
+        List[threading.Thread]
+            開始したスレッドのリスト
+        """
+        threads = [
+            threading.Thread(target=target, args=args, name=f"{name}-{i}", daemon=True)
+            for i in range(max(1, n_threads))
+        ]
+        for thread in threads:
+            thread.start()
+        return threads
+
+    @staticmethod
+    def __join(threads: List[threading.Thread]) -> None:
+        """
+        ステージの全てのスレッドが終わるまで待つ
+
+        Parameters
+        ----------
+        threads : List[threading.Thread]
+            スレッドのリスト
+        """
+        for thread in threads:
+            thread.join()
+
+    def __run_fetcher(self, url_queue: "queue.Queue[str]", next_queue: queue.Queue, errors: List[Exception]) -> None:
+        """
+        URLのキューが空になるまで記事を取得するスレッドの処理
+        """
+        while True:
+            try:
+                url = url_queue.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                html, http_status = self.__fetch(url)
+                if http_status != HTTPStatus.OK:
+                    self.__on_fetch_failure(url, http_status)
+                    continue
+            except Exception as e:
+                errors.append(e)
+                continue
+            # 後段が詰まっている間は待つ
+            next_queue.put((html, url))
+
+    def __run_parser(
+        self,
+        process_pool: ProcessPoolExecutor,
+        parse_queue: queue.Queue,
+        save_queue: queue.Queue,
+        errors: List[Exception],
+    ) -> None:
+        """
+        取得した記事をプロセスプールで解析するスレッドの処理
+
+        スレッド数とプロセス数を同じにし、プロセスプールへ投入する記事の数を抑える
+        """
+        while True:
+            item = parse_queue.get()
+            if item is None:
+                return
+            html, url = item
+            try:
+                parsed = process_pool.submit(self.__parse, html).result()
+            except Exception as e:
+                errors.append(e)
+                continue
+            save_queue.put((parsed, url))
+
+    def __run_saver(self, save_queue: queue.Queue, errors: List[Exception]) -> None:
+        """
+        解析した記事をまとめて保存するスレッドの処理
+
+        キューに溜まっている記事を save_batch_size 件までまとめて保存する
+        """
+        stopped = False
+        while not stopped:
+            item = save_queue.get()
+            if item is None:
+                return
+            batch = [item]
+            while len(batch) < self.save_batch_size:
+                try:
+                    item = save_queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopped = True
+                    break
+                batch.append(item)
+            try:
+                self.__save(batch)
+            except Exception as e:
+                errors.append(e)
+
+    def __get_process_pool(self) -> ProcessPoolExecutor:
+        """
+        解析用のプロセスプールを取得する（最初に使うときに作成する）
+
+        作成する時点ではSlackやログのスレッド、他のサイトのスレッドが動いているため、
+        スレッドごとfork してデッドロックしないように、spawn で新しいプロセスを起動する
+
+        Returns
+        -------
+        ProcessPoolExecutor
+            プロセスプール
+        """
+        if self.__process_pool is None:
+            self.__process_pool = ProcessPoolExecutor(
+                max_workers=self.parse_workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self.__process_pool
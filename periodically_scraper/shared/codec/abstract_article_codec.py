@@ -0,0 +1,54 @@
+from abc import ABC, abstractmethod
+
+
+class AbstractArticleCodec(object):
+    """
+    保存する記事のHTML文書を圧縮・展開するクラス
+
+    Attributes
+    ----------
+    name : str
+        コーデック名（codec_type の値）
+    suffix : str
+        保存ファイル名に付ける拡張子（圧縮しない場合は空文字列）
+    mime_type : str
+        保存ファイルのMIMEタイプ
+    """
+
+    name = ""
+    suffix = ""
+    mime_type = ""
+
+    @abstractmethod
+    def encode(self, html: str) -> bytes:
+        """
+        HTML文書を保存するバイト列へ変換する
+
+        Parameters
+        ----------
+        html : str
+            HTML文書
+
+        Returns
+        -------
+        bytes
+            保存するバイト列
+        """
+        pass
+
+    @abstractmethod
+    def decode(self, data: bytes) -> str:
+        """
+        保存したバイト列をHTML文書へ戻す
+
+        Parameters
+        ----------
+        data : bytes
+            保存したバイト列
+
+        Returns
+        -------
+        str
+            HTML文書
+        """
+        pass
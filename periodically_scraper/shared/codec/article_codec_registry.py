@@ -0,0 +1,55 @@
+from typing import List, Tuple
+
+from periodically_scraper.shared.codec.abstract_article_codec import AbstractArticleCodec
+from periodically_scraper.shared.codec.gzip_article_codec import GzipArticleCodec
+from periodically_scraper.shared.codec.plain_article_codec import PlainArticleCodec
+from periodically_scraper.shared.codec.zstd_article_codec import ZstdArticleCodec
+from periodically_scraper.shared.const import codec_type
+
+
+# 保存ファイル名の拡張子から判別できるコーデック（圧縮しないコーデックは最後）
+ARTICLE_CODECS: List[AbstractArticleCodec] = [GzipArticleCodec(), ZstdArticleCodec(), PlainArticleCodec()]
+
+
+def get_article_codec(name: str) -> AbstractArticleCodec:
+    """
+    コーデック名からコーデックを取得する
+
+    Parameters
+    ----------
+    name : str
+        コーデック名（codec_type の値）
+
+    Returns
+    -------
+    AbstractArticleCodec
+        コーデック
+    """
+    if name == codec_type.ZSTD and not ZstdArticleCodec.is_available():
+        raise ValueError("zstandard is not installed. Run 'pip install zstandard' to use the zstd codec.")
+    for codec in ARTICLE_CODECS:
+        if codec.name == name:
+            return codec
+    raise ValueError(f"Unknown codec: {name}")
+
+
+def split_codec_suffix(filename: str) -> Tuple[str, AbstractArticleCodec]:
+    """
+    保存ファイル名から、コーデックの拡張子を除いた元のファイル名とコーデックを取得する
+
+    拡張子の無いファイル（圧縮機能の導入前に保存したファイルを含む）は圧縮していないものとして扱う
+
+    Parameters
+    ----------
+    filename : str
+        保存ファイル名
+
+    Returns
+    -------
+    Tuple[str, AbstractArticleCodec]
+        (元のファイル名, コーデック)
+    """
+    for codec in ARTICLE_CODECS:
+        if codec.suffix and filename.endswith(codec.suffix):
+            return filename[:-len(codec.suffix)], codec
+    return filename, PlainArticleCodec()
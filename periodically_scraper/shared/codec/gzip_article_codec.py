@@ -0,0 +1,37 @@
+import gzip
+from io import BytesIO
+
+from periodically_scraper.shared.codec.abstract_article_codec import AbstractArticleCodec
+from periodically_scraper.shared.const import codec_type
+
+
+class GzipArticleCodec(AbstractArticleCodec):
+    """
+    gzipで圧縮して保存するコーデック
+    """
+
+    name = codec_type.GZIP
+    suffix = ".gz"
+    mime_type = "application/gzip"
+
+    def __init__(self, level: int = 6) -> None:
+        """
+        コンストラクタ
+
+        Parameters
+        ----------
+        level : int, optional
+            圧縮レベル（1〜9）, by default 6
+        """
+        self.level = level
+
+    def encode(self, html: str) -> bytes:
+        # 同じ記事が同じバイト列になるように、ヘッダーの更新日時は0に固定する
+        # （gzip.compress の mtime 引数は Python 3.8 以降のため GzipFile を使う）
+        buffer = BytesIO()
+        with gzip.GzipFile(fileobj=buffer, mode="wb", compresslevel=self.level, mtime=0) as f:
+            f.write(html.encode())
+        return buffer.getvalue()
+
+    def decode(self, data: bytes) -> str:
+        return gzip.decompress(data).decode()
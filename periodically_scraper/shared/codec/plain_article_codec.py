@@ -0,0 +1,18 @@
+from periodically_scraper.shared.codec.abstract_article_codec import AbstractArticleCodec
+from periodically_scraper.shared.const import codec_type
+
+
+class PlainArticleCodec(AbstractArticleCodec):
+    """
+    圧縮せず、UTF-8のまま保存するコーデック
+    """
+
+    name = codec_type.NONE
+    suffix = ""
+    mime_type = "text/html"
+
+    def encode(self, html: str) -> bytes:
+        return html.encode()
+
+    def decode(self, data: bytes) -> str:
+        return data.decode()
@@ -0,0 +1,58 @@
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+from periodically_scraper.shared.codec.abstract_article_codec import AbstractArticleCodec
+from periodically_scraper.shared.const import codec_type
+
+
+class ZstdArticleCodec(AbstractArticleCodec):
+    """
+    Zstandardで圧縮して保存するコーデック
+
+    zstandard パッケージがインストールされている場合のみ使える
+    """
+
+    name = codec_type.ZSTD
+    suffix = ".zst"
+    mime_type = "application/zstd"
+
+    def __init__(self, level: int = 3) -> None:
+        """
+        コンストラクタ
+
+        Parameters
+        ----------
+        level : int, optional
+            圧縮レベル（1〜22）, by default 3
+        """
+        self.level = level
+
+    @staticmethod
+    def is_available() -> bool:
+        """
+        zstandard パッケージが使えるかどうか
+
+        Returns
+        -------
+        bool
+            使える場合はTrue
+        """
+        return zstandard is not None
+
+    def encode(self, html: str) -> bytes:
+        self.__check_available()
+        # ZstdCompressor はスレッドセーフではないため、呼び出しごとに作成する
+        return zstandard.ZstdCompressor(level=self.level).compress(html.encode())
+
+    def decode(self, data: bytes) -> str:
+        self.__check_available()
+        return zstandard.ZstdDecompressor().decompress(data).decode()
+
+    def __check_available(self) -> None:
+        """
+        zstandard パッケージが使えない場合は例外を送出する
+        """
+        if not self.is_available():
+            raise ImportError("zstandard is not installed. Run 'pip install zstandard' to use the zstd codec.")
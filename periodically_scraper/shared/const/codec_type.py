@@ -0,0 +1,3 @@
+NONE = "none"
+GZIP = "gzip"
+ZSTD = "zstd"
@@ -0,0 +1,2 @@
+BS4 = "bs4"
+LXML = "lxml"
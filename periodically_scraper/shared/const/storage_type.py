@@ -1 +1,2 @@
 GDRIVE = "gdrive"
+PACK_PREFIX = "pack:"
@@ -0,0 +1,168 @@
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+
+class CrawlCheckpoint(object):
+    """
+    巡回の途中経過を保存するチェックポイント
+
+    処理中の記事一覧ページ、そのページで未保存の記事のURL、取得に失敗した記事のURLと試行回数、
+    ハイウォーターマークをJSONファイルに保存する。
+    書き込み途中で中断しても壊れないように、一時ファイルへ書いてから置き換える
+
+    Attributes
+    ----------
+    path : Path
+        チェックポイントファイルのパス
+    page_count : int
+        処理中の記事一覧ページのページ番号（巡回していない場合は0）
+    last_page_count : Optional[int]
+        最終ページのページ番号
+    pending_urls : List[str]
+        処理中の記事一覧ページで未保存の記事のURL
+    failed_attempts : Dict[str, int]
+        取得に失敗した記事のURLと試行回数
+    high_water_mark : Optional[str]
+        最後まで巡回できた実行で保存した、最新の記事のURL
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        コンストラクタ（ファイルがあれば読み込む）
+
+        Parameters
+        ----------
+        path : str
+            チェックポイントファイルのパス
+        """
+        self.path = Path(path)
+        self.page_count = 0
+        self.last_page_count: Optional[int] = None
+        self.pending_urls: List[str] = []
+        self.failed_attempts: Dict[str, int] = {}
+        self.high_water_mark: Optional[str] = None
+        self.__lock = threading.Lock()
+        if self.path.exists():
+            with open(self.path, "r") as f:
+                state = json.load(f)
+            self.page_count = state.get("page_count", 0)
+            self.last_page_count = state.get("last_page_count")
+            self.pending_urls = state.get("pending_urls", [])
+            self.failed_attempts = state.get("failed_attempts", {})
+            self.high_water_mark = state.get("high_water_mark")
+
+    def is_in_progress(self) -> bool:
+        """
+        中断した巡回があるかどうか
+
+        Returns
+        -------
+        bool
+            記事一覧ページの途中で中断していればTrue
+        """
+        return self.page_count > 0
+
+    def get_retry_urls(self, max_attempts: int) -> List[str]:
+        """
+        再開時に取得し直す記事のURLを取得する
+
+        Parameters
+        ----------
+        max_attempts : int
+            取得を試みる最大回数（この回数失敗した記事は取得し直さない）
+
+        Returns
+        -------
+        List[str]
+            未保存の記事と、試行回数が上限未満の失敗した記事のURL
+        """
+        with self.__lock:
+            retry_urls = [url for url, attempts in self.failed_attempts.items() if attempts < max_attempts]
+            return list(dict.fromkeys(self.pending_urls + retry_urls))
+
+    def start_page(self, page_count: int, last_page_count: int, pending_urls: Iterable[str]) -> None:
+        """
+        記事一覧ページの処理を始めたことを記録して保存する
+
+        Parameters
+        ----------
+        page_count : int
+            記事一覧ページのページ番号
+        last_page_count : int
+            最終ページのページ番号
+        pending_urls : Iterable[str]
+            そのページで未保存の記事のURL
+        """
+        with self.__lock:
+            self.page_count = page_count
+            self.last_page_count = last_page_count
+            self.pending_urls = list(pending_urls)
+        self.save()
+
+    def mark_saved(self, urls: Iterable[str]) -> None:
+        """
+        記事を保存したことを記録する
+
+        Parameters
+        ----------
+        urls : Iterable[str]
+            保存した記事のURL
+        """
+        urls = set(urls)
+        with self.__lock:
+            self.pending_urls = [url for url in self.pending_urls if url not in urls]
+            for url in urls:
+                self.failed_attempts.pop(url, None)
+
+    def mark_failed(self, url: str) -> None:
+        """
+        記事の取得または保存に失敗したことを記録する
+
+        Parameters
+        ----------
+        url : str
+            失敗した記事のURL
+        """
+        with self.__lock:
+            self.pending_urls = [pending_url for pending_url in self.pending_urls if pending_url != url]
+            self.failed_attempts[url] = self.failed_attempts.get(url, 0) + 1
+
+    def finish(self, high_water_mark: Optional[str] = None) -> None:
+        """
+        巡回を最後まで終えたことを記録して保存する（失敗した記事の記録は残す）
+
+        Parameters
+        ----------
+        high_water_mark : Optional[str], optional
+            今回の実行で保存した最新の記事のURL, by default None（ハイウォーターマークを変更しない）
+        """
+        with self.__lock:
+            if high_water_mark is not None:
+                self.high_water_mark = high_water_mark
+            self.page_count = 0
+            self.last_page_count = None
+            self.pending_urls = []
+        self.save()
+
+    def save(self) -> None:
+        """
+        チェックポイントファイルへ保存する
+        """
+        with self.__lock:
+            state = {
+                "page_count": self.page_count,
+                "last_page_count": self.last_page_count,
+                "pending_urls": self.pending_urls,
+                "failed_attempts": self.failed_attempts,
+                "high_water_mark": self.high_water_mark,
+            }
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(f"{self.path.suffix}.tmp")
+            with open(tmp_path, "w") as f:
+                json.dump(state, f, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
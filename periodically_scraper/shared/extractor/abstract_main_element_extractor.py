@@ -0,0 +1,21 @@
+from abc import ABC, abstractmethod
+
+
+class AbstractMainElementExtractor(object):
+
+    @abstractmethod
+    def extract(self, html: str) -> str:
+        """
+        HTML文書からmain要素を抽出する
+
+        Parameters
+        ----------
+        html : str
+            HTML文書
+
+        Returns
+        -------
+        str
+            main要素（見つからない場合は "None"）
+        """
+        pass
@@ -0,0 +1,14 @@
+from bs4 import BeautifulSoup, SoupStrainer
+
+from periodically_scraper.shared.extractor.abstract_main_element_extractor import AbstractMainElementExtractor
+
+
+class Bs4MainElementExtractor(AbstractMainElementExtractor):
+
+    # main要素だけを解析する
+    STRAINER = SoupStrainer("main")
+
+    def extract(self, html: str) -> str:
+        soup = BeautifulSoup(html, "lxml", parse_only=self.STRAINER)
+        main_html = str(soup.find("main"))
+        return main_html
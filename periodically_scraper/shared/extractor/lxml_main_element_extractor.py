@@ -0,0 +1,44 @@
+import lxml.html
+from lxml.etree import ParserError
+
+from periodically_scraper.shared.extractor.abstract_main_element_extractor import AbstractMainElementExtractor
+
+
+class LxmlMainElementExtractor(AbstractMainElementExtractor):
+    """
+    lxml.html で直接解析し、XPathで見つけたmain要素をシリアライズする抽出クラス
+
+    BeautifulSoupの木を作らないため高速。出力はBs4MainElementExtractorと同じ要素構造になるが、
+    空要素の書き方（<br> と <br/>）などのシリアライズの細部は異なる
+    """
+
+    def extract(self, html: str) -> str:
+        try:
+            document = self._parse(html)
+        except ParserError:
+            # 空の文書
+            return str(None)
+        main_elements = document.xpath("//main")
+        if len(main_elements) == 0:
+            return str(None)
+        return lxml.html.tostring(main_elements[0], encoding="unicode", with_tail=False)
+
+    def _parse(self, html: str) -> lxml.html.HtmlElement:
+        """
+        HTML文書を解析する
+
+        Parameters
+        ----------
+        html : str
+            HTML文書
+
+        Returns
+        -------
+        lxml.html.HtmlElement
+            解析した文書のルート要素
+        """
+        try:
+            return lxml.html.document_fromstring(html)
+        except ValueError:
+            # エンコーディング宣言付きの文字列は lxml が受け付けないため、バイト列として解析する
+            return lxml.html.document_fromstring(html.encode())
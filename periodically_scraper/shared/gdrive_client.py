@@ -1,6 +1,15 @@
+import io
 import os
+import mimetypes
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import PurePath
+from typing import Iterator, List, Optional, Tuple, Union
 
+import httplib2
+from googleapiclient.errors import HttpError
+from googleapiclient.http import MediaFileUpload, MediaIoBaseUpload
 from pydrive2.auth import GoogleAuth
 from pydrive2.drive import GoogleDrive
 from pydrive2.files import GoogleDriveFile
@@ -11,6 +20,13 @@ class GDriveClient:
     """Googleドライブを操作するクライアント
     """
 
+    # このサイズ以上のファイルはレジューム可能なアップロードで送る [byte]
+    RESUMABLE_THRESHOLD = 5 * 1024 * 1024
+    # レジューム可能なアップロードのチャンクサイズ [byte]（256KiBの倍数である必要がある）
+    CHUNK_SIZE = 8 * 1024 * 1024
+    # 1つのチャンクのアップロードに連続して失敗してもよい回数
+    MAX_CHUNK_RETRY = 5
+
     def __init__(self) -> None:
         """コンストラクタ"""
         gauth = GoogleAuth()
@@ -39,6 +55,39 @@ class GDriveClient:
         """
         return self.drive.ListFile({'q': f"{q} and trashed = {trashed}"}).GetList()
 
+    def iter_file(self, q: str, trashed: bool = False, page_size: int = 1000, fields: str = "id,title") -> Iterator[GoogleDriveFile]:
+        """
+        ファイルを1ページずつ取得しながら順番に返すジェネレータ
+
+        必要なフィールドだけを取得し、全件を一度にメモリへ載せないため、
+        大きなフォルダの列挙や、条件に合うファイルが見つかった時点での打ち切りに使う
+
+        Parameters
+        ----------
+        q : str
+            クエリ
+            クエリに使用できる条件、命令は次を参照：
+            - https://developers.google.com/drive/api/guides/ref-search-terms
+        trashed : bool, default False
+            ゴミ箱に入っているファイルを含めるかどうか
+        page_size : int, default 1000
+            1回のリクエストで取得するファイル数
+        fields : str, default "id,title"
+            取得するファイルのフィールド（カンマ区切り）
+
+        Yields
+        ------
+        GoogleDriveFile
+            ファイル（fields で指定したフィールドのみを持つ）
+        """
+        file_list = self.drive.ListFile({
+            'q': f"{q} and trashed = {trashed}",
+            'maxResults': page_size,
+            'fields': f"nextPageToken,items({fields})",
+        })
+        for files in file_list:
+            yield from files
+
     def create_file(self, contents: str, file_name: str, mimeType: str, folder_id: str) -> GoogleDriveFile:
         """
         指定したフォルダにファイルを作成するメソッド
@@ -68,29 +117,130 @@ class GDriveClient:
         file.Upload()
         return file
 
-    def upload_file(self, file_path: str, folder_id: str) -> GoogleDriveFile:
+    def create_files(
+        self,
+        files: List[Tuple[Union[str, bytes], str, str, str]],
+        max_workers: int = 8,
+    ) -> List[Union[GoogleDriveFile, Exception]]:
+        """
+        複数のファイルをまとめて作成するメソッド
+
+        Drive API のバッチリクエストはメディアのアップロードに対応していないため、
+        メタデータとコンテンツを1回のリクエストで送る multipart アップロードを複数スレッドから並行して送る。
+        一部のファイルの作成に失敗しても、残りのファイルの作成は続ける
+
+        Parameters
+        ----------
+        files : List[Tuple[Union[str, bytes], str, str, str]]
+            作成するファイルの (コンテンツ, ファイル名, MIMEタイプ, 作成先のフォルダのID) のリスト
+            （文字列のコンテンツはUTF-8でエンコードする）
+        max_workers : int, optional
+            並行してリクエストを送るスレッド数, by default 8
+
+        Returns
+        -------
+        List[Union[GoogleDriveFile, Exception]]
+            files と同じ順番の、作成したファイル（失敗した場合は発生した例外）のリスト
+        """
+        def create(file: Tuple[Union[str, bytes], str, str, str]) -> Union[GoogleDriveFile, Exception]:
+            contents, file_name, mimeType, folder_id = file
+            data = contents.encode() if isinstance(contents, str) else contents
+            try:
+                return self.__insert_file(
+                    {"title": file_name, "mimeType": mimeType, "parents": [{"id": folder_id}]},
+                    MediaIoBaseUpload(io.BytesIO(data), mimetype=mimeType, resumable=False),
+                )
+            except Exception as e:
+                return e
+
+        if len(files) == 0:
+            return []
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(files))) as executor:
+            return list(executor.map(create, files))
+
+    def __insert_file(self, body: dict, media_body: MediaIoBaseUpload) -> GoogleDriveFile:
+        """
+        Files.insert() を実行する
+
+        レジューム可能なメディアの場合はチャンクごとにアップロードし、接続が切れても
+        最初からやり直さず、サーバーが受け取った位置から再開する
+
+        Parameters
+        ----------
+        body : dict
+            ファイルのメタデータ
+        media_body : MediaIoBaseUpload
+            ファイルのコンテンツ
+
+        Returns
+        -------
+        GoogleDriveFile
+            ファイル
+        """
+        auth = self.drive.auth
+        if auth.service is None:
+            auth.Authorize()
+        # httplib2.Http はスレッドセーフではないため、PyDrive2 と同じくスレッドごとに用意する
+        if not getattr(auth.thread_local, "http", None):
+            auth.thread_local.http = auth.Get_Http_Object()
+        http = auth.thread_local.http
+        request = auth.service.files().insert(
+            body=body,
+            media_body=media_body,
+            supportsAllDrives=True,
+        )
+        if not media_body.resumable():
+            metadata = request.execute(http=http)
+            return GoogleDriveFile(auth=auth, metadata=metadata, uploaded=True)
+
+        metadata = None
+        n_failure = 0
+        while metadata is None:
+            try:
+                _, metadata = request.next_chunk(http=http)
+                n_failure = 0
+            except (HttpError, httplib2.HttpLib2Error, OSError) as e:
+                # 再開できないエラー、または失敗が続いた場合は諦める
+                is_server_error = not isinstance(e, HttpError) or e.resp.status >= 500
+                n_failure += 1
+                if not is_server_error or n_failure > self.MAX_CHUNK_RETRY:
+                    raise
+                time.sleep(2 ** n_failure / 2 + random.random() * 2 ** n_failure / 2)
+        return GoogleDriveFile(auth=auth, metadata=metadata, uploaded=True)
+
+    def upload_file(self, file_path: str, folder_id: str, chunk_size: Optional[int] = None) -> GoogleDriveFile:
         """
         指定したフォルダにファイルをアップロードするメソッド
 
+        ファイル名は最初のリクエストでメタデータとして設定する。
+        RESUMABLE_THRESHOLD 以上のファイルはチャンクに分けてレジューム可能なアップロードで送る
+
         Parameters
         ----------
         file_path : str
             アップロードするファイルのパス
         folder_id : str
             アップロード先のフォルダのID
+        chunk_size : Optional[int], optional
+            レジューム可能なアップロードのチャンクサイズ [byte], by default None（CHUNK_SIZE）
 
         Returns
         -------
         GoogleDriveFile
             ファイル
         """
-        # アップロード
-        file = self.drive.CreateFile({"parents": [{"id": folder_id}]})
-        file.SetContentFile(file_path)
-        file.Upload()
-        # そのままだとファイルパスがファイル名になっているので、ローカルのファイル名へ変更する
-        file = self.rename_file(file["id"], PurePath(file_path).name)
-        return file
+        mimeType = mimetypes.guess_type(file_path)[0] or "application/octet-stream"
+        resumable = os.path.getsize(file_path) >= self.RESUMABLE_THRESHOLD
+        media_body = MediaFileUpload(
+            file_path,
+            mimetype=mimeType,
+            chunksize=chunk_size if chunk_size is not None else self.CHUNK_SIZE,
+            resumable=resumable,
+        )
+        return self.__insert_file(
+            {"title": PurePath(file_path).name, "mimeType": mimeType, "parents": [{"id": folder_id}]},
+            media_body,
+        )
 
     def download_file(self, file_id: str) -> GoogleDriveFile:
         """
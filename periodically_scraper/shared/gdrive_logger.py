@@ -1,9 +1,12 @@
 import os
+import re
 import json
+import atexit
 import logging
 from logging import config
 import datetime
-from typing import Optional
+import threading
+from typing import List, Optional
 from pathlib import Path
 
 import pytz
@@ -28,9 +31,25 @@ class GDriveLogger(object):
         Googleドライブでログファイルを格納するフォルダのID
     log_file_id : str
         GoogleドライブのログファイルのID
+    flush_interval : Optional[float]
+        バッファリングモードでGoogleドライブへ反映する間隔 [秒]
+    flush_bytes : Optional[int]
+        バッファリングモードでGoogleドライブへ反映する未反映ログの量 [byte]
+    segment_max_bytes : Optional[int]
+        セグメントモードでの1セグメントの最大サイズ [byte]
+    log_filename : Optional[str]
+        Googleドライブのログファイル名（セグメントモードではセグメント名の接頭辞）
     """
 
-    def __init__(self, gdrive: GDriveClient, log_folder_id: Optional[str] = None, use_gdrive: bool = True) -> None:
+    def __init__(
+        self,
+        gdrive: GDriveClient,
+        log_folder_id: Optional[str] = None,
+        use_gdrive: bool = True,
+        flush_interval: Optional[float] = None,
+        flush_bytes: Optional[int] = None,
+        segment_max_bytes: Optional[int] = None,
+    ) -> None:
         """
         コンストラクタ
 
@@ -42,6 +61,20 @@ class GDriveLogger(object):
             ログファイルを格納するGoogleドライブのフォルダID, by default None
         use_gdrive : bool, optional
             Googleドライブにログファイルを保存するかどうか, by default True
+        flush_interval : Optional[float], optional
+            Googleドライブへ反映する間隔 [秒], by default None
+        flush_bytes : Optional[int], optional
+            Googleドライブへ反映する未反映ログの量 [byte], by default None
+        segment_max_bytes : Optional[int], optional
+            1セグメントの最大サイズ [byte], by default None
+
+        flush_interval, flush_bytes のどちらかを指定するとバッファリングモードになり、
+        ログのたびにアップロードせず、バックグラウンドスレッドが間隔・量・終了時のいずれかで
+        まとめてGoogleドライブへ反映する
+
+        segment_max_bytes を指定するとセグメントモードになり、1つのログファイルを上書きする代わりに、
+        反映のたびに新しく増えた行だけを "<ログファイル名>.<連番>" のセグメントとしてアップロードする。
+        新しい行が segment_max_bytes を超える場合は複数のセグメントに分割する
         """
 
         # 設定ファイルを読み込み
@@ -60,7 +93,56 @@ class GDriveLogger(object):
         self.gdrive = gdrive
         self.log_folder_id = log_folder_id if log_folder_id is not None else os.environ["LOG_FOLDER_ID"]
         self.log_file_id = None
+        self.log_filename: Optional[str] = None
         self.use_gdrive = use_gdrive
+        self.flush_interval = flush_interval
+        self.flush_bytes = flush_bytes
+        self.segment_max_bytes = segment_max_bytes
+        self.__segment_count = 0
+        self.__uploaded_offset = 0
+        self.__pending_bytes = 0
+        self.__pending_lock = threading.Lock()
+        self.__upload_lock = threading.Lock()
+        self.__flush_event = threading.Event()
+        self.__closed = threading.Event()
+        self.__flush_thread: Optional[threading.Thread] = None
+
+    @property
+    def buffered(self) -> bool:
+        """バッファリングモードかどうか"""
+        return self.flush_interval is not None or self.flush_bytes is not None
+
+    @property
+    def segmented(self) -> bool:
+        """セグメントモードかどうか"""
+        return self.segment_max_bytes is not None
+
+    @classmethod
+    def read_segments(cls, gdrive: GDriveClient, log_folder_id: str, log_filename: str) -> str:
+        """
+        セグメントモードでアップロードしたログを順番に連結して読み込む
+
+        Parameters
+        ----------
+        gdrive : GDriveClient
+            GDriveClientインスタンス
+        log_folder_id : str
+            ログファイルを格納するGoogleドライブのフォルダID
+        log_filename : str
+            ログファイル名
+
+        Returns
+        -------
+        str
+            連結したログ
+        """
+        segment_pattern = re.compile(rf"^{re.escape(log_filename)}\.(\d+)$")
+        segment_files = []
+        for file in gdrive.list_file(f"'{log_folder_id}' in parents and title contains '{log_filename}.'"):
+            match = segment_pattern.match(file["title"])
+            if match is not None:
+                segment_files.append((int(match.group(1)), file))
+        return "".join(file.GetContentString() for _, file in sorted(segment_files, key=lambda item: item[0]))
 
     def initialize(self, log_filename: Optional[str] = None) -> Optional[GoogleDriveFile]:
         """
@@ -73,8 +155,9 @@ class GDriveLogger(object):
 
         Returns
         -------
-        GoogleDriveFile
+        Optional[GoogleDriveFile]
             Googleドライブで作成したログファイルのGoogleDriveFileインスタンス
+            （セグメントモードでは最初の反映までファイルを作らないためNone）
         """
         # Googleドライブを使わない場合、何もしない
         if self.use_gdrive == False:
@@ -84,16 +167,25 @@ class GDriveLogger(object):
         if log_filename is None:
             dt_now = datetime.datetime.now(pytz.timezone('Asia/Tokyo'))
             log_filename = dt_now.strftime("%Y-%m-%d-%H-%M-%S-%f") + ".log"
-        file = self.gdrive.create_file(
-            "",
-            log_filename,
-            "text/plane",
-            self.log_folder_id
-        )
-        self.log_file_id = file["id"]
+        self.log_filename = log_filename
+        file = None
+        if not self.segmented:
+            file = self.gdrive.create_file(
+                "",
+                log_filename,
+                "text/plane",
+                self.log_folder_id
+            )
+            self.log_file_id = file["id"]
+
+        # バッファリングモードの場合、反映用のスレッドを開始する
+        if self.buffered and self.__flush_thread is None:
+            self.__flush_thread = threading.Thread(target=self.__flush_loop, name="GDriveLoggerFlush", daemon=True)
+            self.__flush_thread.start()
+            atexit.register(self.close)
         return file
 
-    def info(self, msg: str) -> GoogleDriveFile:
+    def info(self, msg: str) -> Optional[GoogleDriveFile]:
         """
         infoログを出力する
 
@@ -104,13 +196,13 @@ class GDriveLogger(object):
 
         Returns
         -------
-        GoogleDriveFile
-            GoogleドライブのログファイルのGoogleDriveFileインスタンス
+        Optional[GoogleDriveFile]
+            GoogleドライブのログファイルのGoogleDriveFileインスタンス（バッファリングモードではNone）
         """
         self.log.info(msg)
-        return self.__update_gdrive_log_file()
+        return self.__on_logged(msg)
 
-    def error(self, msg: str) -> GoogleDriveFile:
+    def error(self, msg: str) -> Optional[GoogleDriveFile]:
         """
         errorログを出力する
 
@@ -121,12 +213,83 @@ class GDriveLogger(object):
 
         Returns
         -------
-        GoogleDriveFile
-            GoogleドライブのログファイルのGoogleDriveFileインスタンス
+        Optional[GoogleDriveFile]
+            GoogleドライブのログファイルのGoogleDriveFileインスタンス（バッファリングモードではNone）
         """
         self.log.error(msg)
+        return self.__on_logged(msg)
+
+    def flush(self) -> Optional[GoogleDriveFile]:
+        """
+        未反映のログをGoogleドライブへ反映する
+
+        Returns
+        -------
+        Optional[GoogleDriveFile]
+            GoogleドライブのログファイルのGoogleDriveFileインスタンス
+        """
+        with self.__pending_lock:
+            self.__pending_bytes = 0
         return self.__update_gdrive_log_file()
 
+    def close(self) -> None:
+        """
+        反映用のスレッドを止め、未反映のログをGoogleドライブへ反映する
+        """
+        if self.__closed.is_set():
+            return
+        self.__closed.set()
+        self.__flush_event.set()
+        if self.__flush_thread is not None:
+            self.__flush_thread.join()
+        if self.buffered and self.log_filename is not None:
+            self.flush()
+
+    def __on_logged(self, msg: str) -> Optional[GoogleDriveFile]:
+        """
+        ログを出力した後の処理
+
+        バッファリングモードでなければ即座にGoogleドライブへ反映し、
+        バッファリングモードなら未反映のログの量が閾値を超えたときに反映用のスレッドを起こす
+
+        Parameters
+        ----------
+        msg : str
+            ログメッセージ
+
+        Returns
+        -------
+        Optional[GoogleDriveFile]
+            GoogleドライブのログファイルのGoogleDriveFileインスタンス（バッファリングモードではNone）
+        """
+        if not self.buffered:
+            return self.__update_gdrive_log_file()
+
+        with self.__pending_lock:
+            self.__pending_bytes += len(msg.encode())
+            pending_bytes = self.__pending_bytes
+        if self.flush_bytes is not None and pending_bytes >= self.flush_bytes:
+            self.__flush_event.set()
+        return None
+
+    def __flush_loop(self) -> None:
+        """
+        反映用のスレッドの処理
+        """
+        while not self.__closed.is_set():
+            self.__flush_event.wait(self.flush_interval)
+            self.__flush_event.clear()
+            if self.__closed.is_set():
+                break
+            with self.__pending_lock:
+                has_pending = self.__pending_bytes > 0
+            if has_pending:
+                try:
+                    self.flush()
+                except Exception:
+                    # ログの反映に失敗してもスクレイピングは止めず、次の反映で再送する
+                    self.log.exception("Failed to flush log to Google Drive")
+
     def __update_gdrive_log_file(self) -> Optional[GoogleDriveFile]:
         """
         Googleドライブのログファイルを更新する
@@ -140,7 +303,68 @@ class GDriveLogger(object):
         if self.use_gdrive == False:
             return None
 
+        # セグメントモードの場合、新しく増えた行だけをアップロード
+        if self.segmented:
+            return self.__upload_new_segments()
+
         # ログファイルを更新
-        with open(os.environ["WORKING_DIR"] + "/" + self.log_config["handlers"]["fileHandler"]["filename"], "r") as f:
-            log_content = f.read()
-        return self.gdrive.update_file(self.log_file_id, log_content)
+        with self.__upload_lock:
+            with open(os.environ["WORKING_DIR"] + "/" + self.log_config["handlers"]["fileHandler"]["filename"], "r") as f:
+                log_content = f.read()
+            return self.gdrive.update_file(self.log_file_id, log_content)
+
+    def __upload_new_segments(self) -> Optional[GoogleDriveFile]:
+        """
+        前回の反映以降に増えた行を新しいセグメントとしてアップロードする
+
+        Returns
+        -------
+        Optional[GoogleDriveFile]
+            最後にアップロードしたセグメントのGoogleDriveFileインスタンス（新しい行が無ければNone）
+        """
+        with self.__upload_lock:
+            with open(os.environ["WORKING_DIR"] + "/" + self.log_config["handlers"]["fileHandler"]["filename"], "rb") as f:
+                f.seek(self.__uploaded_offset)
+                new_content = f.read()
+            # 書き込み途中の行は次の反映に回す
+            new_content = new_content[:new_content.rfind(b"\n") + 1]
+            if len(new_content) == 0:
+                return None
+
+            file = None
+            for segment in self.__split_segments(new_content):
+                file = self.gdrive.create_file(
+                    segment.decode(),
+                    f"{self.log_filename}.{self.__segment_count:05d}",
+                    "text/plain",
+                    self.log_folder_id
+                )
+                self.__segment_count += 1
+                self.__uploaded_offset += len(segment)
+                self.log_file_id = file["id"]
+            return file
+
+    def __split_segments(self, content: bytes) -> List[bytes]:
+        """
+        ログを行単位で segment_max_bytes 以下のセグメントに分割する
+
+        Parameters
+        ----------
+        content : bytes
+            ログ
+
+        Returns
+        -------
+        List[bytes]
+            セグメントのリスト（segment_max_bytes を超える1行はそのまま1セグメントにする）
+        """
+        segments = []
+        segment = b""
+        for line in content.splitlines(keepends=True):
+            if len(segment) > 0 and len(segment) + len(line) > self.segment_max_bytes:
+                segments.append(segment)
+                segment = b""
+            segment += line
+        if len(segment) > 0:
+            segments.append(segment)
+        return segments
@@ -0,0 +1,181 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+
+class HttpCache(object):
+    """
+    ETag / Last-Modified で再検証するHTTPレスポンスのキャッシュ
+
+    レスポンスはディスクに永続化し、同じ実行中に取得したレスポンスはメモリ上にも保持する。
+    メモリ上には最近使った max_memo_entries 件だけを保持し、記事一覧ページを何千ページ巡回しても
+    メモリが増え続けないようにする
+
+    Attributes
+    ----------
+    cache_dir : Optional[Path]
+        キャッシュを保存するフォルダ（Noneならメモリ上のみ）
+    max_memo_entries : int
+        メモリ上に保持するレスポンスの最大数
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, max_memo_entries: int = 8) -> None:
+        """
+        コンストラクタ
+
+        Parameters
+        ----------
+        cache_dir : Optional[str], optional
+            キャッシュを保存するフォルダ, by default None（ディスクへ保存しない）
+        max_memo_entries : int, optional
+            メモリ上に保持するレスポンスの最大数（古いものから捨てる）, by default 8
+        """
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else None
+        if self.cache_dir is not None:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_memo_entries = max_memo_entries
+        self.__memo: "OrderedDict[str, str]" = OrderedDict()
+        self.__lock = threading.Lock()
+
+    def get_memo(self, url: str) -> Optional[str]:
+        """
+        同じ実行中に取得済みのレスポンスを取得する
+
+        Parameters
+        ----------
+        url : str
+            リクエストしたURL
+
+        Returns
+        -------
+        Optional[str]
+            レスポンスボディ（未取得ならNone）
+        """
+        with self.__lock:
+            text = self.__memo.get(url)
+            if text is not None:
+                self.__memo.move_to_end(url)
+            return text
+
+    def memoize(self, url: str, text: str) -> None:
+        """
+        同じ実行中に取得したレスポンスを保持する
+
+        Parameters
+        ----------
+        url : str
+            リクエストしたURL
+        text : str
+            レスポンスボディ
+        """
+        with self.__lock:
+            self.__memo[url] = text
+            self.__memo.move_to_end(url)
+            while len(self.__memo) > self.max_memo_entries:
+                self.__memo.popitem(last=False)
+
+    def load(self, url: str) -> Optional[dict]:
+        """
+        ディスクに保存したレスポンスを読み込む
+
+        Parameters
+        ----------
+        url : str
+            リクエストしたURL
+
+        Returns
+        -------
+        Optional[dict]
+            "text", "etag", "last_modified" を持つ辞書（キャッシュが無ければNone）
+        """
+        cache_path = self._get_cache_path(url)
+        if cache_path is None or not cache_path.exists():
+            return None
+        try:
+            with open(cache_path, "r") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        # ハッシュが衝突していないか確認する
+        if entry.get("url") != url:
+            return None
+        return entry
+
+    def get_validation_headers(self, url: str) -> dict:
+        """
+        条件付きリクエストのヘッダーを取得する
+
+        Parameters
+        ----------
+        url : str
+            リクエストするURL
+
+        Returns
+        -------
+        dict
+            If-None-Match / If-Modified-Since ヘッダー（キャッシュが無ければ空）
+        """
+        entry = self.load(url)
+        if entry is None:
+            return {}
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def store(self, url: str, text: str, etag: Optional[str], last_modified: Optional[str]) -> None:
+        """
+        レスポンスを保存する
+
+        ETag と Last-Modified のどちらも無いレスポンスは再検証できないため、メモリ上にのみ保持する
+
+        Parameters
+        ----------
+        url : str
+            リクエストしたURL
+        text : str
+            レスポンスボディ
+        etag : Optional[str]
+            ETag ヘッダーの値
+        last_modified : Optional[str]
+            Last-Modified ヘッダーの値
+        """
+        self.memoize(url, text)
+        cache_path = self._get_cache_path(url)
+        if cache_path is None or (etag is None and last_modified is None):
+            return
+        entry = {
+            "url": url,
+            "etag": etag,
+            "last_modified": last_modified,
+            "text": text,
+        }
+        # 書き込み途中のファイルを読まないように、一時ファイルへ書いてから置き換える
+        tmp_path = cache_path.with_suffix(f".{threading.get_ident()}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp_path, cache_path)
+
+    def _get_cache_path(self, url: str) -> Optional[Path]:
+        """
+        URLに対応するキャッシュファイルのパスを取得する
+
+        Parameters
+        ----------
+        url : str
+            リクエストしたURL
+
+        Returns
+        -------
+        Optional[Path]
+            キャッシュファイルのパス（ディスクへ保存しない場合はNone）
+        """
+        if self.cache_dir is None:
+            return None
+        return self.cache_dir / f"{hashlib.sha256(url.encode()).hexdigest()}.json"
@@ -0,0 +1,181 @@
+import threading
+import time
+from typing import Dict
+from urllib.parse import urlsplit
+
+
+class TokenBucket(object):
+    """
+    トークンバケット
+
+    Attributes
+    ----------
+    rate : float
+        1秒あたりに補充されるトークン数
+    capacity : float
+        バケットに貯められるトークンの最大数（バースト数）
+    tokens : float
+        現在のトークン数（予約済みの分だけ負になることがある）
+    updated_at : float
+        トークンを最後に補充した時刻（一時停止中は停止が終わる時刻）
+    """
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        """
+        コンストラクタ
+
+        Parameters
+        ----------
+        rate : float
+            1秒あたりに補充されるトークン数
+        capacity : float
+            バケットに貯められるトークンの最大数
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+
+    def reserve(self) -> float:
+        """
+        トークンを1つ予約し、使えるようになるまでの待ち時間を返す
+
+        Returns
+        -------
+        float
+            トークンが使えるようになるまでの待ち時間 [秒]
+        """
+        now = time.monotonic()
+        # 一時停止中は補充せず、停止が終わってから順に送れるようにする
+        paused = max(0.0, self.updated_at - now)
+        self.tokens = min(self.capacity, self.tokens + max(0.0, now - self.updated_at) * self.rate)
+        self.updated_at = max(now, self.updated_at)
+        self.tokens -= 1
+        if self.tokens >= 0:
+            return paused
+        return paused + -self.tokens / self.rate
+
+    def pause(self, seconds: float) -> None:
+        """
+        指定した時間、トークンの補充を止める
+
+        停止中に予約したリクエストは、停止が終わった後に rate の間隔で送られる
+
+        Parameters
+        ----------
+        seconds : float
+            止める時間 [秒]
+        """
+        now = time.monotonic()
+        # 停止が終わった時点で送れるのは1リクエストだけにする
+        self.tokens = min(1.0, self.tokens + max(0.0, now - self.updated_at) * self.rate)
+        self.updated_at = max(self.updated_at, now + seconds)
+
+
+class TokenBucketRateLimiter(object):
+    """
+    ホストごとのトークンバケットでリクエスト頻度を制限するクラス
+
+    複数スレッドから共有して使うことができる
+
+    Attributes
+    ----------
+    requests_per_second : float
+        ホストごとの1秒あたりのリクエスト数の上限
+    burst : int
+        連続して送れるリクエスト数の上限
+    """
+
+    def __init__(self, requests_per_second: float, burst: int = 1) -> None:
+        """
+        コンストラクタ
+
+        Parameters
+        ----------
+        requests_per_second : float
+            ホストごとの1秒あたりのリクエスト数の上限
+        burst : int, optional
+            連続して送れるリクエスト数の上限, by default 1
+        """
+        if requests_per_second <= 0:
+            raise ValueError(f"requests_per_second must be positive: {requests_per_second}")
+        self.requests_per_second = requests_per_second
+        self.burst = burst
+        self.__buckets: Dict[str, TokenBucket] = {}
+        self.__lock = threading.Lock()
+
+    def set_rate(self, url: str, requests_per_second: float, burst: int = 1) -> None:
+        """
+        URLのホストだけリクエスト頻度の上限を変更する
+
+        Parameters
+        ----------
+        url : str
+            上限を変更するホストのURL
+        requests_per_second : float
+            1秒あたりのリクエスト数の上限
+        burst : int, optional
+            連続して送れるリクエスト数の上限, by default 1
+        """
+        if requests_per_second <= 0:
+            raise ValueError(f"requests_per_second must be positive: {requests_per_second}")
+        host = urlsplit(url).netloc
+        with self.__lock:
+            self.__buckets[host] = TokenBucket(requests_per_second, burst)
+
+    def pause(self, url: str, seconds: float) -> None:
+        """
+        URLのホストへのリクエストを指定した時間止める
+
+        サーバーから混雑（429, 503）を返されたときに呼び、同じホストへリクエストを送る
+        全てのスレッドを待たせる
+
+        Parameters
+        ----------
+        url : str
+            止めるホストのURL
+        seconds : float
+            止める時間 [秒]
+        """
+        with self.__lock:
+            self.__get_bucket(urlsplit(url).netloc).pause(seconds)
+
+    def acquire(self, url: str) -> float:
+        """
+        URLのホストへリクエストを送れるようになるまで待つ
+
+        Parameters
+        ----------
+        url : str
+            リクエスト先のURL
+
+        Returns
+        -------
+        float
+            待った時間 [秒]
+        """
+        with self.__lock:
+            wait = self.__get_bucket(urlsplit(url).netloc).reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def __get_bucket(self, host: str) -> TokenBucket:
+        """
+        ホストのトークンバケットを取得する（なければ作成する。ロックを取ってから呼ぶ）
+
+        Parameters
+        ----------
+        host : str
+            ホスト
+
+        Returns
+        -------
+        TokenBucket
+            トークンバケット
+        """
+        bucket = self.__buckets.get(host)
+        if bucket is None:
+            bucket = TokenBucket(self.requests_per_second, self.burst)
+            self.__buckets[host] = bucket
+        return bucket
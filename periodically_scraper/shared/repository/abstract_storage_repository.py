@@ -1,9 +1,21 @@
+import hashlib
 from abc import ABC, abstractmethod
+from typing import Dict, Iterable, List, Optional, Set, Tuple, Union
+
+from periodically_scraper.shared.codec.abstract_article_codec import AbstractArticleCodec
+from periodically_scraper.shared.codec.article_codec_registry import split_codec_suffix
+from periodically_scraper.shared.codec.plain_article_codec import PlainArticleCodec
+from periodically_scraper.shared.repository.article_manifest import ArticleManifest, ManifestRecord
 
 
 class AbstractStorageRepository(object):
 
-    def __init__(self, save_folder: str):
+    def __init__(
+        self,
+        save_folder: str,
+        manifest: Optional[ArticleManifest] = None,
+        codec: Optional[AbstractArticleCodec] = None,
+    ):
         """
         コンストラクタ
 
@@ -11,14 +23,22 @@ class AbstractStorageRepository(object):
         ----------
         save_folder : str
             保存先フォルダ
+        manifest : Optional[ArticleManifest], optional
+            保存済み記事を記録するマニフェスト, by default None（保存先を毎回列挙する）
+        codec : Optional[AbstractArticleCodec], optional
+            記事を保存するときのコーデック, by default None（圧縮しない）
         """
         self.save_folder = save_folder
+        self.manifest = manifest
+        self.codec = codec if codec is not None else PlainArticleCodec()
 
-    @abstractmethod
     def save_article(self, html: str, filename: str) -> None:
         """
         記事を保存する
 
+        マニフェストに同じ内容の記事が記録されている場合は、保存先へ書き込まずに
+        その記事の保存先を参照する記録だけを追加する
+
         Parameters
         ----------
         html : str
@@ -26,9 +46,270 @@ class AbstractStorageRepository(object):
         filename : str
             保存ファイル名
         """
+        failures = self.save_articles([(html, filename)])
+        if len(failures) > 0:
+            raise failures[0][1]
+
+    def save_articles(self, articles: List[Tuple[str, str]]) -> List[Tuple[str, Exception]]:
+        """
+        複数の記事をまとめて保存する
+
+        記事の内容のハッシュで重複を取り除き、同じ内容の記事は一度だけ書き込む
+        （重複の判定にはマニフェストを使うため、マニフェストが無い場合は全て書き込む）。
+        一部の記事の保存に失敗しても、残りの記事の保存は続ける
+
+        Parameters
+        ----------
+        articles : List[Tuple[str, str]]
+            (記事のHTML文書, 保存ファイル名) のリスト
+
+        Returns
+        -------
+        List[Tuple[str, Exception]]
+            保存に失敗した記事の (保存ファイル名, 発生した例外) のリスト
+        """
+        # 書き込む記事と、保存済みまたは同じバッチ内の記事と内容が同じ記事に分ける
+        unique_articles: List[Tuple[str, str]] = []
+        duplicates: List[Tuple[str, str]] = []
+        first_filenames: Dict[str, str] = {}
+        for html, filename in articles:
+            content_hash = self._get_content_hash(html)
+            if self.manifest is None:
+                unique_articles.append((html, filename))
+                continue
+            stored = self.manifest.find_by_content_hash(content_hash)
+            if stored is not None:
+                self.manifest.add(stored._replace(url=filename, saved_at=None))
+            elif content_hash in first_filenames:
+                duplicates.append((filename, first_filenames[content_hash]))
+            else:
+                first_filenames[content_hash] = filename
+                unique_articles.append((html, filename))
+
+        failures = []
+        results: Dict[str, Union[ManifestRecord, Exception]] = {}
+        for (html, filename), result in zip(unique_articles, self._write_articles(unique_articles)):
+            results[filename] = result
+            if isinstance(result, Exception):
+                failures.append((filename, result))
+                continue
+            self._record_saved_article(html, result)
+
+        for filename, first_filename in duplicates:
+            result = results[first_filename]
+            if isinstance(result, Exception):
+                failures.append((filename, result))
+                continue
+            self.manifest.add(self.manifest.get(first_filename)._replace(url=filename, saved_at=None))
+        return failures
+
+    def load_article(self, filename: str) -> str:
+        """
+        保存した記事を読み込む
+
+        保存時のコーデックは保存ファイル名の拡張子から判別し、展開したHTML文書を返す
+
+        Parameters
+        ----------
+        filename : str
+            保存ファイル名（コーデックの拡張子を除く）
+
+        Returns
+        -------
+        str
+            記事のHTML文書
+        """
+        # 同じ内容の記事を参照している場合は、マニフェストに記録された保存先から読み込む
+        record = self.manifest.get(filename) if self.manifest is not None else None
+        data, stored_name = self._read_article(filename, record.storage_id if record is not None else None)
+        _, codec = split_codec_suffix(stored_name)
+        return codec.decode(data)
+
+    def close(self) -> None:
+        """
+        保存先を閉じる（書き込み途中のデータがあればディスクへ書き出す）
+        """
         pass
 
-    @abstractmethod
+    def _record_saved_article(self, html: str, record: ManifestRecord) -> None:
+        """
+        保存した記事をマニフェストへ記録する
+
+        Parameters
+        ----------
+        html : str
+            記事のHTML文書
+        record : ManifestRecord
+            保存した記事の情報
+        """
+        if self.manifest is not None:
+            self.manifest.add(record._replace(content_hash=self._get_content_hash(html)))
+
+    @staticmethod
+    def _get_content_hash(html: str) -> str:
+        """
+        記事の内容のハッシュを取得する
+
+        Parameters
+        ----------
+        html : str
+            記事のHTML文書
+
+        Returns
+        -------
+        str
+            SHA-256ハッシュ
+        """
+        return hashlib.sha256(html.encode()).hexdigest()
+
     def get_saved_article_urls(self) -> list:
-        """保存済み記事のURLを取得する"""
+        """
+        保存済み記事のURLを取得する
+
+        マニフェストがある場合はマニフェストから取得し、保存先は列挙しない
+        （マニフェストが一度も突き合わせられていない場合のみ、最初に突き合わせる）
+        """
+        if self.manifest is None:
+            return [record.url for record in self._list_saved_articles()]
+        if not self.manifest.is_reconciled():
+            self.reconcile_manifest()
+        return self.manifest.get_urls()
+
+    def exists(self, url: str) -> bool:
+        """
+        記事が保存済みかどうか
+
+        Parameters
+        ----------
+        url : str
+            記事のURL（保存ファイル名）
+
+        Returns
+        -------
+        bool
+            保存済みならTrue
+        """
+        return url in self.contains_many([url])
+
+    def contains_many(self, urls: Iterable[str]) -> Set[str]:
+        """
+        複数の記事のうち、保存済みのもののURLを取得する
+
+        マニフェストがある場合はマニフェストを引き、無い場合は保存先へ記事ごとに問い合わせる。
+        どちらの場合も保存先の全件は列挙しない
+
+        Parameters
+        ----------
+        urls : Iterable[str]
+            記事のURL（保存ファイル名）
+
+        Returns
+        -------
+        Set[str]
+            保存済み記事のURLの集合
+        """
+        urls = list(urls)
+        if len(urls) == 0:
+            return set()
+        if self.manifest is not None:
+            if not self.manifest.is_reconciled():
+                self.reconcile_manifest()
+            return self.manifest.contains_many(urls)
+        return self._contains_many(urls)
+
+    def _contains_many(self, urls: List[str]) -> Set[str]:
+        """
+        複数の記事のうち、保存先にあるもののURLを取得する
+
+        保存先に記事ごとに問い合わせられる場合はオーバーライドする（既定では全件を列挙する）
+
+        Parameters
+        ----------
+        urls : List[str]
+            記事のURL（保存ファイル名）
+
+        Returns
+        -------
+        Set[str]
+            保存先にある記事のURLの集合
+        """
+        return set(urls) & {record.url for record in self._list_saved_articles()}
+
+    def reconcile_manifest(self) -> None:
+        """
+        マニフェストを実際の保存先と突き合わせる
+        """
+        if self.manifest is None:
+            raise ValueError("Manifest is not set.")
+        self.manifest.reconcile(self._list_saved_articles())
+
+    @abstractmethod
+    def _write_article(self, html: str, filename: str) -> ManifestRecord:
+        """
+        記事を保存先へ書き込む
+
+        Parameters
+        ----------
+        html : str
+            記事のHTML文書
+        filename : str
+            保存ファイル名
+
+        Returns
+        -------
+        ManifestRecord
+            保存した記事の情報
+        """
+        pass
+
+    def _write_articles(self, articles: List[Tuple[str, str]]) -> List[Union[ManifestRecord, Exception]]:
+        """
+        複数の記事を保存先へ書き込む
+
+        まとめて書き込める保存先ではオーバーライドする
+
+        Parameters
+        ----------
+        articles : List[Tuple[str, str]]
+            (記事のHTML文書, 保存ファイル名) のリスト
+
+        Returns
+        -------
+        List[Union[ManifestRecord, Exception]]
+            articles と同じ順番の、保存した記事の情報（失敗した場合は発生した例外）のリスト
+        """
+        results: List[Union[ManifestRecord, Exception]] = []
+        for html, filename in articles:
+            try:
+                results.append(self._write_article(html, filename))
+            except Exception as e:
+                results.append(e)
+        return results
+
+    @abstractmethod
+    def _read_article(self, filename: str, storage_id: Optional[str] = None) -> Tuple[bytes, str]:
+        """
+        保存先から記事を読み込む
+
+        Parameters
+        ----------
+        filename : str
+            保存ファイル名（コーデックの拡張子を除く）
+        storage_id : Optional[str], optional
+            マニフェストに記録された保存先でのID, by default None（保存ファイル名から探す）
+
+        Returns
+        -------
+        Tuple[bytes, str]
+            (保存したバイト列, コーデックの拡張子を含む保存ファイル名)
+        """
+        pass
+
+    @abstractmethod
+    def _list_saved_articles(self) -> Iterable[ManifestRecord]:
+        """
+        保存先にある全ての記事を列挙する
+
+        ManifestRecord の url はコーデックの拡張子を除いた保存ファイル名とする
+        """
         pass
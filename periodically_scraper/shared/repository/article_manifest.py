@@ -0,0 +1,312 @@
+import datetime
+import sqlite3
+import threading
+from typing import Iterable, List, NamedTuple, Optional, Set
+
+import pytz
+
+
+class ManifestRecord(NamedTuple):
+    """
+    マニフェストに記録する保存済み記事の情報
+
+    Attributes
+    ----------
+    url : str
+        記事のURL
+    storage_id : str
+        保存先での記事のID（GDriveのファイルID、ローカルのファイルパスなど）
+    size : Optional[int]
+        保存したデータのサイズ [byte]
+    content_hash : Optional[str]
+        保存したデータのSHA-256ハッシュ
+    saved_at : Optional[str]
+        保存日時（ISO 8601）
+    """
+    url: str
+    storage_id: str
+    size: Optional[int] = None
+    content_hash: Optional[str] = None
+    saved_at: Optional[str] = None
+
+
+class ArticleManifest(object):
+    """
+    保存済み記事をSQLiteファイルに記録するマニフェスト
+
+    保存先を全件列挙する代わりに、インデックスを引くだけで保存済みかどうかを判定できる。
+    1つのSQLiteファイルを複数の保存先（サイトごとのGDriveフォルダなど）で共有する場合は、
+    保存先ごとに scope を分ける。問い合わせ・保存先との突き合わせは scope の中だけで行う
+
+    Attributes
+    ----------
+    db_path : str
+        SQLiteファイルのパス
+    scope : str
+        記録を分ける保存先の名前
+    """
+
+    # 1回の問い合わせで使う変数の最大数
+    MAX_QUERY_VARIABLES = 500
+    # 記事の記録のテーブル
+    ARTICLES_TABLE_SQL = (
+        "CREATE TABLE {table} ("
+        "scope TEXT NOT NULL DEFAULT '', "
+        "url TEXT NOT NULL, "
+        "storage_id TEXT NOT NULL, "
+        "size INTEGER, "
+        "content_hash TEXT, "
+        "saved_at TEXT NOT NULL, "
+        "PRIMARY KEY (scope, url))"
+    )
+
+    def __init__(self, db_path: str, scope: str = "") -> None:
+        """
+        コンストラクタ
+
+        Parameters
+        ----------
+        db_path : str
+            SQLiteファイルのパス
+        scope : str, optional
+            記録を分ける保存先の名前, by default ""（保存先を1つだけ記録する）
+        """
+        self.db_path = db_path
+        self.scope = scope
+        self.__conn = sqlite3.connect(db_path, timeout=30.0, check_same_thread=False)
+        self.__lock = threading.Lock()
+        with self.__lock, self.__conn:
+            # 他のプロセスと同時に移行しないように、書き込みロックを取ってから確認する
+            self.__conn.execute("BEGIN IMMEDIATE")
+            self.__conn.execute(self.ARTICLES_TABLE_SQL.format(table="IF NOT EXISTS articles"))
+            # scope が無かった頃のSQLiteファイルは url だけが主キーのため、テーブルを作り直して
+            # 主キーを (scope, url) にする（既存の記録は scope "" として扱う）
+            columns = {row[1]: row[5] for row in self.__conn.execute("PRAGMA table_info(articles)").fetchall()}
+            if columns.get("scope", 0) == 0:
+                self.__conn.execute("DROP TABLE IF EXISTS articles_new")
+                self.__conn.execute(self.ARTICLES_TABLE_SQL.format(table="articles_new"))
+                self.__conn.execute(
+                    "INSERT INTO articles_new (scope, url, storage_id, size, content_hash, saved_at) "
+                    f"SELECT {'scope' if 'scope' in columns else repr('')}, url, storage_id, size, content_hash, saved_at "
+                    "FROM articles"
+                )
+                self.__conn.execute("DROP TABLE articles")
+                self.__conn.execute("ALTER TABLE articles_new RENAME TO articles")
+            self.__conn.execute("CREATE INDEX IF NOT EXISTS articles_scope_content_hash ON articles (scope, content_hash)")
+            self.__conn.execute("CREATE INDEX IF NOT EXISTS articles_storage_id ON articles (storage_id)")
+            self.__conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+
+    def add(self, record: ManifestRecord) -> None:
+        """
+        保存した記事を記録する（同じURLの記録は上書きする）
+
+        Parameters
+        ----------
+        record : ManifestRecord
+            保存した記事の情報
+        """
+        saved_at = record.saved_at if record.saved_at is not None else self._now()
+        with self.__lock, self.__conn:
+            self.__conn.execute(
+                "INSERT OR REPLACE INTO articles (scope, url, storage_id, size, content_hash, saved_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (self.scope, record.url, record.storage_id, record.size, record.content_hash, saved_at),
+            )
+
+    def get(self, url: str) -> Optional[ManifestRecord]:
+        """
+        記事の記録を取得する
+
+        Parameters
+        ----------
+        url : str
+            記事のURL
+
+        Returns
+        -------
+        Optional[ManifestRecord]
+            記事の情報（記録が無ければNone）
+        """
+        with self.__lock:
+            row = self.__conn.execute(
+                "SELECT url, storage_id, size, content_hash, saved_at FROM articles WHERE scope = ? AND url = ?",
+                (self.scope, url),
+            ).fetchone()
+        return ManifestRecord(*row) if row is not None else None
+
+    def find_by_content_hash(self, content_hash: str) -> Optional[ManifestRecord]:
+        """
+        同じ内容の記事の記録を取得する
+
+        Parameters
+        ----------
+        content_hash : str
+            記事の内容のSHA-256ハッシュ
+
+        Returns
+        -------
+        Optional[ManifestRecord]
+            同じ内容の記事の情報（記録が無ければNone）
+        """
+        with self.__lock:
+            row = self.__conn.execute(
+                "SELECT url, storage_id, size, content_hash, saved_at FROM articles "
+                "WHERE scope = ? AND content_hash = ? LIMIT 1",
+                (self.scope, content_hash),
+            ).fetchone()
+        return ManifestRecord(*row) if row is not None else None
+
+    def contains(self, url: str) -> bool:
+        """
+        記事が記録されているかどうか
+
+        Parameters
+        ----------
+        url : str
+            記事のURL
+
+        Returns
+        -------
+        bool
+            記録されていればTrue
+        """
+        with self.__lock:
+            row = self.__conn.execute(
+                "SELECT 1 FROM articles WHERE scope = ? AND url = ?", (self.scope, url)
+            ).fetchone()
+        return row is not None
+
+    def contains_many(self, urls: Iterable[str]) -> Set[str]:
+        """
+        複数の記事のうち、記録されているもののURLを取得する
+
+        Parameters
+        ----------
+        urls : Iterable[str]
+            記事のURL
+
+        Returns
+        -------
+        Set[str]
+            記録されている記事のURLの集合
+        """
+        urls = list(urls)
+        found: Set[str] = set()
+        with self.__lock:
+            # SQLiteの変数の上限を超えないように分けて問い合わせる
+            for i in range(0, len(urls), self.MAX_QUERY_VARIABLES):
+                chunk = urls[i:i + self.MAX_QUERY_VARIABLES]
+                rows = self.__conn.execute(
+                    f"SELECT url FROM articles WHERE scope = ? AND url IN ({', '.join('?' * len(chunk))})",
+                    [self.scope] + chunk,
+                ).fetchall()
+                found.update(row[0] for row in rows)
+        return found
+
+    def update_storage_id(self, old_storage_id: str, new_storage_id: str) -> None:
+        """
+        保存先でのIDを変更する（同じ保存先を参照する全ての記録を変更する）
+
+        Parameters
+        ----------
+        old_storage_id : str
+            変更前の保存先でのID
+        new_storage_id : str
+            変更後の保存先でのID
+        """
+        with self.__lock, self.__conn:
+            self.__conn.execute(
+                "UPDATE articles SET storage_id = ? WHERE scope = ? AND storage_id = ?",
+                (new_storage_id, self.scope, old_storage_id),
+            )
+
+    def get_urls(self) -> List[str]:
+        """
+        記録されている全ての記事のURLを取得する
+
+        Returns
+        -------
+        List[str]
+            記事のURLのリスト
+        """
+        with self.__lock:
+            rows = self.__conn.execute("SELECT url FROM articles WHERE scope = ?", (self.scope,)).fetchall()
+        return [row[0] for row in rows]
+
+    def is_reconciled(self) -> bool:
+        """
+        一度でも保存先と突き合わせたことがあるかどうか
+
+        Returns
+        -------
+        bool
+            突き合わせたことがあればTrue
+        """
+        with self.__lock:
+            row = self.__conn.execute("SELECT value FROM meta WHERE key = ?", (self.__reconciled_at_key(),)).fetchone()
+        return row is not None
+
+    def reconcile(self, records: Iterable[ManifestRecord]) -> None:
+        """
+        実際の保存先にある記事と突き合わせる
+
+        この scope で、保存先に無い記録は削除し、記録に無い記事は追加する。
+        既存の記録のハッシュなど、保存先の列挙では得られない情報は残す
+
+        Parameters
+        ----------
+        records : Iterable[ManifestRecord]
+            保存先にある全ての記事の情報
+        """
+        now = self._now()
+        with self.__lock, self.__conn:
+            self.__conn.execute("CREATE TEMP TABLE IF NOT EXISTS stored (url TEXT PRIMARY KEY, storage_id TEXT, size INTEGER)")
+            self.__conn.execute("DELETE FROM stored")
+            self.__conn.executemany(
+                "INSERT OR REPLACE INTO stored (url, storage_id, size) VALUES (?, ?, ?)",
+                ((record.url, record.storage_id, record.size) for record in records),
+            )
+            self.__conn.execute(
+                "DELETE FROM articles WHERE scope = ? AND storage_id NOT IN (SELECT storage_id FROM stored)",
+                (self.scope,),
+            )
+            self.__conn.execute(
+                "INSERT INTO articles (scope, url, storage_id, size, content_hash, saved_at) "
+                "SELECT ?, url, storage_id, size, NULL, ? FROM stored "
+                "WHERE url NOT IN (SELECT url FROM articles WHERE scope = ?)",
+                (self.scope, now, self.scope),
+            )
+            self.__conn.execute("DROP TABLE stored")
+            self.__conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (self.__reconciled_at_key(), now)
+            )
+
+    def close(self) -> None:
+        """
+        SQLiteファイルを閉じる
+        """
+        with self.__lock:
+            self.__conn.close()
+
+    def __reconciled_at_key(self) -> str:
+        """
+        保存先と突き合わせた日時を記録するキーを取得する
+
+        Returns
+        -------
+        str
+            meta テーブルのキー（scope "" は scope が無かった頃と同じキー）
+        """
+        return "reconciled_at" if self.scope == "" else f"reconciled_at:{self.scope}"
+
+    @staticmethod
+    def _now() -> str:
+        """
+        現在日時を取得する
+
+        Returns
+        -------
+        str
+            現在日時（ISO 8601）
+        """
+        return datetime.datetime.now(pytz.timezone("Asia/Tokyo")).isoformat()
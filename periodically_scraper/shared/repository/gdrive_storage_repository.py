@@ -1,16 +1,96 @@
+from typing import Iterable, Iterator, List, Optional, Set, Tuple, Union
+
+from pydrive2.files import GoogleDriveFile
+
+from periodically_scraper.shared.codec.abstract_article_codec import AbstractArticleCodec
+from periodically_scraper.shared.codec.article_codec_registry import ARTICLE_CODECS, split_codec_suffix
 from periodically_scraper.shared.gdrive_client import GDriveClient
 from periodically_scraper.shared.repository.abstract_storage_repository import AbstractStorageRepository
+from periodically_scraper.shared.repository.article_manifest import ArticleManifest, ManifestRecord
 
 
 class GDriveStorageRepository(AbstractStorageRepository):
-    def __init__(self, save_folder: str, gdrive: GDriveClient):
-        super().__init__(save_folder)
+
+    # 1回の検索で問い合わせる記事の最大数
+    MAX_TITLES_PER_QUERY = 10
+
+    def __init__(
+        self,
+        save_folder: str,
+        gdrive: GDriveClient,
+        manifest: Optional[ArticleManifest] = None,
+        codec: Optional[AbstractArticleCodec] = None,
+    ):
+        super().__init__(save_folder, manifest, codec)
         self.gdrive = gdrive
 
-    def save_article(self, html: str, filename: str) -> None:
-        self.gdrive.create_file(html, filename, "text/html", self.save_folder)
+    def _write_article(self, html: str, filename: str) -> ManifestRecord:
+        record = self._write_articles([(html, filename)])[0]
+        if isinstance(record, Exception):
+            raise record
+        return record
+
+    def _write_articles(self, articles: List[Tuple[str, str]]) -> List[Union[ManifestRecord, Exception]]:
+        contents_list = [self.codec.encode(html) for html, _ in articles]
+        files = self.gdrive.create_files([
+            (contents, f"{filename}{self.codec.suffix}", self.codec.mime_type, self.save_folder)
+            for contents, (_, filename) in zip(contents_list, articles)
+        ])
+        return [
+            file if isinstance(file, Exception) else ManifestRecord(filename, file["id"], len(contents))
+            for contents, (_, filename), file in zip(contents_list, articles, files)
+        ]
+
+    def _read_article(self, filename: str, storage_id: Optional[str] = None) -> Tuple[bytes, str]:
+        if storage_id is not None:
+            file = self.gdrive.download_file(storage_id)
+            file.FetchMetadata(fields="title")
+            file.FetchContent()
+            return file.content.getvalue(), file["title"]
+        article_file = next(self.__iter_files_by_title([filename]), None)
+        if article_file is None:
+            raise FileNotFoundError(f"Article '{filename}' is not saved in '{self.save_folder}'.")
+        file = self.gdrive.download_file(article_file["id"])
+        file.FetchContent()
+        return file.content.getvalue(), article_file["title"]
+
+    def _contains_many(self, urls: List[str]) -> Set[str]:
+        found: Set[str] = set()
+        # クエリが長くなりすぎないように分けて問い合わせる
+        for i in range(0, len(urls), self.MAX_TITLES_PER_QUERY):
+            for article_file in self.__iter_files_by_title(urls[i:i + self.MAX_TITLES_PER_QUERY]):
+                found.add(split_codec_suffix(article_file["title"])[0])
+        return found
+
+    def __iter_files_by_title(self, filenames: List[str]) -> Iterator[GoogleDriveFile]:
+        """
+        保存ファイル名（コーデックの拡張子を問わない）を指定して保存先のファイルを検索する
+
+        Parameters
+        ----------
+        filenames : List[str]
+            保存ファイル名（コーデックの拡張子を除く）のリスト
+
+        Returns
+        -------
+        Iterator[GoogleDriveFile]
+            見つかったファイル（id と title のみ）
+        """
+        titles = [
+            f"{filename}{codec.suffix}".replace("\\", "\\\\").replace("'", "\\'")
+            for filename in filenames
+            for codec in ARTICLE_CODECS
+        ]
+        title_query = " or ".join(f"title = '{title}'" for title in titles)
+        return self.gdrive.iter_file(f"'{self.save_folder}' in parents and ({title_query})")
 
-    def get_saved_article_urls(self) -> list:
-        article_file_list = self.gdrive.list_file(f"'{self.save_folder}' in parents")
-        article_path_list = [article_file["title"] for article_file in article_file_list]
-        return article_path_list
+    def _list_saved_articles(self) -> Iterable[ManifestRecord]:
+        article_files = self.gdrive.iter_file(f"'{self.save_folder}' in parents", fields="id,title,fileSize")
+        return (
+            ManifestRecord(
+                split_codec_suffix(article_file["title"])[0],
+                article_file["id"],
+                int(article_file["fileSize"]) if article_file.get("fileSize") is not None else None,
+            )
+            for article_file in article_files
+        )
@@ -1,7 +1,14 @@
+import hashlib
+import os
+import re
 from glob import glob
 from pathlib import PurePath
+from typing import Iterable, List, Optional, Set, Tuple
 
+from periodically_scraper.shared.codec.abstract_article_codec import AbstractArticleCodec
+from periodically_scraper.shared.codec.article_codec_registry import ARTICLE_CODECS, split_codec_suffix
 from periodically_scraper.shared.repository.abstract_storage_repository import AbstractStorageRepository
+from periodically_scraper.shared.repository.article_manifest import ArticleManifest, ManifestRecord
 
 
 class LocalStorageRepository(AbstractStorageRepository):
@@ -13,9 +20,33 @@ class LocalStorageRepository(AbstractStorageRepository):
         "/": ("/", "[SLASH]"),
         ":": (":", "[COLON]"),
     }
+    # 記事のファイル名（エスケープを戻したURL）
+    ARTICLE_FILENAME_PATTERN = re.compile(r"[A-Za-z][A-Za-z0-9+.-]*://")
 
-    def __init_(self, save_folder: str):
-        super().__init__(save_folder)
+    def __init__(
+        self,
+        save_folder: str,
+        manifest: Optional[ArticleManifest] = None,
+        codec: Optional[AbstractArticleCodec] = None,
+        sharded: bool = False,
+    ):
+        """
+        コンストラクタ
+
+        Parameters
+        ----------
+        save_folder : str
+            保存先フォルダ
+        manifest : Optional[ArticleManifest], optional
+            保存済み記事を記録するマニフェスト, by default None
+        codec : Optional[AbstractArticleCodec], optional
+            記事を保存するときのコーデック, by default None（圧縮しない）
+        sharded : bool, optional
+            URLのハッシュの先頭2文字ずつで2階層のサブフォルダに分けて保存するかどうか,
+            by default False（保存先フォルダの直下に保存する）
+        """
+        super().__init__(save_folder, manifest, codec)
+        self.sharded = sharded
 
     @classmethod
     def escape_save_path(cls, save_path: str) -> str:
@@ -31,12 +62,133 @@ class LocalStorageRepository(AbstractStorageRepository):
             .replace(cls.ESCAPE_STR_DICT[":"][cls.ESCAPED], cls.ESCAPE_STR_DICT[":"][cls.ORIGIN]) \
 
 
-    def save_article(self, html: str, filename: str) -> None:
-        save_path = f"{self.save_folder}/{self.escape_save_path(filename)}"
-        with open(save_path, "w") as f:
-            f.write(html)
+    def migrate_to_sharded(self) -> int:
+        """
+        保存先フォルダの直下に保存した記事を、サブフォルダに分けた配置へ移動する
+
+        記事のファイル名（エスケープしたURLとコーデックの拡張子）に一致するファイルだけを移動し、
+        マニフェストのSQLiteファイルなどの他のファイルはそのままにする。
+        マニフェストがある場合は、記録されている保存先も書き換える
+
+        Returns
+        -------
+        int
+            移動した記事の数
+        """
+        n_moved = 0
+        with os.scandir(self.save_folder) as entries:
+            for entry in entries:
+                if not entry.is_file():
+                    continue
+                escaped_filename, codec = split_codec_suffix(entry.name)
+                filename = self.restore_save_path(escaped_filename)
+                if self.escape_save_path(filename) != escaped_filename or not self.ARTICLE_FILENAME_PATTERN.match(filename):
+                    continue
+                # 保存したときと同じ形式のパスで、マニフェストの記録を探す
+                old_save_path = self._get_save_path(filename, codec.suffix, False)
+                save_path = self._get_save_path(filename, codec.suffix, True)
+                os.makedirs(self._get_shard_folder(filename), exist_ok=True)
+                os.replace(entry.path, save_path)
+                if self.manifest is not None:
+                    self.manifest.update_storage_id(old_save_path, save_path)
+                    # 保存先フォルダを別の書き方（末尾のスラッシュの有無など）で指定して保存した記録
+                    record = self.manifest.get(filename)
+                    if record is not None and os.path.abspath(record.storage_id) == os.path.abspath(old_save_path):
+                        self.manifest.update_storage_id(record.storage_id, save_path)
+                n_moved += 1
+        return n_moved
+
+    def _write_article(self, html: str, filename: str) -> ManifestRecord:
+        save_path = self._get_save_path(filename, self.codec.suffix, self.sharded)
+        if self.sharded:
+            os.makedirs(self._get_shard_folder(filename), exist_ok=True)
+        with open(save_path, "wb") as f:
+            f.write(self.codec.encode(html))
+        return ManifestRecord(filename, save_path, os.path.getsize(save_path))
+
+    def _read_article(self, filename: str, storage_id: Optional[str] = None) -> Tuple[bytes, str]:
+        if storage_id is None:
+            storage_id = self._find_save_path(filename)
+        if storage_id is None:
+            raise FileNotFoundError(f"Article '{filename}' is not saved in '{self.save_folder}'.")
+        with open(storage_id, "rb") as f:
+            return f.read(), storage_id
+
+    def _contains_many(self, urls: List[str]) -> Set[str]:
+        return {url for url in urls if self._find_save_path(url) is not None}
+
+    def _list_saved_articles(self) -> Iterable[ManifestRecord]:
+        article_path_list = sorted(
+            [path for path in glob(f"{self.save_folder}/*") if os.path.isfile(path)]
+            + glob(f"{self.save_folder}/*/*/*")
+        )
+        return [
+            ManifestRecord(
+                self.restore_save_path(split_codec_suffix(PurePath(article_path).name)[0]),
+                article_path,
+                os.path.getsize(article_path),
+            )
+            for article_path in article_path_list
+        ]
+
+    def _find_save_path(self, filename: str) -> Optional[str]:
+        """
+        保存した記事のパスを探す
+
+        現在の配置とコーデックの拡張子から順に、ファイルがあるかどうかを確認する（保存先は列挙しない）
+
+        Parameters
+        ----------
+        filename : str
+            保存ファイル名（コーデックの拡張子を除く）
+
+        Returns
+        -------
+        Optional[str]
+            保存した記事のパス（保存されていなければNone）
+        """
+        suffixes = list(dict.fromkeys(codec.suffix for codec in [self.codec] + ARTICLE_CODECS))
+        for sharded in (self.sharded, not self.sharded):
+            for suffix in suffixes:
+                save_path = self._get_save_path(filename, suffix, sharded)
+                if os.path.isfile(save_path):
+                    return save_path
+        return None
+
+    def _get_save_path(self, filename: str, suffix: str, sharded: bool) -> str:
+        """
+        記事の保存先のパスを取得する
+
+        Parameters
+        ----------
+        filename : str
+            保存ファイル名（コーデックの拡張子を除く）
+        suffix : str
+            コーデックの拡張子
+        sharded : bool
+            サブフォルダに分けた配置かどうか
+
+        Returns
+        -------
+        str
+            保存先のパス
+        """
+        folder = self._get_shard_folder(filename) if sharded else self.save_folder
+        return f"{folder}/{self.escape_save_path(filename)}{suffix}"
+
+    def _get_shard_folder(self, filename: str) -> str:
+        """
+        サブフォルダに分けた配置での、記事の保存先フォルダを取得する
+
+        Parameters
+        ----------
+        filename : str
+            保存ファイル名（コーデックの拡張子を除く）
 
-    def get_saved_article_urls(self) -> list:
-        article_path_list = sorted(glob(f"{self.save_folder}/*"))
-        article_url_list = [self.restore_save_path(PurePath(article_path).name) for article_path in article_path_list]
-        return article_url_list
+        Returns
+        -------
+        str
+            保存先フォルダ（URLのSHA-256ハッシュの先頭2文字と次の2文字のサブフォルダ）
+        """
+        url_hash = hashlib.sha256(filename.encode()).hexdigest()
+        return f"{self.save_folder}/{url_hash[:2]}/{url_hash[2:4]}"
@@ -0,0 +1,414 @@
+import os
+import re
+import struct
+import threading
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple, Union
+
+from periodically_scraper.shared.codec.abstract_article_codec import AbstractArticleCodec
+from periodically_scraper.shared.codec.article_codec_registry import get_article_codec
+from periodically_scraper.shared.repository.abstract_storage_repository import AbstractStorageRepository
+from periodically_scraper.shared.repository.article_manifest import ArticleManifest, ManifestRecord
+
+
+class PackIndexEntry(NamedTuple):
+    """
+    パックファイル内の記事の位置
+
+    Attributes
+    ----------
+    segment : int
+        セグメントの番号
+    offset : int
+        セグメント内のレコードの先頭位置 [byte]
+    length : int
+        レコード全体の長さ [byte]
+    codec_name : str
+        記事を保存したコーデック名
+    """
+    segment: int
+    offset: int
+    length: int
+    codec_name: str
+
+
+class PackStorageRepository(AbstractStorageRepository):
+    """
+    記事をセグメントファイルへ追記して保存するリポジトリ
+
+    記事ごとにファイルを作らず、一定サイズで切り替わるセグメントファイル（segment-NNNNN.pack）へ
+    レコードを追記する。URLからレコードの位置を引くインデックスは追記専用のファイル（index.tsv）に書き、
+    起動時にメモリ上の辞書へ読み込むため、記事の検索はO(1)で済む
+
+    レコードの形式は、ヘッダー（マジックナンバー, URLの長さ, コーデック名の長さ, データの長さ）、
+    URL、コーデック名、コーデックで変換したデータの順に並べたもの。
+    インデックスはセグメントから作り直せる
+    """
+
+    MAGIC = b"PSR1"
+    HEADER = struct.Struct(">4sHHQ")
+    INDEX_FILENAME = "index.tsv"
+    SEGMENT_PATTERN = re.compile(r"^segment-(\d{5})\.pack$")
+
+    def __init__(
+        self,
+        save_folder: str,
+        manifest: Optional[ArticleManifest] = None,
+        codec: Optional[AbstractArticleCodec] = None,
+        segment_max_bytes: int = 64 * 1024 * 1024,
+    ):
+        """
+        コンストラクタ
+
+        Parameters
+        ----------
+        save_folder : str
+            セグメントファイルとインデックスを保存するフォルダ
+        manifest : Optional[ArticleManifest], optional
+            保存済み記事を記録するマニフェスト, by default None
+        codec : Optional[AbstractArticleCodec], optional
+            記事を保存するときのコーデック, by default None（圧縮しない）
+        segment_max_bytes : int, optional
+            1つのセグメントファイルの最大サイズ [byte], by default 64MiB
+        """
+        super().__init__(save_folder, manifest, codec)
+        self.segment_max_bytes = segment_max_bytes
+        self.__lock = threading.RLock()
+        self.__index: Dict[str, PackIndexEntry] = {}
+        self.__segment_file: Optional[BinaryIO] = None
+        self.__index_file: Optional[BinaryIO] = None
+        self.__current_segment = 0
+        Path(save_folder).mkdir(parents=True, exist_ok=True)
+        self.__load_index()
+
+    @property
+    def index_path(self) -> Path:
+        """インデックスファイルのパス"""
+        return Path(self.save_folder) / self.INDEX_FILENAME
+
+    def iter_articles(self) -> Iterator[Tuple[str, str]]:
+        """
+        保存した全ての記事をセグメントの先頭から順に読み込む
+
+        上書きされた古いレコードは読み飛ばす
+
+        Yields
+        -------
+        Tuple[str, str]
+            (保存ファイル名, 記事のHTML文書)
+        """
+        with self.__lock:
+            self.__flush()
+        for segment in self.__list_segments():
+            for url, codec_name, data, entry in self.__scan_segment(segment):
+                if self.__index.get(url) == entry:
+                    yield url, get_article_codec(codec_name).decode(data)
+
+    def compact(self) -> None:
+        """
+        上書きされた古いレコードを取り除き、セグメントファイルを詰め直す
+
+        有効なレコードを新しいセグメントへコピーし、インデックスを置き換えてから古いセグメントを削除する
+        """
+        with self.__lock:
+            self.__flush()
+            self.__close_files()
+            old_segments = self.__list_segments()
+            next_segment = old_segments[-1] + 1 if len(old_segments) > 0 else 0
+            new_index: Dict[str, PackIndexEntry] = {}
+            out: Optional[BinaryIO] = None
+            segment = next_segment
+            try:
+                for old_segment in old_segments:
+                    for url, _, _, entry in self.__scan_segment(old_segment):
+                        if self.__index.get(url) != entry:
+                            continue
+                        record = self.__read_record(entry)
+                        if out is not None and out.tell() + len(record) > self.segment_max_bytes:
+                            out.close()
+                            out = None
+                            segment += 1
+                        if out is None:
+                            out = open(self.__get_segment_path(segment), "ab")
+                        new_index[url] = entry._replace(segment=segment, offset=out.tell())
+                        out.write(record)
+                if out is not None:
+                    out.flush()
+                    os.fsync(out.fileno())
+            finally:
+                if out is not None:
+                    out.close()
+
+            # インデックスを置き換えた後に古いセグメントを削除する
+            self.__index = new_index
+            self.__write_index()
+            for old_segment in old_segments:
+                self.__get_segment_path(old_segment).unlink()
+
+    def rebuild_index(self) -> None:
+        """
+        セグメントファイルを走査してインデックスを作り直す
+
+        インデックスへの書き込み前に中断した場合など、インデックスがセグメントと食い違っているときに使う
+        """
+        with self.__lock:
+            self.__close_files()
+            index: Dict[str, PackIndexEntry] = {}
+            for segment in self.__list_segments():
+                for url, _, _, entry in self.__scan_segment(segment):
+                    index[url] = entry
+            self.__index = index
+            self.__write_index()
+
+    def close(self) -> None:
+        with self.__lock:
+            self.__flush()
+            self.__close_files()
+
+    def _write_article(self, html: str, filename: str) -> ManifestRecord:
+        with self.__lock:
+            record = self.__append(html, filename)
+            self.__flush()
+        return record
+
+    def _write_articles(self, articles: List[Tuple[str, str]]) -> List[Union[ManifestRecord, Exception]]:
+        results: List[Union[ManifestRecord, Exception]] = []
+        with self.__lock:
+            for html, filename in articles:
+                try:
+                    results.append(self.__append(html, filename))
+                except Exception as e:
+                    results.append(e)
+            # まとめて書き込んでから、1回だけディスクへ書き出す
+            self.__flush()
+        return results
+
+    def _read_article(self, filename: str, storage_id: Optional[str] = None) -> Tuple[bytes, str]:
+        with self.__lock:
+            # 保存先IDは記事を書き込んだときのURL
+            entry = self.__index.get(storage_id if storage_id is not None else filename)
+            if entry is None:
+                raise FileNotFoundError(f"Article '{filename}' is not saved in '{self.save_folder}'.")
+            self.__flush()
+            record = self.__read_record(entry)
+        _, url_length, codec_length, _ = self.HEADER.unpack_from(record)
+        data = record[self.HEADER.size + url_length + codec_length:]
+        return data, f"{filename}{get_article_codec(entry.codec_name).suffix}"
+
+    def _contains_many(self, urls: List[str]) -> Set[str]:
+        with self.__lock:
+            return {url for url in urls if url in self.__index}
+
+    def _list_saved_articles(self) -> Iterable[ManifestRecord]:
+        with self.__lock:
+            index = dict(self.__index)
+        # 保存先IDはURLとする（コンパクションでレコードの位置が変わってもマニフェストを更新しなくてよい）
+        return [ManifestRecord(url, url, entry.length) for url, entry in sorted(index.items())]
+
+    def __append(self, html: str, filename: str) -> ManifestRecord:
+        """
+        記事のレコードを現在のセグメントへ追記し、インデックスへ記録する（ディスクへの書き出しはしない）
+
+        Parameters
+        ----------
+        html : str
+            記事のHTML文書
+        filename : str
+            保存ファイル名
+
+        Returns
+        -------
+        ManifestRecord
+            保存した記事の情報
+        """
+        if "\t" in filename or "\n" in filename:
+            raise ValueError(f"File name must not contain tabs or newlines: {filename!r}")
+        url = filename.encode()
+        codec_name = self.codec.name.encode()
+        data = self.codec.encode(html)
+        record = self.HEADER.pack(self.MAGIC, len(url), len(codec_name), len(data)) + url + codec_name + data
+
+        segment_file = self.__get_segment_file(len(record))
+        entry = PackIndexEntry(self.__current_segment, segment_file.tell(), len(record), self.codec.name)
+        segment_file.write(record)
+        self.__get_index_file().write(
+            f"{filename}\t{entry.segment}\t{entry.offset}\t{entry.length}\t{entry.codec_name}\n".encode()
+        )
+        self.__index[filename] = entry
+        return ManifestRecord(filename, filename, len(record))
+
+    def __get_segment_file(self, record_length: int) -> BinaryIO:
+        """
+        追記するセグメントファイルを取得する（最大サイズを超える場合は次のセグメントへ切り替える）
+
+        Parameters
+        ----------
+        record_length : int
+            追記するレコードの長さ [byte]
+
+        Returns
+        -------
+        BinaryIO
+            追記モードで開いたセグメントファイル
+        """
+        if self.__segment_file is None:
+            segments = self.__list_segments()
+            self.__current_segment = segments[-1] if len(segments) > 0 else 0
+            self.__segment_file = open(self.__get_segment_path(self.__current_segment), "ab")
+        if self.__segment_file.tell() > 0 and self.__segment_file.tell() + record_length > self.segment_max_bytes:
+            self.__segment_file.flush()
+            self.__segment_file.close()
+            self.__current_segment += 1
+            self.__segment_file = open(self.__get_segment_path(self.__current_segment), "ab")
+        return self.__segment_file
+
+    def __get_index_file(self) -> BinaryIO:
+        """
+        追記モードで開いたインデックスファイルを取得する
+
+        Returns
+        -------
+        BinaryIO
+            インデックスファイル
+        """
+        if self.__index_file is None:
+            self.__index_file = open(self.index_path, "ab")
+        return self.__index_file
+
+    def __flush(self) -> None:
+        """
+        追記したレコードをディスクへ書き出す（セグメントを先に書き出し、インデックスが先行しないようにする）
+        """
+        for file in (self.__segment_file, self.__index_file):
+            if file is not None:
+                file.flush()
+                os.fsync(file.fileno())
+
+    def __close_files(self) -> None:
+        """
+        開いているセグメントファイルとインデックスファイルを閉じる
+        """
+        for file in (self.__segment_file, self.__index_file):
+            if file is not None:
+                file.close()
+        self.__segment_file = None
+        self.__index_file = None
+
+    def __load_index(self) -> None:
+        """
+        インデックスファイルを読み込む（無い場合はセグメントから作り直す）
+        """
+        if not self.index_path.exists():
+            if len(self.__list_segments()) > 0:
+                self.rebuild_index()
+            return
+        with open(self.index_path, "rb") as f:
+            for line in f:
+                fields = line.decode().rstrip("\n").split("\t")
+                # 書き込み途中で中断した行は読み飛ばす
+                if len(fields) != 5:
+                    continue
+                url, segment, offset, length, codec_name = fields
+                self.__index[url] = PackIndexEntry(int(segment), int(offset), int(length), codec_name)
+        # セグメントへ書き出す前に中断したレコードは取り除く
+        segment_sizes = {segment: self.__get_segment_path(segment).stat().st_size for segment in self.__list_segments()}
+        self.__index = {
+            url: entry for url, entry in self.__index.items()
+            if entry.offset + entry.length <= segment_sizes.get(entry.segment, 0)
+        }
+
+    def __write_index(self) -> None:
+        """
+        メモリ上のインデックスでインデックスファイルを置き換える
+        """
+        tmp_path = self.index_path.with_suffix(".tmp")
+        with open(tmp_path, "wb") as f:
+            for url, entry in self.__index.items():
+                f.write(f"{url}\t{entry.segment}\t{entry.offset}\t{entry.length}\t{entry.codec_name}\n".encode())
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.index_path)
+
+    def __read_record(self, entry: PackIndexEntry) -> bytes:
+        """
+        レコードを読み込む
+
+        Parameters
+        ----------
+        entry : PackIndexEntry
+            レコードの位置
+
+        Returns
+        -------
+        bytes
+            レコード全体のバイト列
+        """
+        with open(self.__get_segment_path(entry.segment), "rb") as f:
+            f.seek(entry.offset)
+            record = f.read(entry.length)
+        if len(record) != entry.length or record[:len(self.MAGIC)] != self.MAGIC:
+            raise ValueError(f"Broken record in segment {entry.segment} at offset {entry.offset}.")
+        return record
+
+    def __scan_segment(self, segment: int) -> Iterator[Tuple[str, str, bytes, PackIndexEntry]]:
+        """
+        セグメントのレコードを先頭から順に読み込む（末尾の書き込み途中のレコードは読み飛ばす）
+
+        Parameters
+        ----------
+        segment : int
+            セグメントの番号
+
+        Yields
+        -------
+        Tuple[str, str, bytes, PackIndexEntry]
+            (保存ファイル名, コーデック名, データ, レコードの位置)
+        """
+        with open(self.__get_segment_path(segment), "rb") as f:
+            while True:
+                offset = f.tell()
+                header = f.read(self.HEADER.size)
+                if len(header) < self.HEADER.size:
+                    return
+                magic, url_length, codec_length, data_length = self.HEADER.unpack(header)
+                if magic != self.MAGIC:
+                    raise ValueError(f"Broken record in segment {segment} at offset {offset}.")
+                body = f.read(url_length + codec_length + data_length)
+                if len(body) < url_length + codec_length + data_length:
+                    return
+                url = body[:url_length].decode()
+                codec_name = body[url_length:url_length + codec_length].decode()
+                entry = PackIndexEntry(segment, offset, self.HEADER.size + len(body), codec_name)
+                yield url, codec_name, body[url_length + codec_length:], entry
+
+    def __list_segments(self) -> List[int]:
+        """
+        セグメントの番号を昇順で列挙する
+
+        Returns
+        -------
+        List[int]
+            セグメントの番号のリスト
+        """
+        segments = []
+        for path in Path(self.save_folder).iterdir():
+            match = self.SEGMENT_PATTERN.match(path.name)
+            if match is not None:
+                segments.append(int(match.group(1)))
+        return sorted(segments)
+
+    def __get_segment_path(self, segment: int) -> Path:
+        """
+        セグメントファイルのパスを取得する
+
+        Parameters
+        ----------
+        segment : int
+            セグメントの番号
+
+        Returns
+        -------
+        Path
+            セグメントファイルのパス
+        """
+        return Path(self.save_folder) / f"segment-{segment:05d}.pack"
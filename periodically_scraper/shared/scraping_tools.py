@@ -1,8 +1,43 @@
+import codecs
+from contextlib import nullcontext
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
 from http import HTTPStatus
-import requests
+import re
+import threading
 from time import sleep
 from random import random
-from typing import Tuple
+from typing import Callable, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from lxml import etree
+from requests.adapters import HTTPAdapter
+
+from periodically_scraper.shared.http_cache import HttpCache
+from periodically_scraper.shared.rate_limiter import TokenBucketRateLimiter
+
+# リトライするHTTP status code
+RETRY_STATUS_CODES = (
+    HTTPStatus.TOO_MANY_REQUESTS,
+    HTTPStatus.INTERNAL_SERVER_ERROR,
+    HTTPStatus.BAD_GATEWAY,
+    HTTPStatus.SERVICE_UNAVAILABLE,
+    HTTPStatus.GATEWAY_TIMEOUT,
+)
+# サーバーが混雑していることを示すHTTP status code（ホストごと一時停止する）
+PUSHBACK_STATUS_CODES = (
+    HTTPStatus.TOO_MANY_REQUESTS,
+    HTTPStatus.SERVICE_UNAVAILABLE,
+)
+# 指数バックオフの基準となる待ち時間 [秒]
+BACKOFF_BASE = 1.0
+# 指数バックオフの待ち時間の上限 [秒]
+MAX_BACKOFF = 60.0
+# ストリーミングで取得するときのチャンクサイズ [byte]
+STREAM_CHUNK_SIZE = 16 * 1024
+# HTML文書の先頭から文字コードを探すパターン
+META_CHARSET_PATTERN = re.compile(rb"""<meta[^>]+charset=["']?([\w-]+)""", re.IGNORECASE)
 
 
 def get_html(url: str, N_RETRY: int = 3) -> Tuple[str, int]:
@@ -22,16 +57,480 @@ def get_html(url: str, N_RETRY: int = 3) -> Tuple[str, int]:
     int
         HTTP status code
     """
-    for _ in range(N_RETRY):
-        sleep(random())
-        response = requests.get(url)
-        if response.status_code == HTTPStatus.OK:
-            return response.text, response.status_code
-        elif response.status_code == HTTPStatus.INTERNAL_SERVER_ERROR:
+    return _get_html_with_retry(requests.get, url, N_RETRY)
+
+
+def _get_html_with_retry(
+    request_get: Callable[..., requests.Response],
+    url: str,
+    N_RETRY: int,
+    rate_limiter: Optional[TokenBucketRateLimiter] = None,
+    backoff_base: float = BACKOFF_BASE,
+    **kwargs,
+) -> Tuple[str, int]:
+    """リトライしながら指定URLのHTMLを取得する
+
+    Parameters
+    ----------
+    request_get : Callable[..., requests.Response]
+        GETリクエストを送る関数（requests.get または Session.get）
+    url : str
+        リクエストを送りたいURL
+    N_RETRY : int
+        スクレイピング失敗時のリトライ回数
+    rate_limiter : Optional[TokenBucketRateLimiter], optional
+        リクエスト頻度を制限するレートリミッター, by default None
+    backoff_base : float, optional
+        指数バックオフの基準となる待ち時間 [秒], by default BACKOFF_BASE
+    **kwargs
+        request_get に渡す追加の引数
+
+    Returns
+    -------
+    str
+        HTML文書
+    int
+        HTTP status code
+    """
+    response = _request_with_retry(request_get, url, N_RETRY, rate_limiter, backoff_base, **kwargs)
+    if response.status_code == HTTPStatus.OK:
+        return response.text, response.status_code
+    return "", response.status_code
+
+
+def _request_with_retry(
+    request_get: Callable[..., requests.Response],
+    url: str,
+    N_RETRY: int,
+    rate_limiter: Optional[TokenBucketRateLimiter] = None,
+    backoff_base: float = BACKOFF_BASE,
+    **kwargs,
+) -> requests.Response:
+    """リトライしながらGETリクエストを送る
+
+    最初のリクエストは待たずに送り、サーバーから混雑や一時的なエラーを返されたときだけ
+    Retry-After ヘッダー、または指数バックオフ（ジッター付き）に従って待ってからリトライする。
+    混雑（429, 503）を返された場合、レートリミッターがあればホストごと一時停止し、
+    同じホストへリクエストを送る他のスレッドも待たせる
+
+    Parameters
+    ----------
+    request_get : Callable[..., requests.Response]
+        GETリクエストを送る関数（requests.get または Session.get）
+    url : str
+        リクエストを送りたいURL
+    N_RETRY : int
+        スクレイピング失敗時のリトライ回数
+    rate_limiter : Optional[TokenBucketRateLimiter], optional
+        リクエスト頻度を制限するレートリミッター, by default None
+    backoff_base : float, optional
+        指数バックオフの基準となる待ち時間 [秒], by default BACKOFF_BASE
+    **kwargs
+        request_get に渡す追加の引数
+
+    Returns
+    -------
+    requests.Response
+        最後に受け取ったレスポンス
+
+    Raises
+    ------
+    requests.exceptions.RequestException
+        最後のリトライでも接続エラー、タイムアウトになった場合
+    """
+    for attempt in range(N_RETRY):
+        is_last_attempt = attempt == N_RETRY - 1
+        if rate_limiter is not None:
+            rate_limiter.acquire(url)
+        try:
+            response = request_get(url, **kwargs)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+            if is_last_attempt:
+                raise
+            sleep(_get_backoff_time(attempt, backoff_base))
             continue
-        elif response.status_code == HTTPStatus.NOT_FOUND:
-            return "", response.status_code
-        else:
+
+        if response.status_code in RETRY_STATUS_CODES and not is_last_attempt:
+            wait_time = _get_retry_wait_time(response, attempt, backoff_base)
+            response.close()
+            if rate_limiter is not None and response.status_code in PUSHBACK_STATUS_CODES:
+                # 次の rate_limiter.acquire で、停止が終わるまで待つ
+                rate_limiter.pause(url, wait_time)
+            else:
+                sleep(wait_time)
+            continue
+        return response
+    return response
+
+
+def _get_backoff_time(attempt: int, backoff_base: float) -> float:
+    """ジッター付きの指数バックオフの待ち時間を計算する
+
+    Parameters
+    ----------
+    attempt : int
+        何回目のリトライか（0始まり）
+    backoff_base : float
+        指数バックオフの基準となる待ち時間 [秒]
+
+    Returns
+    -------
+    float
+        待ち時間 [秒]
+    """
+    backoff = min(MAX_BACKOFF, backoff_base * 2 ** attempt)
+    return backoff / 2 + random() * backoff / 2
+
+
+def _get_retry_wait_time(response: requests.Response, attempt: int, backoff_base: float) -> float:
+    """リトライ前の待ち時間を取得する
+
+    429, 503 で Retry-After ヘッダーがあればそれに従い（MAX_BACKOFF 秒まで）、なければ指数バックオフを使う
+
+    Parameters
+    ----------
+    response : requests.Response
+        リトライ対象のレスポンス
+    attempt : int
+        何回目のリトライか（0始まり）
+    backoff_base : float
+        指数バックオフの基準となる待ち時間 [秒]
+
+    Returns
+    -------
+    float
+        待ち時間 [秒]
+    """
+    if response.status_code in PUSHBACK_STATUS_CODES:
+        retry_after = _parse_retry_after(response.headers.get("Retry-After"))
+        if retry_after is not None:
+            return retry_after
+    return _get_backoff_time(attempt, backoff_base)
+
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After ヘッダーの値を待ち時間 [秒] に変換する
+
+    Parameters
+    ----------
+    value : Optional[str]
+        Retry-After ヘッダーの値（秒数 または HTTP-date）
+
+    Returns
+    -------
+    Optional[float]
+        待ち時間 [秒]（MAX_BACKOFF 秒まで。解釈できない場合はNone）
+    """
+    if not isinstance(value, str):
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return min(MAX_BACKOFF, float(value))
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at is None:
+        return None
+    return min(MAX_BACKOFF, max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds()))
+
+
+class HtmlFetcher(object):
+    """
+    ホストごとにコネクションをプールして再利用するHTMLフェッチャー
+
+    同じホストへのリクエストはKeep-Aliveされたコネクションを使い回すため、
+    リクエストごとのTCP/TLSハンドシェイクが発生しない
+
+    Attributes
+    ----------
+    pool_size : int
+        ホストごとのコネクションプールの大きさ
+    timeout : Tuple[float, float]
+        (接続タイムアウト, 読み込みタイムアウト) [秒]
+    headers : dict
+        全リクエストに付与するデフォルトのヘッダー
+    max_connections_per_host : Optional[int]
+        ホストごとの同時リクエスト数の上限（Noneなら無制限）
+    rate_limiter : Optional[TokenBucketRateLimiter]
+        ホストごとのリクエスト頻度を制限するレートリミッター（Noneなら無制限）
+    backoff_base : float
+        サーバーから混雑を返されたときの指数バックオフの基準となる待ち時間 [秒]
+    cache : Optional[HttpCache]
+        use_cache=True で取得するページのレスポンスキャッシュ（Noneならキャッシュしない）
+    """
+
+    def __init__(
+        self,
+        pool_size: int = 10,
+        connect_timeout: float = 5.0,
+        read_timeout: float = 30.0,
+        headers: Optional[dict] = None,
+        max_connections_per_host: Optional[int] = None,
+        rate_limiter: Optional[TokenBucketRateLimiter] = None,
+        backoff_base: float = BACKOFF_BASE,
+        cache: Optional[HttpCache] = None,
+    ) -> None:
+        """
+        コンストラクタ
+
+        Parameters
+        ----------
+        pool_size : int, optional
+            ホストごとのコネクションプールの大きさ, by default 10
+        connect_timeout : float, optional
+            接続タイムアウト [秒], by default 5.0
+        read_timeout : float, optional
+            読み込みタイムアウト [秒], by default 30.0
+        headers : Optional[dict], optional
+            全リクエストに付与するデフォルトのヘッダー, by default None
+        max_connections_per_host : Optional[int], optional
+            ホストごとの同時リクエスト数の上限, by default None（無制限）
+        rate_limiter : Optional[TokenBucketRateLimiter], optional
+            ホストごとのリクエスト頻度を制限するレートリミッター, by default None（無制限）
+        backoff_base : float, optional
+            指数バックオフの基準となる待ち時間 [秒], by default BACKOFF_BASE
+        cache : Optional[HttpCache], optional
+            レスポンスキャッシュ, by default None（キャッシュしない）
+        """
+        self.pool_size = pool_size
+        self.timeout = (connect_timeout, read_timeout)
+        self.headers = headers if headers is not None else {}
+        self.max_connections_per_host = max_connections_per_host
+        self.rate_limiter = rate_limiter
+        self.backoff_base = backoff_base
+        self.cache = cache
+        self.__sessions: Dict[str, requests.Session] = {}
+        self.__host_semaphores: Dict[str, threading.BoundedSemaphore] = {}
+        self.__lock = threading.Lock()
+
+    def get_session(self, url: str) -> requests.Session:
+        """
+        URLのホストに対応するセッションを取得する（なければ作成する）
+
+        Parameters
+        ----------
+        url : str
+            リクエスト先のURL
+
+        Returns
+        -------
+        requests.Session
+            ホストごとのセッション
+        """
+        host = urlsplit(url).netloc
+        with self.__lock:
+            session = self.__sessions.get(host)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                session.headers.update(self.headers)
+                self.__sessions[host] = session
+        return session
+
+    def _limit_host_connections(self, url: str):
+        """
+        ホストごとの同時リクエスト数を制限するコンテキストマネージャを取得する
+
+        Parameters
+        ----------
+        url : str
+            リクエスト先のURL
+
+        Returns
+        -------
+        ContextManager
+            ホストのセマフォ（上限が無い場合は何もしないコンテキストマネージャ）
+        """
+        if self.max_connections_per_host is None:
+            return nullcontext()
+        host = urlsplit(url).netloc
+        with self.__lock:
+            semaphore = self.__host_semaphores.get(host)
+            if semaphore is None:
+                semaphore = threading.BoundedSemaphore(self.max_connections_per_host)
+                self.__host_semaphores[host] = semaphore
+        return semaphore
+
+    def get_html(self, url: str, N_RETRY: int = 3, use_cache: bool = False) -> Tuple[str, int]:
+        """
+        指定URLのHTMLをプールされたコネクションで取得する
+
+        use_cache=True の場合、同じ実行中に取得済みならメモリ上のレスポンスを返し、
+        ディスクにキャッシュがあれば条件付きリクエストで再検証して、
+        304 Not Modified ならキャッシュしたHTMLを返す
+
+        Parameters
+        ----------
+        url : str
+            リクエストを送りたいURL
+        N_RETRY : int, optional
+            スクレイピング失敗時のリトライ回数, by default 3
+        use_cache : bool, optional
+            レスポンスキャッシュを使うかどうか, by default False
+
+        Returns
+        -------
+        str
+            HTML文書
+        int
+            HTTP status code
+        """
+        cache = self.cache if use_cache else None
+        headers = {}
+        if cache is not None:
+            memo = cache.get_memo(url)
+            if memo is not None:
+                return memo, HTTPStatus.OK
+            headers = cache.get_validation_headers(url)
+
+        session = self.get_session(url)
+        with self._limit_host_connections(url):
+            response = _request_with_retry(
+                session.get,
+                url,
+                N_RETRY,
+                self.rate_limiter,
+                self.backoff_base,
+                headers=headers,
+                timeout=self.timeout,
+            )
+
+        if cache is not None and response.status_code == HTTPStatus.NOT_MODIFIED:
+            entry = cache.load(url)
+            if entry is not None:
+                cache.memoize(url, entry["text"])
+                return entry["text"], HTTPStatus.OK
+        if response.status_code != HTTPStatus.OK:
             return "", response.status_code
-    else:
-        return "", response.status_code
+        if cache is not None:
+            cache.store(url, response.text, response.headers.get("ETag"), response.headers.get("Last-Modified"))
+        return response.text, response.status_code
+
+    def get_main_html(self, url: str, N_RETRY: int = 3, chunk_size: int = STREAM_CHUNK_SIZE) -> Tuple[str, int]:
+        """
+        指定URLのHTMLをストリーミングで取得し、main要素だけを返す
+
+        レスポンスボディをチャンクごとに読みながらインクリメンタルに解析し、
+        main要素の終了タグまで読んだ時点で接続を閉じる。
+        そのため、main要素より後ろのフッターやスクリプト、コメント欄はダウンロードしない
+
+        Parameters
+        ----------
+        url : str
+            リクエストを送りたいURL
+        N_RETRY : int, optional
+            スクレイピング失敗時のリトライ回数, by default 3
+        chunk_size : int, optional
+            1回に読み込むサイズ [byte], by default STREAM_CHUNK_SIZE
+
+        Returns
+        -------
+        str
+            main要素（見つからない場合は "None"）
+        int
+            HTTP status code
+        """
+        session = self.get_session(url)
+        with self._limit_host_connections(url):
+            response = _request_with_retry(
+                session.get,
+                url,
+                N_RETRY,
+                self.rate_limiter,
+                self.backoff_base,
+                stream=True,
+                timeout=self.timeout,
+            )
+            try:
+                if response.status_code != HTTPStatus.OK:
+                    return "", response.status_code
+                return _extract_main_from_stream(response, chunk_size), response.status_code
+            finally:
+                response.close()
+
+    def close(self) -> None:
+        """
+        プールしている全てのセッションを閉じる
+        """
+        with self.__lock:
+            for session in self.__sessions.values():
+                session.close()
+            self.__sessions.clear()
+
+
+def _extract_main_from_stream(response: requests.Response, chunk_size: int) -> str:
+    """ストリーミングのレスポンスからmain要素を抽出する
+
+    Parameters
+    ----------
+    response : requests.Response
+        stream=True で取得したレスポンス
+    chunk_size : int
+        1回に読み込むサイズ [byte]
+
+    Returns
+    -------
+    str
+        main要素（見つからない場合は "None"）
+    """
+    parser = None
+    for chunk in response.iter_content(chunk_size=chunk_size):
+        if parser is None:
+            encoding = _detect_encoding(response.headers.get("Content-Type"), chunk)
+            try:
+                parser = etree.HTMLPullParser(events=("end",), tag="main", encoding=encoding)
+            except LookupError:
+                # Pythonは知っているが、lxml（libxml2）が知らない文字コード
+                parser = etree.HTMLPullParser(events=("end",), tag="main", encoding="utf-8")
+        parser.feed(chunk)
+        for _, element in parser.read_events():
+            # main要素を読み終えたら、残りは読まない
+            return etree.tostring(element, method="html", encoding="unicode", with_tail=False)
+    if parser is None:
+        return str(None)
+
+    # 終了タグが無いまま文書が終わった場合
+    root = parser.close()
+    main_elements = root.xpath("//main") if root is not None else []
+    if len(main_elements) == 0:
+        return str(None)
+    return etree.tostring(main_elements[0], method="html", encoding="unicode", with_tail=False)
+
+
+def _detect_encoding(content_type: Optional[str], head: bytes) -> str:
+    """HTML文書の文字コードを判定する
+
+    Content-Type ヘッダーの charset、文書先頭の meta 要素の charset の順に探し、
+    どちらも無いか、知らない文字コードであれば UTF-8 とみなす
+
+    Parameters
+    ----------
+    content_type : Optional[str]
+        Content-Type ヘッダーの値
+    head : bytes
+        文書の先頭
+
+    Returns
+    -------
+    str
+        文字コード
+    """
+    candidates = []
+    if isinstance(content_type, str):
+        for param in content_type.split(";")[1:]:
+            key, _, value = param.strip().partition("=")
+            if key.lower() == "charset" and value:
+                candidates.append(value.strip("\"'"))
+    match = META_CHARSET_PATTERN.search(head)
+    if match is not None:
+        candidates.append(match.group(1).decode("ascii"))
+    for encoding in candidates:
+        try:
+            codecs.lookup(encoding)
+        except LookupError:
+            continue
+        return encoding
+    return "utf-8"
@@ -0,0 +1,369 @@
+import sqlite3
+import threading
+import time
+from typing import Iterable, List, NamedTuple, Optional
+
+
+class Shard(NamedTuple):
+    """
+    バックフィルで1つのワーカーがまとめて巡回する記事一覧ページの範囲
+
+    Attributes
+    ----------
+    shard_id : int
+        シャードのID
+    site : str
+        サイト名
+    start_page : int
+        最初のページ番号
+    end_page : int
+        最後のページ番号（このページを含む）
+    attempts : int
+        リースされた回数
+    """
+    shard_id: int
+    site: str
+    start_page: int
+    end_page: int
+    attempts: int
+
+
+class ShardLeaseTable(object):
+    """
+    バックフィルのシャードをワーカー間で分配するSQLiteの調整テーブル
+
+    ワーカーはシャードを期限付きでリースし、巡回し終えたら完了にする。
+    ワーカーが止まってリースの期限が切れたシャードは、他のワーカーが再びリースできる。
+    同じ記事が複数のシャードに載っている場合（巡回中に記事が追加されてページがずれた場合など）に
+    重複して保存しないように、記事のURLも最初にリースしたシャードに割り当て、保存できたら完了にする
+
+    複数のプロセスや、同じフォルダを共有する複数のマシンから同時に使うことができる
+    （SQLiteのファイルロックが正しく動くファイルシステムであること。共有メモリを使うWALモードは
+    ネットワークファイルシステムで動かないため、既定のロールバックジャーナルを使う）
+
+    Attributes
+    ----------
+    db_path : str
+        SQLiteファイルのパス
+    lease_seconds : float
+        リースの期限 [秒]
+    """
+
+    def __init__(self, db_path: str, lease_seconds: float = 600.0) -> None:
+        """
+        コンストラクタ
+
+        Parameters
+        ----------
+        db_path : str
+            SQLiteファイルのパス
+        lease_seconds : float, optional
+            リースの期限 [秒], by default 600.0
+        """
+        self.db_path = db_path
+        self.lease_seconds = lease_seconds
+        # トランザクションは BEGIN IMMEDIATE で明示的に始める
+        self.__conn = sqlite3.connect(db_path, timeout=60.0, isolation_level=None, check_same_thread=False)
+        self.__lock = threading.Lock()
+        with self.__lock:
+            # WALモードで作成したファイルも、既定のロールバックジャーナルに戻す
+            self.__conn.execute("PRAGMA journal_mode=DELETE")
+            self.__conn.execute(
+                "CREATE TABLE IF NOT EXISTS shards ("
+                "shard_id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                "site TEXT NOT NULL, "
+                "start_page INTEGER NOT NULL, "
+                "end_page INTEGER NOT NULL, "
+                "status TEXT NOT NULL DEFAULT 'pending', "
+                "owner TEXT, "
+                "lease_expires_at REAL, "
+                "attempts INTEGER NOT NULL DEFAULT 0, "
+                "UNIQUE (site, start_page))"
+            )
+            self.__conn.execute(
+                "CREATE TABLE IF NOT EXISTS article_claims ("
+                "url TEXT PRIMARY KEY, "
+                "shard_id INTEGER NOT NULL, "
+                "done INTEGER NOT NULL DEFAULT 0)"
+            )
+            columns = [row[1] for row in self.__conn.execute("PRAGMA table_info(article_claims)").fetchall()]
+            if "done" not in columns:
+                self.__conn.execute("ALTER TABLE article_claims ADD COLUMN done INTEGER NOT NULL DEFAULT 0")
+            self.__conn.execute("CREATE INDEX IF NOT EXISTS article_claims_shard_id ON article_claims (shard_id)")
+
+    def create_shards(self, site: str, last_page_count: int, pages_per_shard: int) -> None:
+        """
+        記事一覧ページの範囲をシャードに分ける（作成済みのシャードはそのまま）
+
+        Parameters
+        ----------
+        site : str
+            サイト名
+        last_page_count : int
+            最終ページのページ番号
+        pages_per_shard : int
+            1つのシャードのページ数
+        """
+        shards = [
+            (site, start_page, min(start_page + pages_per_shard - 1, last_page_count))
+            for start_page in range(1, last_page_count + 1, pages_per_shard)
+        ]
+        with self.__transaction():
+            self.__conn.executemany(
+                "INSERT OR IGNORE INTO shards (site, start_page, end_page) VALUES (?, ?, ?)", shards
+            )
+
+    def claim(self, site: str, owner: str, max_attempts: int = 3) -> Optional[Shard]:
+        """
+        未完了のシャードを1つリースする
+
+        まだ誰もリースしていないシャードと、リースの期限が切れたシャードが対象
+
+        Parameters
+        ----------
+        site : str
+            サイト名
+        owner : str
+            リースするワーカーの名前
+        max_attempts : int, optional
+            1つのシャードをリースする最大回数（これ以上失敗したシャードは諦める）, by default 3
+
+        Returns
+        -------
+        Optional[Shard]
+            リースしたシャード（リースできるシャードが無ければNone）
+        """
+        now = time.time()
+        with self.__transaction():
+            row = self.__conn.execute(
+                "SELECT shard_id, site, start_page, end_page, attempts FROM shards "
+                "WHERE site = ? AND attempts < ? "
+                "AND (status = 'pending' OR (status = 'leased' AND lease_expires_at < ?)) "
+                "ORDER BY start_page LIMIT 1",
+                (site, max_attempts, now),
+            ).fetchone()
+            if row is None:
+                return None
+            shard = Shard(*row)._replace(attempts=row[4] + 1)
+            self.__conn.execute(
+                "UPDATE shards SET status = 'leased', owner = ?, lease_expires_at = ?, attempts = ? WHERE shard_id = ?",
+                (owner, now + self.lease_seconds, shard.attempts, shard.shard_id),
+            )
+        return shard
+
+    def renew(self, shard: Shard, owner: str) -> bool:
+        """
+        リースの期限を延長する
+
+        Parameters
+        ----------
+        shard : Shard
+            リースしているシャード
+        owner : str
+            リースしているワーカーの名前
+
+        Returns
+        -------
+        bool
+            延長できればTrue（期限切れで他のワーカーにリースされていればFalse）
+        """
+        with self.__transaction():
+            cursor = self.__conn.execute(
+                "UPDATE shards SET lease_expires_at = ? WHERE shard_id = ? AND owner = ? AND status = 'leased'",
+                (time.time() + self.lease_seconds, shard.shard_id, owner),
+            )
+        return cursor.rowcount == 1
+
+    def complete(self, shard: Shard, owner: str) -> None:
+        """
+        シャードを巡回し終えたことを記録する
+
+        Parameters
+        ----------
+        shard : Shard
+            リースしているシャード
+        owner : str
+            リースしているワーカーの名前
+        """
+        with self.__transaction():
+            self.__conn.execute(
+                "UPDATE shards SET status = 'done', lease_expires_at = NULL WHERE shard_id = ? AND owner = ?",
+                (shard.shard_id, owner),
+            )
+
+    def release(self, shard: Shard, owner: str) -> None:
+        """
+        シャードの巡回に失敗したため、リースを手放して他のワーカーに任せる
+
+        Parameters
+        ----------
+        shard : Shard
+            リースしているシャード
+        owner : str
+            リースしているワーカーの名前
+        """
+        with self.__transaction():
+            self.__conn.execute(
+                "UPDATE shards SET status = 'pending', owner = NULL, lease_expires_at = NULL "
+                "WHERE shard_id = ? AND owner = ? AND status = 'leased'",
+                (shard.shard_id, owner),
+            )
+
+    def claim_articles(self, shard: Shard, urls: Iterable[str]) -> List[str]:
+        """
+        記事をシャードに割り当てる
+
+        他のシャードに割り当て済みの記事と、保存済みの記事は除く。同じシャードを別のワーカーが
+        リースし直した場合は、そのシャードに割り当て済みで未保存の記事も返す
+
+        Parameters
+        ----------
+        shard : Shard
+            リースしているシャード
+        urls : Iterable[str]
+            記事のURL
+
+        Returns
+        -------
+        List[str]
+            このシャードに割り当てられた未保存の記事のURL（順序を保つ）
+        """
+        urls = list(dict.fromkeys(urls))
+        with self.__transaction():
+            self.__conn.executemany(
+                "INSERT OR IGNORE INTO article_claims (url, shard_id) VALUES (?, ?)",
+                ((url, shard.shard_id) for url in urls),
+            )
+            claimed = {
+                row[0]
+                for row in self.__conn.execute(
+                    f"SELECT url FROM article_claims WHERE shard_id = ? AND done = 0 AND url IN ({', '.join('?' * len(urls))})",
+                    [shard.shard_id] + urls,
+                ).fetchall()
+            } if len(urls) > 0 else set()
+        return [url for url in urls if url in claimed]
+
+    def mark_articles_done(self, shard: Shard, urls: Iterable[str]) -> None:
+        """
+        シャードに割り当てた記事を保存したことを記録する
+
+        Parameters
+        ----------
+        shard : Shard
+            リースしているシャード
+        urls : Iterable[str]
+            保存した記事のURL
+        """
+        with self.__transaction():
+            self.__conn.executemany(
+                "UPDATE article_claims SET done = 1 WHERE url = ? AND shard_id = ?",
+                ((url, shard.shard_id) for url in urls),
+            )
+
+    def get_pending_articles(self, shard: Shard) -> List[str]:
+        """
+        シャードに割り当てたが、まだ保存していない記事のURLを取得する
+
+        Parameters
+        ----------
+        shard : Shard
+            リースしているシャード
+
+        Returns
+        -------
+        List[str]
+            未保存の記事のURL
+        """
+        with self.__lock:
+            rows = self.__conn.execute(
+                "SELECT url FROM article_claims WHERE shard_id = ? AND done = 0 ORDER BY rowid", (shard.shard_id,)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def count_claimable(self, site: str, max_attempts: int = 3) -> int:
+        """
+        今またはこれからリースできるシャードの数を取得する
+
+        他のワーカーがリースしているシャードも、そのワーカーが止まって期限が切れればリースできるため数える
+
+        Parameters
+        ----------
+        site : str
+            サイト名
+        max_attempts : int, optional
+            1つのシャードをリースする最大回数, by default 3
+
+        Returns
+        -------
+        int
+            完了しておらず、リースした回数が上限未満のシャードの数
+        """
+        with self.__lock:
+            row = self.__conn.execute(
+                "SELECT COUNT(*) FROM shards WHERE site = ? AND status != 'done' AND attempts < ?",
+                (site, max_attempts),
+            ).fetchone()
+        return row[0]
+
+    def count_remaining(self, site: str) -> int:
+        """
+        完了していないシャードの数を取得する
+
+        Parameters
+        ----------
+        site : str
+            サイト名
+
+        Returns
+        -------
+        int
+            完了していないシャードの数
+        """
+        with self.__lock:
+            row = self.__conn.execute(
+                "SELECT COUNT(*) FROM shards WHERE site = ? AND status != 'done'", (site,)
+            ).fetchone()
+        return row[0]
+
+    def close(self) -> None:
+        """
+        SQLiteファイルを閉じる
+        """
+        with self.__lock:
+            self.__conn.close()
+
+    def __transaction(self) -> "_Transaction":
+        """
+        書き込みロックを取ってトランザクションを始める
+
+        Returns
+        -------
+        _Transaction
+            with 文で使うトランザクション
+        """
+        return _Transaction(self.__conn, self.__lock)
+
+
+class _Transaction(object):
+    """
+    BEGIN IMMEDIATE で始め、例外が無ければコミットするトランザクション
+    """
+
+    def __init__(self, conn: sqlite3.Connection, lock: threading.Lock) -> None:
+        self.__conn = conn
+        self.__lock = lock
+
+    def __enter__(self) -> sqlite3.Connection:
+        self.__lock.acquire()
+        try:
+            self.__conn.execute("BEGIN IMMEDIATE")
+        except Exception:
+            self.__lock.release()
+            raise
+        return self.__conn
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        try:
+            self.__conn.execute("ROLLBACK" if exc_type is not None else "COMMIT")
+        finally:
+            self.__lock.release()
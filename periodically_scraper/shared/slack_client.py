@@ -1,41 +1,106 @@
 import os
+import atexit
+import queue
+import threading
+import time
 import requests
 from http import HTTPStatus
 import json
 import traceback
+from typing import List, Optional, Tuple
 
 
 class SlackClient(object):
     """
     Slackクライアントクラス
+
+    start_background() を呼ぶと非同期モードになり、post_message() はメッセージをキューへ積むだけで
+    すぐに戻る。バックグラウンドのスレッドが一定間隔ごとにキューのメッセージを1つにまとめて送信する
     """
 
-    def __init__(self):
-        """コンストラクタ"""
+    # まとめて送信するメッセージの最大文字数
+    MAX_BATCH_CHARS = 3000
+
+    def __init__(self, timeout: Tuple[float, float] = (5.0, 10.0)):
+        """
+        コンストラクタ
+
+        Parameters
+        ----------
+        timeout : Tuple[float, float], optional
+            (接続タイムアウト, 読み込みタイムアウト) [秒], by default (5.0, 10.0)
+        """
         self.__headers = {
             "Content-Type": "application/json",
             "Authorization": f"Bearer {os.environ['SLACK_BOT_TOKEN']}"
         }
         self.__endpoint = "https://slack.com/api/chat.postMessage"
+        self.__timeout = timeout
+        self.__session = requests.Session()
+        self.__session.headers.update(self.__headers)
+        self.__queue: "queue.Queue[Optional[str]]" = queue.Queue()
+        self.__worker: Optional[threading.Thread] = None
+        self.__interval = 0.0
+
+    def start_background(self, interval: float = 5.0) -> None:
+        """
+        非同期モードを開始する
+
+        Parameters
+        ----------
+        interval : float, optional
+            メッセージをまとめて送信する間隔 [秒], by default 5.0
+        """
+        if self.__worker is not None:
+            return
+        self.__interval = interval
+        self.__worker = threading.Thread(target=self.__run_worker, name="SlackNotifier", daemon=True)
+        self.__worker.start()
+        atexit.register(self.shutdown)
+
+    def shutdown(self) -> None:
+        """
+        キューに残っているメッセージを全て送信してから非同期モードを終了する
+        """
+        worker = self.__worker
+        if worker is None:
+            return
+        self.__queue.put(None)
+        worker.join()
+        self.__worker = None
+
+    def flush(self) -> None:
+        """
+        キューに残っているメッセージが全て送信されるまで待つ
+        """
+        if self.__worker is not None:
+            self.__queue.join()
 
     def post_message(self, text: str) -> None:
         """
         メッセージを送信する関数
 
+        非同期モードではキューへ積むだけで、送信を待たない
+
         Parameters
         ----------
         text : str
             メッセージの文字列
         """
+        if self.__worker is not None:
+            self.__queue.put(text)
+            return
         payload = {
             "channel": os.environ["SLACK_CHANNEL"],
             "text": text,
         }
-        response = requests.post(self.__endpoint, headers=self.__headers, data=json.dumps(payload)).json()
+        self.__post(payload)
 
     def post_error(self):
         """
         エラーを送信するメソッド
+
+        非同期モードでも、キューに残っているメッセージを送信した後に同期的に送信する
         """
         # メッセージブロックのテンプレート
         def error_block_template(traceback_str) -> list: return [
@@ -63,7 +128,91 @@ class SlackClient(object):
             "blocks": error_block_template(traceback_str),
         }
         # 送信
-        response = requests.post(self.__endpoint, headers=self.__headers, data=json.dumps(payload)).json()
+        self.flush()
+        self.__post(payload)
+
+    def __post(self, payload: dict) -> dict:
+        """
+        プールされたセッションでメッセージを送信する
+
+        Parameters
+        ----------
+        payload : dict
+            ペイロード
+
+        Returns
+        -------
+        dict
+            Slack APIのレスポンス
+        """
+        response = self.__session.post(self.__endpoint, data=json.dumps(payload), timeout=self.__timeout)
+        return response.json()
+
+    def __run_worker(self) -> None:
+        """
+        キューのメッセージを一定間隔でまとめて送信するスレッドの処理
+        """
+        stopped = False
+        while not stopped:
+            text = self.__queue.get()
+            if text is None:
+                self.__queue.task_done()
+                break
+            texts = [text]
+
+            # 間隔の間に届いたメッセージを集める
+            deadline = time.monotonic() + self.__interval
+            while True:
+                remaining = deadline - time.monotonic()
+                try:
+                    text = self.__queue.get(timeout=remaining) if remaining > 0 else self.__queue.get_nowait()
+                except queue.Empty:
+                    break
+                if text is None:
+                    stopped = True
+                    self.__queue.task_done()
+                    break
+                texts.append(text)
+
+            for batch in self.__split_batches(texts):
+                try:
+                    self.__post({
+                        "channel": os.environ["SLACK_CHANNEL"],
+                        "text": batch,
+                    })
+                except Exception:
+                    # 通知に失敗してもスクレイピングは止めない
+                    traceback.print_exc()
+            for _ in texts:
+                self.__queue.task_done()
+
+    def __split_batches(self, texts: List[str]) -> List[str]:
+        """
+        メッセージを MAX_BATCH_CHARS 以下のまとまりに分割して連結する
+
+        Parameters
+        ----------
+        texts : List[str]
+            メッセージのリスト
+
+        Returns
+        -------
+        List[str]
+            改行で連結したメッセージのリスト
+        """
+        batches = []
+        batch: List[str] = []
+        batch_chars = 0
+        for text in texts:
+            if len(batch) > 0 and batch_chars + len(text) + 1 > self.MAX_BATCH_CHARS:
+                batches.append("\n".join(batch))
+                batch = []
+                batch_chars = 0
+            batch.append(text)
+            batch_chars += len(text) + 1
+        if len(batch) > 0:
+            batches.append("\n".join(batch))
+        return batches
 
 
 # インスタンス化
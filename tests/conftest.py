@@ -0,0 +1,5 @@
+import os
+
+# slack_client はインポート時にトークンを読み込むため、未設定の環境ではダミー値を入れておく
+os.environ.setdefault("SLACK_BOT_TOKEN", "dummy")
+os.environ.setdefault("SLACK_CHANNEL", "dummy")
@@ -0,0 +1,41 @@
+import pytest
+
+from periodically_scraper.shared.codec.article_codec_registry import get_article_codec, split_codec_suffix
+from periodically_scraper.shared.codec.gzip_article_codec import GzipArticleCodec
+from periodically_scraper.shared.codec.zstd_article_codec import ZstdArticleCodec
+from periodically_scraper.shared.const import codec_type
+
+
+def test_gzip_codec_is_deterministic():
+    """同じ記事が同じバイト列に圧縮されることのテスト"""
+    codec = GzipArticleCodec()
+    html = "<main>" + "<div class=\"item\">記事</div>" * 100 + "</main>"
+
+    data = codec.encode(html)
+
+    assert data == codec.encode(html)
+    assert len(data) < len(html.encode()) / 10
+    assert codec.decode(data) == html
+
+
+@pytest.mark.parametrize("filename, original, name", [
+    ("https://www.example.com/a/1", "https://www.example.com/a/1", codec_type.NONE),
+    ("https://www.example.com/a/1.gz", "https://www.example.com/a/1", codec_type.GZIP),
+    ("https://www.example.com/a/1.zst", "https://www.example.com/a/1", codec_type.ZSTD),
+])
+def test_split_codec_suffix(filename, original, name):
+    """split_codec_suffix() のテスト"""
+    filename_without_suffix, codec = split_codec_suffix(filename)
+
+    assert filename_without_suffix == original
+    assert codec.name == name
+
+
+def test_get_article_codec():
+    """get_article_codec() のテスト"""
+    assert get_article_codec(codec_type.GZIP).name == codec_type.GZIP
+    with pytest.raises(ValueError):
+        get_article_codec("unknown")
+    if not ZstdArticleCodec.is_available():
+        with pytest.raises(ValueError):
+            get_article_codec(codec_type.ZSTD)
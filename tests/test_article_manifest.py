@@ -0,0 +1,103 @@
+import sqlite3
+
+import pytest
+
+from periodically_scraper.shared.repository.article_manifest import ArticleManifest, ManifestRecord
+
+
+def test_add_and_get(tmp_path):
+    """add(), get() のテスト"""
+    manifest = ArticleManifest(str(tmp_path / "manifest.sqlite3"))
+
+    manifest.add(ManifestRecord("https://www.example.com/a/1", "id-1", 10, "hash-1"))
+
+    record = manifest.get("https://www.example.com/a/1")
+    assert record[:4] == ("https://www.example.com/a/1", "id-1", 10, "hash-1")
+    assert record.saved_at is not None
+    assert manifest.contains("https://www.example.com/a/1")
+    assert not manifest.contains("https://www.example.com/a/2")
+
+
+def test_persistence(tmp_path):
+    """SQLiteファイルに永続化されることのテスト"""
+    db_path = str(tmp_path / "manifest.sqlite3")
+    manifest = ArticleManifest(db_path)
+    manifest.add(ManifestRecord("https://www.example.com/a/1", "id-1"))
+    manifest.close()
+
+    assert ArticleManifest(db_path).get_urls() == ["https://www.example.com/a/1"]
+
+
+def test_reconcile(tmp_path):
+    """reconcile() のテスト"""
+    manifest = ArticleManifest(str(tmp_path / "manifest.sqlite3"))
+    manifest.add(ManifestRecord("https://www.example.com/a/1", "id-1", 10, "hash-1"))
+    manifest.add(ManifestRecord("https://www.example.com/a/2", "id-2", 20, "hash-2"))
+    assert not manifest.is_reconciled()
+
+    manifest.reconcile([
+        ManifestRecord("https://www.example.com/a/1", "id-1", 10),
+        ManifestRecord("https://www.example.com/a/3", "id-3", 30),
+    ])
+
+    assert manifest.is_reconciled()
+    assert sorted(manifest.get_urls()) == ["https://www.example.com/a/1", "https://www.example.com/a/3"]
+    # 保存先の列挙で得られないハッシュは残す
+    assert manifest.get("https://www.example.com/a/1").content_hash == "hash-1"
+
+
+def test_scope(tmp_path):
+    """保存先ごとに scope を分けて記録・突き合わせできることのテスト"""
+    db_path = str(tmp_path / "manifest.sqlite3")
+    manifest_a = ArticleManifest(db_path, scope="folder-a")
+    manifest_b = ArticleManifest(db_path, scope="folder-b")
+    manifest_a.add(ManifestRecord("https://a.example.com/1", "id-a1", 10, "hash-1"))
+    manifest_b.reconcile([ManifestRecord("https://b.example.com/1", "id-b1", 20)])
+
+    # 他の scope の記録は見えず、突き合わせても消えない
+    assert manifest_a.contains_many(["https://a.example.com/1", "https://b.example.com/1"]) == {"https://a.example.com/1"}
+    assert manifest_b.get_urls() == ["https://b.example.com/1"]
+    assert manifest_a.find_by_content_hash("hash-1") is not None
+    assert manifest_b.find_by_content_hash("hash-1") is None
+    assert manifest_b.is_reconciled()
+    assert not manifest_a.is_reconciled()
+
+    manifest_a.reconcile([ManifestRecord("https://a.example.com/1", "id-a1", 10)])
+
+    assert manifest_a.get_urls() == ["https://a.example.com/1"]
+    assert manifest_b.get_urls() == ["https://b.example.com/1"]
+
+
+@pytest.mark.parametrize("scope_column", ["", "scope TEXT NOT NULL DEFAULT '', "], ids=["no_scope", "url_primary_key"])
+def test_migrate_manifest_without_scope(tmp_path, scope_column):
+    """url だけが主キーだった頃のSQLiteファイルを、scope ごとに記録できるように移行することのテスト"""
+    db_path = str(tmp_path / "manifest.sqlite3")
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        f"CREATE TABLE articles ({scope_column}url TEXT PRIMARY KEY, storage_id TEXT NOT NULL, size INTEGER, "
+        "content_hash TEXT, saved_at TEXT NOT NULL)"
+    )
+    conn.execute(
+        "INSERT INTO articles (url, storage_id, size, content_hash, saved_at) "
+        "VALUES ('https://www.example.com/a/1', 'id-1', 10, 'hash-1', 'now')"
+    )
+    conn.commit()
+    conn.close()
+
+    manifest = ArticleManifest(db_path)
+    manifest_a = ArticleManifest(db_path, scope="folder-a")
+
+    assert manifest.get("https://www.example.com/a/1") == ("https://www.example.com/a/1", "id-1", 10, "hash-1", "now")
+    assert not manifest_a.contains("https://www.example.com/a/1")
+
+    # 他の scope に同じURLの記録があっても、追加・突き合わせで消さない
+    manifest_a.add(ManifestRecord("https://www.example.com/a/1", "id-a1", 20, "hash-a1"))
+    manifest_a.reconcile([
+        ManifestRecord("https://www.example.com/a/1", "id-a1", 20),
+        ManifestRecord("https://www.example.com/a/2", "id-a2", 30),
+    ])
+
+    assert manifest.get("https://www.example.com/a/1").storage_id == "id-1"
+    assert manifest.get_urls() == ["https://www.example.com/a/1"]
+    assert manifest_a.get("https://www.example.com/a/1").storage_id == "id-a1"
+    assert sorted(manifest_a.get_urls()) == ["https://www.example.com/a/1", "https://www.example.com/a/2"]
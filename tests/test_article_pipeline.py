@@ -0,0 +1,57 @@
+import threading
+from http import HTTPStatus
+
+import pytest
+
+from periodically_scraper.shared.article_pipeline import ArticlePipeline
+
+
+def fetch(url: str):
+    """テスト用の取得関数"""
+    if url.endswith("404"):
+        return "", HTTPStatus.NOT_FOUND
+    return f"<html>{url}</html>", HTTPStatus.OK
+
+
+def test_run():
+    """全ての記事を取得・解析・保存することのテスト"""
+    saved = []
+    failures = []
+    with ArticlePipeline(fetch, str.upper, saved.extend, lambda url, status: failures.append((url, status)), queue_size=2, save_batch_size=3) as pipeline:
+        pipeline.run([f"u{i}" for i in range(10)] + ["u404"])
+
+    assert sorted(saved) == sorted((f"<HTML>U{i}</HTML>", f"u{i}") for i in range(10))
+    assert failures == [("u404", HTTPStatus.NOT_FOUND)]
+
+
+def test_backpressure():
+    """保存が詰まっている間、取得がキューの上限を超えて先行しないことのテスト"""
+    release = threading.Event()
+    fetched = []
+
+    def tracking_fetch(url):
+        fetched.append(url)
+        return fetch(url)
+
+    def slow_save(batch):
+        release.wait(timeout=5)
+
+    pipeline = ArticlePipeline(tracking_fetch, None, slow_save, lambda url, status: None, fetch_workers=1, queue_size=2, save_batch_size=1)
+    thread = threading.Thread(target=pipeline.run, args=([f"u{i}" for i in range(20)],))
+    thread.start()
+    thread.join(timeout=0.5)
+    # 保存中の1件 + キューの2件 + キューへの追加を待っている1件まで
+    assert len(fetched) <= 4
+    release.set()
+    thread.join()
+    assert len(fetched) == 20
+
+
+def test_run_raise_error():
+    """保存で発生した例外を最後に送出することのテスト"""
+    def save(batch):
+        raise OSError("error")
+
+    pipeline = ArticlePipeline(fetch, None, save, lambda url, status: None)
+    with pytest.raises(OSError):
+        pipeline.run(["u1", "u2"])
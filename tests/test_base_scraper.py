@@ -0,0 +1,298 @@
+from http import HTTPStatus
+
+import pytest
+
+from periodically_scraper.services.base_scraper import BaseScraper
+from periodically_scraper.services.site_config import SiteConfig
+from periodically_scraper.shared.crawl_checkpoint import CrawlCheckpoint
+from periodically_scraper.shared.shard_lease_table import ShardLeaseTable
+
+SITE = SiteConfig(
+    name="news_site_2",
+    base_url="https://news-site-2.example.com",
+    list_page_url_template="{base_url}/list?p={page_count}",
+    article_selector="ul.articles > li",
+    article_link_selector="a.title",
+    last_page_link_selector="nav .last",
+    page_count_pos=-1,
+)
+
+
+def list_page_html(article_hrefs: list, last_page_count: int) -> str:
+    """記事一覧ページのHTMLを作成する"""
+    articles = "".join(f'<li><a class="thumb" href="#">img</a><a class="title" href="{href}">title</a></li>' for href in article_hrefs)
+    return (
+        "<html><body>"
+        f'<ul class="articles">{articles}</ul>'
+        f'<nav><a class="last" href="/list/{last_page_count}">last</a></nav>'
+        "</body></html>"
+    )
+
+
+@pytest.fixture
+def fixture_scraper(mocker):
+    """BaseScraper のfixture"""
+    mocker.patch("periodically_scraper.services.base_scraper.slack")
+    pages = {
+        f"{SITE.base_url}/list?p=1": list_page_html(["/news/1", "https://news-site-2.example.com/news/2"], 2),
+        f"{SITE.base_url}/list?p=2": list_page_html(["news/3"], 2),
+    }
+    fetcher = mocker.Mock()
+    fetcher.get_html.side_effect = lambda url, **kwargs: (
+        (pages[url], HTTPStatus.OK) if url in pages else (f"<main>{url}</main>", HTTPStatus.OK)
+    )
+    storage_repository = mocker.Mock()
+    storage_repository.contains_many.side_effect = lambda urls: set()
+    storage_repository.save_articles.return_value = []
+    return BaseScraper(SITE, mocker.Mock(), storage_repository, fetcher), storage_repository
+
+
+def test_execute_with_site_config(fixture_scraper):
+    """サイトの設定に従って巡回することのテスト"""
+    scraper, storage_repository = fixture_scraper
+
+    scraper.execute()
+
+    assert [url for call in storage_repository.save_articles.call_args_list for _, url in call[0][0]] == [
+        f"{SITE.base_url}/news/1",
+        f"{SITE.base_url}/news/2",
+        f"{SITE.base_url}/news/3",
+    ]
+
+
+def make_site_pages(n_pages: int, per_page: int = 2) -> dict:
+    """記事一覧ページ（新しい順に n_pages × per_page 件の記事）を作成する"""
+    return {
+        f"{SITE.base_url}/list?p={page}": list_page_html(
+            [f"/news/{n_pages * per_page - (page - 1) * per_page - i}" for i in range(per_page)], n_pages
+        )
+        for page in range(1, n_pages + 1)
+    }
+
+
+@pytest.fixture
+def fixture_archive(mocker):
+    """1〜saved_pages ページの記事が保存済みのサイトのfixture"""
+    mocker.patch("periodically_scraper.services.base_scraper.slack")
+
+    def create(n_pages: int, saved_pages: int):
+        pages = make_site_pages(n_pages)
+        saved_urls = {
+            f"{SITE.base_url}/news/{n}" for n in range(n_pages * 2, n_pages * 2 - saved_pages * 2, -1)
+        }
+        fetcher = mocker.Mock()
+        fetcher.get_html.side_effect = lambda url, **kwargs: (
+            (pages[url], HTTPStatus.OK) if url in pages else (f"<main>{url}</main>", HTTPStatus.OK)
+        )
+        storage_repository = mocker.Mock()
+        storage_repository.contains_many.side_effect = lambda urls: {url for url in urls if url in saved_urls}
+        storage_repository.save_articles.return_value = []
+        return fetcher, storage_repository
+
+    return create
+
+
+@pytest.mark.parametrize("saved_pages", [0, 1, 37, 99, 100])
+def test_backfill_binary_search(fixture_archive, mocker, saved_pages):
+    """バックフィルで境界のページを O(log ページ数) の取得で見つけることのテスト"""
+    fetcher, storage_repository = fixture_archive(100, saved_pages)
+    scraper = BaseScraper(SITE, mocker.Mock(), storage_repository, fetcher, backfill=True)
+
+    start_page = scraper._find_backfill_start_page(100, {})
+
+    assert start_page == max(saved_pages, 1)
+    assert fetcher.get_html.call_count <= 8
+
+
+def test_backfill_execute(fixture_archive, mocker):
+    """バックフィルで境界のページから最終ページまで保存することのテスト"""
+    fetcher, storage_repository = fixture_archive(10, 4)
+    scraper = BaseScraper(SITE, mocker.Mock(), storage_repository, fetcher, backfill=True)
+
+    scraper.execute()
+
+    saved = [url for call in storage_repository.save_articles.call_args_list for _, url in call[0][0]]
+    assert saved == [f"{SITE.base_url}/news/{n}" for n in range(12, 0, -1)]
+    list_page_urls = [call[0][0] for call in fetcher.get_html.call_args_list if "/list?" in call[0][0]]
+    # 探索で取得したページは巡回で取得し直さない
+    assert len(list_page_urls) == len(set(list_page_urls))
+
+
+def test_high_water_mark(fixture_archive, mocker, tmp_path):
+    """ハイウォーターマークが載っているページで巡回を止めることのテスト"""
+    # ハイウォーターマークより古い記事が1件だけ未保存（取得に失敗し続けている記事など）
+    fetcher, storage_repository = fixture_archive(5, 0)
+    saved_urls = {f"{SITE.base_url}/news/{n}" for n in range(1, 11) if n != 9}
+    storage_repository.contains_many.side_effect = lambda urls: {url for url in urls if url in saved_urls}
+    checkpoint = CrawlCheckpoint(str(tmp_path / "news_site_2.json"))
+    checkpoint.finish(f"{SITE.base_url}/news/10")
+    # 前回の実行の後に2件の記事が追加された
+    new_pages = make_site_pages(6)
+    fetcher.get_html.side_effect = lambda url, **kwargs: (
+        (new_pages[url], HTTPStatus.OK) if url in new_pages else (f"<main>{url}</main>", HTTPStatus.OK)
+    )
+    scraper = BaseScraper(SITE, mocker.Mock(), storage_repository, fetcher, checkpoint=checkpoint)
+
+    scraper.execute()
+
+    saved = [url for call in storage_repository.save_articles.call_args_list for _, url in call[0][0]]
+    assert saved == [f"{SITE.base_url}/news/12", f"{SITE.base_url}/news/11"]
+    list_page_urls = [call[0][0] for call in fetcher.get_html.call_args_list if "/list?" in call[0][0]]
+    assert list_page_urls == [f"{SITE.base_url}/list?p=1", f"{SITE.base_url}/list?p=2"]
+    assert CrawlCheckpoint(checkpoint.path).high_water_mark == f"{SITE.base_url}/news/12"
+
+
+@pytest.fixture
+def fixture_flaky_site(mocker):
+    """記事本文ページの取得に失敗することがある、2ページ（4件）のサイトのfixture"""
+    mocker.patch("periodically_scraper.services.base_scraper.slack")
+    pages = make_site_pages(2)
+    unavailable_urls = set()
+    saved_urls = set()
+    fetcher = mocker.Mock()
+    fetcher.get_html.side_effect = lambda url, **kwargs: (
+        (pages[url], HTTPStatus.OK) if url in pages
+        else ("", HTTPStatus.SERVICE_UNAVAILABLE) if url in unavailable_urls
+        else (f"<main>{url}</main>", HTTPStatus.OK)
+    )
+    storage_repository = mocker.Mock()
+    storage_repository.contains_many.side_effect = lambda urls: {url for url in urls if url in saved_urls}
+    storage_repository.save_articles.side_effect = lambda articles: saved_urls.update(url for _, url in articles) or []
+    return fetcher, storage_repository, unavailable_urls, saved_urls
+
+
+@pytest.mark.parametrize("failed_article", [4, 2])
+def test_high_water_mark_after_failure(fixture_flaky_site, mocker, tmp_path, failed_article):
+    """取得に失敗した記事を、次回の実行で取得し直すことのテスト（最新の記事、古い記事のどちらが失敗しても）"""
+    fetcher, storage_repository, unavailable_urls, saved_urls = fixture_flaky_site
+    failed_url = f"{SITE.base_url}/news/{failed_article}"
+    checkpoint_path = str(tmp_path / "news_site_2.json")
+    unavailable_urls.add(failed_url)
+
+    BaseScraper(SITE, mocker.Mock(), storage_repository, fetcher, checkpoint=CrawlCheckpoint(checkpoint_path)).execute()
+
+    assert failed_url not in saved_urls
+    # ハイウォーターマークは実際に保存できた最新の記事
+    expected_mark = f"{SITE.base_url}/news/{3 if failed_article == 4 else 4}"
+    assert CrawlCheckpoint(checkpoint_path).high_water_mark == expected_mark
+
+    # 次回の実行では取得できる
+    unavailable_urls.clear()
+    BaseScraper(SITE, mocker.Mock(), storage_repository, fetcher, checkpoint=CrawlCheckpoint(checkpoint_path)).execute()
+
+    assert saved_urls == {f"{SITE.base_url}/news/{n}" for n in range(1, 5)}
+    checkpoint = CrawlCheckpoint(checkpoint_path)
+    assert checkpoint.high_water_mark == f"{SITE.base_url}/news/4"
+    assert checkpoint.failed_attempts == {}
+
+
+def test_execute_shards(mocker, tmp_path):
+    """ワーカーがシャードを分け合って巡回し、同じ記事を重複して保存しないことのテスト"""
+    mocker.patch("periodically_scraper.services.base_scraper.slack")
+    # 3ページ目と4ページ目の境界の記事が、巡回中にずれて両方のページに載っている
+    pages = {
+        f"{SITE.base_url}/list?p={page_count}": list_page_html(hrefs, 4)
+        for page_count, hrefs in {1: ["/news/1"], 2: ["/news/2"], 3: ["/news/3"], 4: ["/news/3", "/news/4"]}.items()
+    }
+    lease_table = ShardLeaseTable(str(tmp_path / "lease.sqlite3"))
+    saved_urls = []
+
+    def create_scraper():
+        fetcher = mocker.Mock()
+        fetcher.get_html.side_effect = lambda url, **kwargs: (
+            (pages[url], HTTPStatus.OK) if url in pages else (f"<main>{url}</main>", HTTPStatus.OK)
+        )
+        storage_repository = mocker.Mock()
+        storage_repository.contains_many.side_effect = lambda urls: set(urls) & set(saved_urls)
+        storage_repository.save_articles.side_effect = lambda articles: saved_urls.extend(url for _, url in articles) or []
+        return BaseScraper(SITE, mocker.Mock(), storage_repository, fetcher)
+
+    # 1つ目のワーカーは最初のシャードを巡回した後、停止したとする
+    worker_1 = create_scraper()
+    lease_table.create_shards(SITE.name, 4, 2)
+    shard = lease_table.claim(SITE.name, "worker-1")
+    assert worker_1._crawl_shard(shard, lease_table, "worker-1")
+    lease_table.complete(shard, "worker-1")
+
+    create_scraper().execute_shards(lease_table, "worker-2", 2)
+
+    assert saved_urls == [f"{SITE.base_url}/news/{i}" for i in range(1, 5)]
+    assert lease_table.count_remaining(SITE.name) == 0
+
+
+def test_execute_shards_releases_failed_shard(mocker, tmp_path):
+    """記事一覧ページの取得に失敗したシャードは、他のワーカーに任せることのテスト"""
+    mocker.patch("periodically_scraper.services.base_scraper.slack")
+    fetcher = mocker.Mock()
+    fetcher.get_html.side_effect = lambda url, **kwargs: (
+        (list_page_html(["/news/1"], 2), HTTPStatus.OK) if url.endswith("p=1")
+        else (None, HTTPStatus.NOT_FOUND) if url.endswith("p=2")
+        else (f"<main>{url}</main>", HTTPStatus.OK)
+    )
+    storage_repository = mocker.Mock()
+    storage_repository.contains_many.side_effect = lambda urls: set()
+    storage_repository.save_articles.return_value = []
+    lease_table = ShardLeaseTable(str(tmp_path / "lease.sqlite3"))
+
+    BaseScraper(SITE, mocker.Mock(), storage_repository, fetcher, max_attempts=2).execute_shards(lease_table, "worker-1", 1)
+
+    # 2ページ目のシャードは最大回数まで試して諦める
+    assert lease_table.count_remaining(SITE.name) == 1
+    assert lease_table.claim(SITE.name, "worker-2", max_attempts=2) is None
+
+
+def test_execute_shards_retries_failed_articles(mocker, tmp_path):
+    """保存できなかった記事が残るシャードは完了にせず、次にリースしたときに取得し直すことのテスト"""
+    mocker.patch("periodically_scraper.services.base_scraper.slack")
+    unavailable_urls = {f"{SITE.base_url}/news/2"}
+    saved_urls = []
+    fetcher = mocker.Mock()
+    fetcher.get_html.side_effect = lambda url, **kwargs: (
+        (list_page_html(["/news/2", "/news/1"], 1), HTTPStatus.OK) if "/list?" in url
+        else ("", HTTPStatus.SERVICE_UNAVAILABLE) if url in unavailable_urls
+        else (f"<main>{url}</main>", HTTPStatus.OK)
+    )
+    storage_repository = mocker.Mock()
+    storage_repository.contains_many.side_effect = lambda urls: set(urls) & set(saved_urls)
+    storage_repository.save_articles.side_effect = lambda articles: saved_urls.extend(url for _, url in articles) or []
+    lease_table = ShardLeaseTable(str(tmp_path / "lease.sqlite3"))
+    lease_table.create_shards(SITE.name, 1, 1)
+    scraper = BaseScraper(SITE, mocker.Mock(), storage_repository, fetcher)
+
+    shard = lease_table.claim(SITE.name, "worker-1")
+    with pytest.raises(Exception):
+        scraper._crawl_shard(shard, lease_table, "worker-1")
+    lease_table.release(shard, "worker-1")
+    assert lease_table.get_pending_articles(shard) == [f"{SITE.base_url}/news/2"]
+
+    unavailable_urls.clear()
+    scraper.execute_shards(lease_table, "worker-2", 1)
+
+    assert saved_urls == [f"{SITE.base_url}/news/1", f"{SITE.base_url}/news/2"]
+    assert lease_table.count_remaining(SITE.name) == 0
+
+
+def test_execute_shards_takes_over_expired_lease(mocker, tmp_path):
+    """他のワーカーが止まってリースの期限が切れたシャードを、待っていたワーカーが引き継ぐことのテスト"""
+    mocker.patch("periodically_scraper.services.base_scraper.slack")
+    pages = make_site_pages(2, per_page=1)
+    fetcher = mocker.Mock()
+    fetcher.get_html.side_effect = lambda url, **kwargs: (
+        (pages[url], HTTPStatus.OK) if url in pages else (f"<main>{url}</main>", HTTPStatus.OK)
+    )
+    storage_repository = mocker.Mock()
+    storage_repository.contains_many.side_effect = lambda urls: set()
+    storage_repository.save_articles.return_value = []
+    db_path = str(tmp_path / "lease.sqlite3")
+    # 1つ目のワーカーは1ページ目のシャードをリースしたまま止まった
+    stopped_table = ShardLeaseTable(db_path, lease_seconds=0.2)
+    stopped_table.create_shards(SITE.name, 2, 1)
+    stopped_table.claim(SITE.name, "worker-1")
+
+    BaseScraper(SITE, mocker.Mock(), storage_repository, fetcher).execute_shards(
+        ShardLeaseTable(db_path), "worker-2", 1, poll_interval=0.05
+    )
+
+    saved = {url for call in storage_repository.save_articles.call_args_list for _, url in call[0][0]}
+    assert saved == {f"{SITE.base_url}/news/1", f"{SITE.base_url}/news/2"}
+    assert stopped_table.count_remaining(SITE.name) == 0
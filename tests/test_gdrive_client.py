@@ -172,3 +172,83 @@ def test_update_file(fixture_test_update_file):
     with open(str(output_path), "r") as f:
         output_content = f.read()
     assert file.GetContentString() == update_text, "ファイル内容が一致しません"
+
+
+def test_iter_file():
+    """iter_file() のテスト"""
+    # テストしたい処理を実行（list_file() と同じフォルダを1件ずつ取得する）
+    gdrive = GDriveClient()
+    test_list_file_folder_id = get_target_test_folder_id(gdrive, __name__, test_list_file.__name__)
+    result = [file["title"] for file in gdrive.iter_file(f"'{test_list_file_folder_id}' in parents", page_size=1)]
+
+    # 比較
+    with open(f"{os.environ['WORKING_DIR']}/tests/cases/gdrive_client/list_file/output.txt", "r") as f:
+        output = f.read().splitlines()
+    assert result == output, "処理結果が一致しません"
+
+
+def test_iter_file_stop_early(mocker):
+    """iter_file() が必要なページだけを取得することのテスト"""
+    gdrive = GDriveClient.__new__(GDriveClient)
+    gdrive.drive = mocker.Mock()
+    pages = iter([[{"title": "1"}, {"title": "2"}], [{"title": "3"}]])
+    gdrive.drive.ListFile.return_value = mocker.MagicMock(__iter__=lambda self: pages)
+
+    file = next(gdrive.iter_file("'folder' in parents", page_size=2, fields="title"))
+
+    assert file == {"title": "1"}
+    gdrive.drive.ListFile.assert_called_once_with({
+        "q": "'folder' in parents and trashed = False",
+        "maxResults": 2,
+        "fields": "nextPageToken,items(title)",
+    })
+    assert next(pages) == [{"title": "3"}], "不要なページまで取得しています"
+
+
+@pytest.fixture
+def fixture_offline_gdrive(mocker):
+    """認証せずに Drive API をモックした GDriveClient のFixture"""
+    gdrive = GDriveClient.__new__(GDriveClient)
+    gdrive.drive = mocker.Mock()
+    mocker.patch("periodically_scraper.shared.gdrive_client.time.sleep")
+    return gdrive, gdrive.drive.auth.service.files.return_value.insert
+
+
+def test_upload_file_single_request(fixture_offline_gdrive, tmp_path):
+    """upload_file() がファイル名を最初のリクエストで設定することのテスト"""
+    gdrive, insert = fixture_offline_gdrive
+    insert.return_value.execute.return_value = {"id": "file-id", "title": "output.txt"}
+    file_path = tmp_path / "output.txt"
+    file_path.write_text("test")
+
+    file = gdrive.upload_file(str(file_path), "folder-id")
+
+    assert file["title"] == "output.txt"
+    assert insert.call_args[1]["body"] == {
+        "title": "output.txt",
+        "mimeType": "text/plain",
+        "parents": [{"id": "folder-id"}],
+    }
+    assert not insert.call_args[1]["media_body"].resumable()
+    insert.return_value.execute.assert_called_once()
+    gdrive.drive.CreateFile.assert_not_called()
+
+
+def test_upload_file_resumable(fixture_offline_gdrive, tmp_path, mocker):
+    """大きなファイルは接続が切れても再開してアップロードすることのテスト"""
+    gdrive, insert = fixture_offline_gdrive
+    mocker.patch.object(GDriveClient, "RESUMABLE_THRESHOLD", 4)
+    insert.return_value.next_chunk.side_effect = [
+        (mocker.Mock(), None),
+        ConnectionResetError(),
+        (mocker.Mock(), None),
+        (None, {"id": "file-id", "title": "output.bin"}),
+    ]
+    file_path = tmp_path / "output.bin"
+    file_path.write_bytes(b"0" * 1024 * 1024)
+
+    file = gdrive.upload_file(str(file_path), "folder-id", chunk_size=256 * 1024)
+
+    assert file["title"] == "output.bin"
+    assert insert.call_args[1]["media_body"].resumable()
+    assert insert.return_value.next_chunk.call_count == 4
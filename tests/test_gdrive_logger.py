@@ -1,4 +1,5 @@
 import os
+import time
 from pathlib import Path
 
 import pytest
@@ -92,3 +93,86 @@ def test_error(fixture_error):
     file, logged_text = fixture_error
 
     assert file.GetContentString().split()[-1] == logged_text, "書き込まれたメッセージが一致しません"
+
+
+@pytest.fixture
+def fixture_buffered_logger(mocker, monkeypatch, tmp_path):
+    """バッファリングモードの GDriveLogger のFixture"""
+    # 作業ディレクトリをテスト用に差し替える
+    working_dir = Path(__file__).parents[1]
+    (tmp_path / "log_config.json").write_text((working_dir / "log_config.json").read_text())
+    monkeypatch.setenv("WORKING_DIR", str(tmp_path))
+    monkeypatch.chdir(tmp_path)
+
+    gdrive = mocker.Mock()
+    gdrive.create_file.return_value = {"id": "log-file-id"}
+    return gdrive
+
+
+def test_buffered_info(fixture_buffered_logger):
+    """バッファリングモードでは info() のたびにアップロードしないことのテスト"""
+    gdrive = fixture_buffered_logger
+    logger = GDriveLogger(gdrive, "log-folder-id", flush_interval=3600)
+    logger.initialize()
+
+    for i in range(10):
+        assert logger.info(f"test{i}") is None
+    gdrive.update_file.assert_not_called()
+
+    # 終了時にまとめて反映する
+    logger.close()
+    gdrive.update_file.assert_called_once()
+    file_id, content = gdrive.update_file.call_args[0]
+    assert file_id == "log-file-id"
+    assert content.split()[-1] == "test9"
+
+
+def test_buffered_flush_bytes(fixture_buffered_logger):
+    """未反映のログの量が閾値を超えたら反映することのテスト"""
+    gdrive = fixture_buffered_logger
+    logger = GDriveLogger(gdrive, "log-folder-id", flush_interval=3600, flush_bytes=10)
+    logger.initialize()
+
+    logger.info("a" * 10)
+
+    for _ in range(100):
+        if gdrive.update_file.called:
+            break
+        time.sleep(0.01)
+    gdrive.update_file.assert_called_once()
+    logger.close()
+
+
+def test_segmented_flush(fixture_buffered_logger, mocker):
+    """セグメントモードでは新しい行だけをセグメントとしてアップロードすることのテスト"""
+    gdrive = fixture_buffered_logger
+    created = []
+
+    def create_file(contents, file_name, mimeType, folder_id):
+        file = mocker.MagicMock()
+        file.__getitem__.side_effect = {"id": f"id-{len(created)}", "title": file_name}.__getitem__
+        file.GetContentString.return_value = contents
+        created.append(file)
+        return file
+    gdrive.create_file.side_effect = create_file
+
+    logger = GDriveLogger(gdrive, "log-folder-id", flush_interval=3600, segment_max_bytes=200)
+    assert logger.initialize("run.log") is None
+    logger.info("first")
+    logger.flush()
+    for i in range(5):
+        logger.info(f"second{i}")
+    logger.close()
+
+    titles = [file["title"] for file in created]
+    assert titles[0] == "run.log.00000"
+    assert len(titles) > 2, "サイズでロールオーバーしていません"
+    assert titles == [f"run.log.{i:05d}" for i in range(len(titles))]
+    assert created[0].GetContentString().split()[-1] == "first"
+    assert all(len(file.GetContentString().encode()) <= 200 for file in created)
+    gdrive.update_file.assert_not_called()
+
+    # セグメントを順番に連結して読み込む
+    gdrive.list_file.return_value = list(reversed(created))
+    log_content = GDriveLogger.read_segments(gdrive, "log-folder-id", "run.log")
+    assert [line.split()[-1] for line in log_content.splitlines()] == ["first"] + [f"second{i}" for i in range(5)]
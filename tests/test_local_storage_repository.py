@@ -0,0 +1,179 @@
+import pytest
+
+from periodically_scraper.shared.codec.gzip_article_codec import GzipArticleCodec
+from periodically_scraper.shared.codec.plain_article_codec import PlainArticleCodec
+from periodically_scraper.shared.codec.zstd_article_codec import ZstdArticleCodec
+from periodically_scraper.shared.repository.article_manifest import ArticleManifest
+from periodically_scraper.shared.repository.local_storage_repository import LocalStorageRepository
+
+
+def test_save_article(tmp_path):
+    """save_article() のテスト"""
+    storage_repository = LocalStorageRepository(str(tmp_path))
+
+    storage_repository.save_article("<main></main>", "https://www.example.com/a/1")
+
+    assert (tmp_path / "https[COLON][SLASH][SLASH]www.example.com[SLASH]a[SLASH]1").read_text() == "<main></main>"
+    assert storage_repository.get_saved_article_urls() == ["https://www.example.com/a/1"]
+
+
+def test_get_saved_article_urls_with_manifest(tmp_path, mocker):
+    """マニフェストがある場合の get_saved_article_urls() のテスト"""
+    save_folder = tmp_path / "html"
+    save_folder.mkdir()
+    (save_folder / "https[COLON][SLASH][SLASH]www.example.com[SLASH]a[SLASH]0").write_text("<main></main>")
+    manifest = ArticleManifest(str(tmp_path / "manifest.sqlite3"))
+    storage_repository = LocalStorageRepository(str(save_folder), manifest)
+
+    # 初回は保存先と突き合わせる
+    assert storage_repository.get_saved_article_urls() == ["https://www.example.com/a/0"]
+
+    # 2回目以降は保存先を列挙しない
+    list_saved_articles = mocker.spy(storage_repository, "_list_saved_articles")
+    storage_repository.save_article("<main>1</main>", "https://www.example.com/a/1")
+    assert sorted(storage_repository.get_saved_article_urls()) == [
+        "https://www.example.com/a/0",
+        "https://www.example.com/a/1",
+    ]
+    list_saved_articles.assert_not_called()
+    assert manifest.get("https://www.example.com/a/1").size == len("<main>1</main>")
+
+
+def test_save_articles(tmp_path):
+    """save_articles() のテスト"""
+    storage_repository = LocalStorageRepository(str(tmp_path / "not_exists"))
+
+    failures = storage_repository.save_articles([("<main></main>", "https://www.example.com/a/1")])
+
+    assert [filename for filename, _ in failures] == ["https://www.example.com/a/1"]
+    assert isinstance(failures[0][1], OSError)
+
+
+@pytest.mark.parametrize("codec", [
+    PlainArticleCodec(),
+    GzipArticleCodec(),
+    pytest.param(ZstdArticleCodec(), marks=pytest.mark.skipif(not ZstdArticleCodec.is_available(), reason="zstandard is not installed")),
+])
+def test_save_and_load_article_with_codec(tmp_path, codec):
+    """コーデックを指定した場合の save_article() と load_article() のテスト"""
+    storage_repository = LocalStorageRepository(str(tmp_path), codec=codec)
+    html = "<main>" + "<p>記事</p>" * 100 + "</main>"
+
+    storage_repository.save_article(html, "https://www.example.com/a/1")
+
+    save_path = tmp_path / f"https[COLON][SLASH][SLASH]www.example.com[SLASH]a[SLASH]1{codec.suffix}"
+    assert save_path.read_bytes() == codec.encode(html)
+    assert storage_repository.load_article("https://www.example.com/a/1") == html
+    assert storage_repository.get_saved_article_urls() == ["https://www.example.com/a/1"]
+
+
+def test_load_uncompressed_article_with_gzip_codec(tmp_path):
+    """圧縮機能の導入前に保存した記事を読み込めることのテスト"""
+    (tmp_path / "https[COLON][SLASH][SLASH]www.example.com[SLASH]a[SLASH]0").write_text("<main>0</main>")
+    storage_repository = LocalStorageRepository(str(tmp_path), codec=GzipArticleCodec())
+
+    storage_repository.save_article("<main>1</main>", "https://www.example.com/a/1")
+
+    assert storage_repository.get_saved_article_urls() == [
+        "https://www.example.com/a/0",
+        "https://www.example.com/a/1",
+    ]
+    assert storage_repository.load_article("https://www.example.com/a/0") == "<main>0</main>"
+    assert storage_repository.load_article("https://www.example.com/a/1") == "<main>1</main>"
+    with pytest.raises(FileNotFoundError):
+        storage_repository.load_article("https://www.example.com/a/2")
+
+
+def test_save_duplicate_articles(tmp_path, mocker):
+    """同じ内容の記事を一度だけ書き込むことのテスト"""
+    save_folder = tmp_path / "html"
+    save_folder.mkdir()
+    manifest = ArticleManifest(str(tmp_path / "manifest.sqlite3"))
+    storage_repository = LocalStorageRepository(str(save_folder), manifest)
+    write_article = mocker.spy(storage_repository, "_write_article")
+
+    storage_repository.save_article("<main>1</main>", "https://www.example.com/a/1")
+    failures = storage_repository.save_articles([
+        ("<main>1</main>", "https://www.example.com/a/1?utm_source=feed"),
+        ("<main>2</main>", "https://www.example.com/a/2"),
+        ("<main>2</main>", "https://www.example.com/a/2/repost"),
+    ])
+
+    assert failures == []
+    assert [call[0][1] for call in write_article.call_args_list] == [
+        "https://www.example.com/a/1",
+        "https://www.example.com/a/2",
+    ]
+    assert len(list(save_folder.iterdir())) == 2
+    assert sorted(storage_repository.get_saved_article_urls()) == [
+        "https://www.example.com/a/1",
+        "https://www.example.com/a/1?utm_source=feed",
+        "https://www.example.com/a/2",
+        "https://www.example.com/a/2/repost",
+    ]
+    assert storage_repository.load_article("https://www.example.com/a/2/repost") == "<main>2</main>"
+
+    # 突き合わせても、同じ内容の記事を参照する記録は残る
+    storage_repository.reconcile_manifest()
+    assert manifest.contains("https://www.example.com/a/1?utm_source=feed")
+
+
+def test_contains_many_sharded(tmp_path, mocker):
+    """サブフォルダに分けた配置で、保存先を列挙せずに保存済みかどうかを判定することのテスト"""
+    storage_repository = LocalStorageRepository(str(tmp_path), sharded=True)
+    storage_repository.save_article("<main>1</main>", "https://www.example.com/a/1")
+    list_saved_articles = mocker.spy(storage_repository, "_list_saved_articles")
+
+    assert storage_repository.contains_many([
+        "https://www.example.com/a/1",
+        "https://www.example.com/a/2",
+    ]) == {"https://www.example.com/a/1"}
+    assert storage_repository.exists("https://www.example.com/a/1")
+    assert not storage_repository.exists("https://www.example.com/a/2")
+    list_saved_articles.assert_not_called()
+    assert len(list(tmp_path.glob("*/*/https*"))) == 1
+    assert storage_repository.get_saved_article_urls() == ["https://www.example.com/a/1"]
+
+
+def test_migrate_to_sharded(tmp_path):
+    """直下に保存した記事をサブフォルダへ移動することのテスト"""
+    save_folder = tmp_path / "html"
+    save_folder.mkdir()
+    manifest = ArticleManifest(str(tmp_path / "manifest.sqlite3"))
+    flat = LocalStorageRepository(str(save_folder), manifest, codec=GzipArticleCodec())
+    flat.save_articles([
+        ("<main>1</main>", "https://www.example.com/a/1"),
+        ("<main>1</main>", "https://www.example.com/a/1?ref=top"),
+    ])
+    (save_folder / "https[COLON][SLASH][SLASH]www.example.com[SLASH]a[SLASH]0").write_text("<main>0</main>")
+
+    sharded = LocalStorageRepository(str(save_folder), manifest, sharded=True)
+    assert sharded.migrate_to_sharded() == 2
+
+    assert [path for path in save_folder.iterdir() if path.is_file()] == []
+    assert sharded.contains_many(["https://www.example.com/a/0", "https://www.example.com/a/1"]) == {
+        "https://www.example.com/a/0",
+        "https://www.example.com/a/1",
+    }
+    assert sharded.load_article("https://www.example.com/a/1?ref=top") == "<main>1</main>"
+    assert sharded.load_article("https://www.example.com/a/0") == "<main>0</main>"
+    assert LocalStorageRepository(str(save_folder), sharded=True).exists("https://www.example.com/a/0")
+
+
+def test_migrate_to_sharded_only_articles(tmp_path):
+    """記事以外のファイルは移動せず、保存先フォルダの書き方が違っても記録を書き換えることのテスト"""
+    save_folder = tmp_path / "html"
+    save_folder.mkdir()
+    # マニフェストを保存先フォルダに置き、末尾のスラッシュ付きで保存する
+    manifest = ArticleManifest(str(save_folder / "manifest.sqlite3"))
+    LocalStorageRepository(f"{save_folder}/", manifest).save_article("<main>1</main>", "https://www.example.com/a/1")
+    (save_folder / ".keep").write_text("")
+    (save_folder / "notes.txt").write_text("notes")
+
+    sharded = LocalStorageRepository(str(save_folder), manifest, sharded=True)
+    assert sharded.migrate_to_sharded() == 1
+
+    assert sorted(path.name for path in save_folder.iterdir() if path.is_file()) == [".keep", "manifest.sqlite3", "notes.txt"]
+    record = manifest.get("https://www.example.com/a/1")
+    assert record.storage_id == sharded._get_save_path("https://www.example.com/a/1", "", True)
+    assert sharded.load_article("https://www.example.com/a/1") == "<main>1</main>"
@@ -0,0 +1,45 @@
+import os
+from glob import glob
+
+import pytest
+from bs4 import BeautifulSoup
+
+from periodically_scraper.shared.extractor.bs4_main_element_extractor import Bs4MainElementExtractor
+from periodically_scraper.shared.extractor.lxml_main_element_extractor import LxmlMainElementExtractor
+
+CASES_DIR = os.path.join(os.path.dirname(__file__), "cases", "news_site_1_scraper")
+
+
+def recorded_pages() -> list:
+    """記録した記事本文ページのパスを取得する"""
+    return sorted(glob(os.path.join(CASES_DIR, "article_*.html")))
+
+
+@pytest.mark.parametrize("page_path", recorded_pages(), ids=os.path.basename)
+def test_parity(page_path):
+    """2つのパーサーが同じmain要素を抽出することのテスト"""
+    with open(page_path, "r") as f:
+        html = f.read()
+
+    bs4_main_html = Bs4MainElementExtractor().extract(html)
+    lxml_main_html = LxmlMainElementExtractor().extract(html)
+
+    # シリアライズの細部の違いを除くため、解析し直した要素の構造を比較する
+    bs4_main = BeautifulSoup(bs4_main_html, "lxml").find("main")
+    lxml_main = BeautifulSoup(lxml_main_html, "lxml").find("main")
+    assert bs4_main is not None
+    assert bs4_main == lxml_main, "抽出結果が一致しません"
+    assert lxml_main_html.startswith("<main") and lxml_main_html.endswith("</main>")
+
+
+@pytest.mark.parametrize("html", ["", "<html><body><p>no main</p></body></html>"])
+def test_parity_without_main(html):
+    """main要素が無い場合の結果が一致することのテスト"""
+    assert Bs4MainElementExtractor().extract(html) == LxmlMainElementExtractor().extract(html) == "None"
+
+
+def test_lxml_encoding_declaration():
+    """エンコーディング宣言付きの文書を扱えることのテスト"""
+    html = "<?xml version='1.0' encoding='utf-8'?><html><body><main><p>本文</p></main></body></html>"
+
+    assert LxmlMainElementExtractor().extract(html) == "<main><p>本文</p></main>"
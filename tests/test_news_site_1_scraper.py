@@ -0,0 +1,251 @@
+from http import HTTPStatus
+
+import pytest
+import requests
+
+from periodically_scraper.services.news_site_1_scraper import NewsSite1Scraper
+from periodically_scraper.shared.crawl_checkpoint import CrawlCheckpoint
+
+BASE_URL = NewsSite1Scraper.BASE_URL
+
+
+def list_page_html(article_paths: list, last_page_count: int = 1) -> str:
+    """記事一覧ページのHTMLを作成する"""
+    articles = "".join(f'<article><a href="{path}">title</a></article>' for path in article_paths)
+    return (
+        "<html><body>"
+        f"<main>{articles}</main>"
+        f'<a class="pagenavi-item pagenavi-item--last" href="/page/{last_page_count}/">last</a>'
+        "</body></html>"
+    )
+
+
+def article_page_html(body: str) -> str:
+    """記事本文ページのHTMLを作成する"""
+    return f"<html><body><header>header</header><main><p>{body}</p></main><footer>footer</footer></body></html>"
+
+
+@pytest.fixture
+def fixture_scraper(mocker):
+    """NewsSite1Scraper のfixture"""
+    mocker.patch("periodically_scraper.services.base_scraper.slack")
+    pages = {
+        f"{BASE_URL}/page/1": list_page_html(["/a/1", "/a/2", "/a/3"]),
+        f"{BASE_URL}/a/1": article_page_html("1"),
+        f"{BASE_URL}/a/2": article_page_html("2"),
+        f"{BASE_URL}/a/3": article_page_html("3"),
+    }
+    fetcher = mocker.Mock()
+    fetcher.get_html.side_effect = lambda url, **kwargs: (pages[url], HTTPStatus.OK) if url in pages else ("", HTTPStatus.NOT_FOUND)
+    storage_repository = mocker.Mock()
+    storage_repository.contains_many.side_effect = lambda urls: set()
+    storage_repository.save_articles.return_value = []
+    return fetcher, storage_repository, mocker.Mock()
+
+
+@pytest.mark.parametrize("max_workers", [1, 4])
+def test_execute(fixture_scraper, max_workers):
+    """execute() のテスト"""
+    fetcher, storage_repository, logger = fixture_scraper
+    scraper = NewsSite1Scraper(logger, storage_repository, fetcher, max_workers=max_workers)
+
+    scraper.execute()
+
+    saved = sorted((url, html) for call in storage_repository.save_articles.call_args_list for html, url in call[0][0])
+    assert saved == [
+        (f"{BASE_URL}/a/1", "<main><p>1</p></main>"),
+        (f"{BASE_URL}/a/2", "<main><p>2</p></main>"),
+        (f"{BASE_URL}/a/3", "<main><p>3</p></main>"),
+    ]
+
+
+def test_execute_streaming(fixture_scraper):
+    """記事本文ページをストリーミングで取得する場合のテスト"""
+    fetcher, storage_repository, logger = fixture_scraper
+    # lxml でシリアライズしたmain要素を返す
+    fetcher.get_main_html.side_effect = lambda url, **kwargs: (f"<main><p>{url[-1]}<br></p></main>", HTTPStatus.OK)
+    scraper = NewsSite1Scraper(logger, storage_repository, fetcher, streaming=True)
+
+    scraper.execute()
+
+    # extractor（既定では bs4）のシリアライズで保存する
+    storage_repository.save_articles.assert_called_once_with([
+        ("<main><p>1<br/></p></main>", f"{BASE_URL}/a/1"),
+        ("<main><p>2<br/></p></main>", f"{BASE_URL}/a/2"),
+        ("<main><p>3<br/></p></main>", f"{BASE_URL}/a/3"),
+    ])
+    # 記事本文ページは丸ごと取得しない
+    assert [call[0][0] for call in fetcher.get_html.call_args_list] == [f"{BASE_URL}/page/1"]
+
+
+def test_execute_skip_failed_article(fixture_scraper):
+    """取得に失敗した記事を保存しないことのテスト"""
+    fetcher, storage_repository, logger = fixture_scraper
+    pages = {
+        f"{BASE_URL}/page/1": list_page_html(["/a/1", "/a/404"]),
+        f"{BASE_URL}/a/1": article_page_html("1"),
+    }
+    fetcher.get_html.side_effect = lambda url, **kwargs: (pages[url], HTTPStatus.OK) if url in pages else ("", HTTPStatus.NOT_FOUND)
+    scraper = NewsSite1Scraper(logger, storage_repository, fetcher, max_workers=2)
+
+    scraper.execute()
+
+    storage_repository.save_articles.assert_called_once_with([("<main><p>1</p></main>", f"{BASE_URL}/a/1")])
+    logger.log.error.assert_called_once()
+
+
+@pytest.mark.parametrize("max_workers", [1, 4])
+def test_execute_skip_unreachable_article(fixture_scraper, tmp_path, max_workers):
+    """接続できなかった記事を失敗として記録し、他の記事は保存することのテスト"""
+    fetcher, storage_repository, logger = fixture_scraper
+    get_html = fetcher.get_html.side_effect
+
+    def side_effect(url, **kwargs):
+        if url == f"{BASE_URL}/a/2":
+            raise requests.ConnectionError("unreachable")
+        return get_html(url, **kwargs)
+
+    fetcher.get_html.side_effect = side_effect
+    checkpoint_path = str(tmp_path / "checkpoint.json")
+    scraper = NewsSite1Scraper(
+        logger, storage_repository, fetcher, max_workers=max_workers, checkpoint=CrawlCheckpoint(checkpoint_path)
+    )
+
+    scraper.execute()
+
+    storage_repository.save_articles.assert_called_once()
+    assert sorted(url for _, url in storage_repository.save_articles.call_args[0][0]) == [
+        f"{BASE_URL}/a/1",
+        f"{BASE_URL}/a/3",
+    ]
+    logger.log.error.assert_called_once()
+    assert CrawlCheckpoint(checkpoint_path).failed_attempts == {f"{BASE_URL}/a/2": 1}
+
+
+def test_execute_check_saved_articles_per_page(fixture_scraper):
+    """保存済みかどうかを記事一覧ページの記事だけ問い合わせることのテスト"""
+    fetcher, storage_repository, logger = fixture_scraper
+    pages = {
+        f"{BASE_URL}/page/1": list_page_html(["/a/1", "/a/2"], last_page_count=3),
+        f"{BASE_URL}/page/2": list_page_html(["/a/2", "/a/3"], last_page_count=3),
+        f"{BASE_URL}/page/3": list_page_html(["/a/3", "/a/4"], last_page_count=3),
+        f"{BASE_URL}/a/1": article_page_html("1"),
+        f"{BASE_URL}/a/2": article_page_html("2"),
+        f"{BASE_URL}/a/3": article_page_html("3"),
+    }
+    fetcher.get_html.side_effect = lambda url, **kwargs: (pages[url], HTTPStatus.OK) if url in pages else ("", HTTPStatus.NOT_FOUND)
+    storage_repository.contains_many.side_effect = lambda urls: {url for url in urls if url == f"{BASE_URL}/a/4"}
+    scraper = NewsSite1Scraper(logger, storage_repository, fetcher)
+
+    scraper.execute()
+
+    storage_repository.get_saved_article_urls.assert_not_called()
+    # 保存済みと分かっている記事は問い合わせない
+    assert [call[0][0] for call in storage_repository.contains_many.call_args_list] == [
+        [f"{BASE_URL}/a/1", f"{BASE_URL}/a/2"],
+        [f"{BASE_URL}/a/3"],
+        [f"{BASE_URL}/a/4"],
+    ]
+    assert [url for call in storage_repository.save_articles.call_args_list for _, url in call[0][0]] == [
+        f"{BASE_URL}/a/1",
+        f"{BASE_URL}/a/2",
+        f"{BASE_URL}/a/3",
+    ]
+    assert scraper.saved_article_urls == {f"{BASE_URL}/a/{i}" for i in range(1, 5)}
+
+
+def test_execute_save_failure(fixture_scraper):
+    """保存に失敗した記事を保存済みとして扱わないことのテスト"""
+    fetcher, storage_repository, logger = fixture_scraper
+    storage_repository.save_articles.return_value = [(f"{BASE_URL}/a/2", OSError("error"))]
+    scraper = NewsSite1Scraper(logger, storage_repository, fetcher)
+
+    scraper.execute()
+
+    storage_repository.save_articles.assert_called_once()
+    assert scraper.saved_article_urls == {f"{BASE_URL}/a/1", f"{BASE_URL}/a/3"}
+    logger.log.error.assert_called_once()
+
+
+def test_execute_parse_first_page_once(fixture_scraper, mocker):
+    """1ページ目を一度だけ取得・解析することのテスト"""
+    fetcher, storage_repository, logger = fixture_scraper
+    scraper = NewsSite1Scraper(logger, storage_repository, fetcher)
+    parse_list_page = mocker.spy(scraper, "_parse_list_page")
+
+    scraper.execute()
+
+    parse_list_page.assert_called_once()
+    assert [call[0][0] for call in fetcher.get_html.call_args_list].count(f"{BASE_URL}/page/1") == 1
+
+
+def test_extract_main_element():
+    """_extract_main_element() のテスト"""
+    scraper = NewsSite1Scraper(None, None, object())
+
+    main_html = scraper._extract_main_element(article_page_html('<a href="/x">x</a><br>'))
+
+    assert main_html == '<main><p><a href="/x">x</a><br/></p></main>'
+
+
+def test_execute_pipeline(fixture_scraper):
+    """取得・抽出・保存をパイプラインで行う場合のテスト"""
+    fetcher, storage_repository, logger = fixture_scraper
+    scraper = NewsSite1Scraper(logger, storage_repository, fetcher, max_workers=2, parse_processes=2, queue_size=1)
+
+    scraper.execute()
+
+    saved = sorted((url, html) for call in storage_repository.save_articles.call_args_list for html, url in call[0][0])
+    assert saved == [
+        (f"{BASE_URL}/a/1", "<main><p>1</p></main>"),
+        (f"{BASE_URL}/a/2", "<main><p>2</p></main>"),
+        (f"{BASE_URL}/a/3", "<main><p>3</p></main>"),
+    ]
+    assert scraper.pipeline is None
+
+
+def test_execute_resume(fixture_scraper, tmp_path):
+    """中断した巡回をチェックポイントから再開することのテスト"""
+    fetcher, storage_repository, logger = fixture_scraper
+    pages = {
+        f"{BASE_URL}/page/1": list_page_html(["/a/1", "/a/2"], last_page_count=3),
+        f"{BASE_URL}/page/2": list_page_html(["/a/3", "/a/4"], last_page_count=3),
+        f"{BASE_URL}/page/3": list_page_html(["/a/5"], last_page_count=3),
+        f"{BASE_URL}/a/1": article_page_html("1"),
+        f"{BASE_URL}/a/3": article_page_html("3"),
+        f"{BASE_URL}/a/4": article_page_html("4"),
+        f"{BASE_URL}/a/5": article_page_html("5"),
+    }
+    fetcher.get_html.side_effect = lambda url, **kwargs: (pages[url], HTTPStatus.OK) if url in pages else ("", HTTPStatus.NOT_FOUND)
+    # 2ページ目の保存中に中断する
+    storage_repository.save_articles.side_effect = [[], RuntimeError("Drive error")]
+    checkpoint_path = str(tmp_path / "news_site_1.json")
+    scraper = NewsSite1Scraper(logger, storage_repository, fetcher, checkpoint=CrawlCheckpoint(checkpoint_path))
+    with pytest.raises(RuntimeError):
+        scraper.execute()
+
+    checkpoint = CrawlCheckpoint(checkpoint_path)
+    assert checkpoint.page_count == 2
+    assert checkpoint.pending_urls == [f"{BASE_URL}/a/3", f"{BASE_URL}/a/4"]
+    assert checkpoint.failed_attempts == {f"{BASE_URL}/a/2": 1}
+
+    # 再開すると、1ページ目は取得せず、未保存の記事と失敗した記事から続ける
+    fetcher.get_html.reset_mock()
+    storage_repository.save_articles.reset_mock()
+    storage_repository.save_articles.side_effect = None
+    pages[f"{BASE_URL}/a/2"] = article_page_html("2")
+    scraper = NewsSite1Scraper(logger, storage_repository, fetcher, checkpoint=checkpoint, resume=True)
+    scraper.execute()
+
+    fetched_urls = [call[0][0] for call in fetcher.get_html.call_args_list]
+    assert f"{BASE_URL}/page/1" not in fetched_urls
+    assert f"{BASE_URL}/page/2" not in fetched_urls
+    assert [url for call in storage_repository.save_articles.call_args_list for _, url in call[0][0]] == [
+        f"{BASE_URL}/a/3",
+        f"{BASE_URL}/a/4",
+        f"{BASE_URL}/a/2",
+        f"{BASE_URL}/a/5",
+    ]
+    checkpoint = CrawlCheckpoint(checkpoint_path)
+    assert not checkpoint.is_in_progress()
+    assert checkpoint.failed_attempts == {}
@@ -0,0 +1,83 @@
+import pytest
+
+from periodically_scraper.shared.codec.gzip_article_codec import GzipArticleCodec
+from periodically_scraper.shared.repository.article_manifest import ArticleManifest
+from periodically_scraper.shared.repository.pack_storage_repository import PackStorageRepository
+
+
+def test_save_and_load_article(tmp_path):
+    """save_article() と load_article() のテスト"""
+    storage_repository = PackStorageRepository(str(tmp_path), codec=GzipArticleCodec())
+
+    storage_repository.save_article("<main>1</main>", "https://www.example.com/a/1")
+    storage_repository.save_article("<main>2</main>", "https://www.example.com/a/2")
+
+    assert storage_repository.load_article("https://www.example.com/a/1") == "<main>1</main>"
+    assert storage_repository.load_article("https://www.example.com/a/2") == "<main>2</main>"
+    assert storage_repository.get_saved_article_urls() == ["https://www.example.com/a/1", "https://www.example.com/a/2"]
+    with pytest.raises(FileNotFoundError):
+        storage_repository.load_article("https://www.example.com/a/3")
+
+
+def test_roll_segments_and_reopen(tmp_path):
+    """セグメントの切り替えと、開き直した後に読み込めることのテスト"""
+    storage_repository = PackStorageRepository(str(tmp_path), segment_max_bytes=100)
+    failures = storage_repository.save_articles(
+        [(f"<main>{'x' * 50}{i}</main>", f"https://www.example.com/a/{i}") for i in range(5)]
+    )
+    storage_repository.close()
+
+    assert failures == []
+    assert len(list(tmp_path.glob("segment-*.pack"))) == 5
+
+    reopened = PackStorageRepository(str(tmp_path), segment_max_bytes=100)
+    assert reopened.load_article("https://www.example.com/a/3") == f"<main>{'x' * 50}3</main>"
+    assert [url for url, _ in reopened.iter_articles()] == [f"https://www.example.com/a/{i}" for i in range(5)]
+
+
+def test_compact(tmp_path):
+    """上書きされたレコードがコンパクションで取り除かれることのテスト"""
+    storage_repository = PackStorageRepository(str(tmp_path))
+    storage_repository.save_article("<main>old</main>", "https://www.example.com/a/1")
+    storage_repository.save_article("<main>2</main>", "https://www.example.com/a/2")
+    storage_repository.save_article("<main>new</main>", "https://www.example.com/a/1")
+    size_before = sum(path.stat().st_size for path in tmp_path.glob("segment-*.pack"))
+
+    storage_repository.compact()
+
+    size_after = sum(path.stat().st_size for path in tmp_path.glob("segment-*.pack"))
+    assert size_after < size_before
+    assert dict(storage_repository.iter_articles()) == {
+        "https://www.example.com/a/1": "<main>new</main>",
+        "https://www.example.com/a/2": "<main>2</main>",
+    }
+    # 追記を続けられる
+    storage_repository.save_article("<main>3</main>", "https://www.example.com/a/3")
+    storage_repository.close()
+    reopened = PackStorageRepository(str(tmp_path))
+    assert reopened.load_article("https://www.example.com/a/1") == "<main>new</main>"
+    assert reopened.load_article("https://www.example.com/a/3") == "<main>3</main>"
+
+
+def test_rebuild_missing_index(tmp_path):
+    """インデックスが無い場合にセグメントから作り直すことのテスト"""
+    storage_repository = PackStorageRepository(str(tmp_path))
+    storage_repository.save_article("<main>1</main>", "https://www.example.com/a/1")
+    storage_repository.close()
+    (tmp_path / PackStorageRepository.INDEX_FILENAME).unlink()
+
+    reopened = PackStorageRepository(str(tmp_path))
+
+    assert reopened.load_article("https://www.example.com/a/1") == "<main>1</main>"
+
+
+def test_manifest_survives_compaction(tmp_path):
+    """コンパクションの後もマニフェストの記録が保存先と一致することのテスト"""
+    manifest = ArticleManifest(str(tmp_path / "manifest.sqlite3"))
+    storage_repository = PackStorageRepository(str(tmp_path / "pack"), manifest)
+    storage_repository.save_article("<main>1</main>", "https://www.example.com/a/1")
+
+    storage_repository.compact()
+    storage_repository.reconcile_manifest()
+
+    assert manifest.get("https://www.example.com/a/1").content_hash is not None
@@ -0,0 +1,59 @@
+import pytest
+
+from periodically_scraper.shared.rate_limiter import TokenBucketRateLimiter
+
+
+class TestTokenBucketRateLimiter:
+    @pytest.fixture(autouse=True)
+    def mock_time(self, mocker):
+        now = [0.0]
+        mocker.patch("periodically_scraper.shared.rate_limiter.time.monotonic", side_effect=lambda: now[0])
+        return now
+
+    def test_burst(self, mocker):
+        mock_sleep = mocker.patch("periodically_scraper.shared.rate_limiter.time.sleep")
+        rate_limiter = TokenBucketRateLimiter(requests_per_second=2, burst=2)
+
+        waits = [rate_limiter.acquire("https://www.example.com/") for _ in range(4)]
+
+        assert waits == [0.0, 0.0, 0.5, 1.0]
+        assert [call[0][0] for call in mock_sleep.call_args_list] == [0.5, 1.0]
+
+    def test_refill(self, mocker, mock_time):
+        mocker.patch("periodically_scraper.shared.rate_limiter.time.sleep")
+        rate_limiter = TokenBucketRateLimiter(requests_per_second=1)
+
+        assert rate_limiter.acquire("https://www.example.com/") == 0.0
+        mock_time[0] = 1.0
+        assert rate_limiter.acquire("https://www.example.com/") == 0.0
+
+    def test_per_host(self, mocker):
+        mocker.patch("periodically_scraper.shared.rate_limiter.time.sleep")
+        rate_limiter = TokenBucketRateLimiter(requests_per_second=1)
+
+        assert rate_limiter.acquire("https://www.example.com/") == 0.0
+        assert rate_limiter.acquire("https://www.example.org/") == 0.0
+        assert rate_limiter.acquire("https://www.example.com/") == 1.0
+
+    def test_invalid_rate(self):
+        with pytest.raises(ValueError):
+            TokenBucketRateLimiter(requests_per_second=0)
+
+    def test_set_rate(self, mocker):
+        mocker.patch("periodically_scraper.shared.rate_limiter.time.sleep")
+        rate_limiter = TokenBucketRateLimiter(requests_per_second=1)
+        rate_limiter.set_rate("https://slow.example.com/", requests_per_second=0.5)
+
+        assert [rate_limiter.acquire("https://slow.example.com/a") for _ in range(2)] == [0.0, 2.0]
+        assert [rate_limiter.acquire("https://www.example.com/a") for _ in range(2)] == [0.0, 1.0]
+
+    def test_pause(self, mocker, mock_time):
+        mocker.patch("periodically_scraper.shared.rate_limiter.time.sleep")
+        rate_limiter = TokenBucketRateLimiter(requests_per_second=2, burst=2)
+        rate_limiter.pause("https://www.example.com/a", 5.0)
+
+        # 停止中は同じホストの全てのリクエストを待たせ、停止後は rate の間隔で送る
+        assert [rate_limiter.acquire("https://www.example.com/b") for _ in range(3)] == [5.0, 5.5, 6.0]
+        assert rate_limiter.acquire("https://www.example.org/") == 0.0
+        mock_time[0] = 10.0
+        assert rate_limiter.acquire("https://www.example.com/") == 0.0
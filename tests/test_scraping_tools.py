@@ -1,9 +1,21 @@
 from http import HTTPStatus
+import os
 
-from periodically_scraper.shared.scraping_tools import get_html
+import pytest
+import requests
+
+from periodically_scraper.shared.extractor.lxml_main_element_extractor import LxmlMainElementExtractor
+from periodically_scraper.shared.http_cache import HttpCache
+from periodically_scraper.shared.scraping_tools import MAX_BACKOFF, HtmlFetcher, _detect_encoding, _request_with_retry, get_html
+
+CASES_DIR = os.path.join(os.path.dirname(__file__), "cases", "news_site_1_scraper")
 
 
 class TestGetResponse:
+    @pytest.fixture(autouse=True)
+    def mock_sleep(self, mocker):
+        return mocker.patch("periodically_scraper.shared.scraping_tools.sleep")
+
     def test_http_status_200(self, mocker):
         mock = mocker.Mock()
         mock.status_code = HTTPStatus.OK
@@ -50,3 +62,239 @@ class TestGetResponse:
         _, status_code = get_html("")
 
         assert status_code == HTTPStatus.OK
+
+    def test_no_sleep_before_first_request(self, mocker, mock_sleep):
+        mock = mocker.Mock()
+        mock.status_code = HTTPStatus.OK
+        mocker.patch('requests.get').return_value = mock
+
+        get_html("")
+
+        mock_sleep.assert_not_called()
+
+    def test_retry_after(self, mocker, mock_sleep):
+        mock_200 = mocker.Mock()
+        mock_200.status_code = HTTPStatus.OK
+        mock_429 = mocker.Mock()
+        mock_429.status_code = HTTPStatus.TOO_MANY_REQUESTS
+        mock_429.headers = {"Retry-After": "7"}
+        mocker.patch('requests.get').side_effect = [mock_429, mock_200]
+
+        _, status_code = get_html("")
+
+        assert status_code == HTTPStatus.OK
+        mock_sleep.assert_called_once_with(7.0)
+
+    def test_retry_after_is_capped(self, mocker, mock_sleep):
+        mock_200 = mocker.Mock()
+        mock_200.status_code = HTTPStatus.OK
+        mock_503 = mocker.Mock()
+        mock_503.status_code = HTTPStatus.SERVICE_UNAVAILABLE
+        mock_503.headers = {"Retry-After": "86400"}
+        mocker.patch('requests.get').side_effect = [mock_503, mock_200]
+
+        get_html("")
+
+        mock_sleep.assert_called_once_with(MAX_BACKOFF)
+
+    def test_pushback_pauses_host(self, mocker, mock_sleep):
+        mock_200 = mocker.Mock()
+        mock_200.status_code = HTTPStatus.OK
+        mock_429 = mocker.Mock()
+        mock_429.status_code = HTTPStatus.TOO_MANY_REQUESTS
+        mock_429.headers = {"Retry-After": "7"}
+        request_get = mocker.Mock(side_effect=[mock_429, mock_200])
+        rate_limiter = mocker.Mock()
+
+        response = _request_with_retry(request_get, "https://www.example.com/a", 3, rate_limiter)
+
+        # 他のスレッドも待たせるため、このスレッドだけで待たずにホストごと一時停止する
+        assert response is mock_200
+        rate_limiter.pause.assert_called_once_with("https://www.example.com/a", 7.0)
+        assert rate_limiter.acquire.call_count == 2
+        mock_sleep.assert_not_called()
+
+    def test_exponential_backoff(self, mocker, mock_sleep):
+        mock_503 = mocker.Mock()
+        mock_503.status_code = HTTPStatus.SERVICE_UNAVAILABLE
+        mock_503.headers = {}
+        mocker.patch('requests.get').return_value = mock_503
+
+        _, status_code = get_html("", N_RETRY=4)
+
+        assert status_code == HTTPStatus.SERVICE_UNAVAILABLE
+        waits = [call[0][0] for call in mock_sleep.call_args_list]
+        assert len(waits) == 3
+        for attempt, wait in enumerate(waits):
+            assert 2 ** attempt / 2 <= wait <= 2 ** attempt
+
+    def test_connection_error(self, mocker):
+        mock_200 = mocker.Mock()
+        mock_200.status_code = HTTPStatus.OK
+        mocker.patch('requests.get').side_effect = [requests.exceptions.ConnectionError(), mock_200]
+
+        _, status_code = get_html("")
+
+        assert status_code == HTTPStatus.OK
+
+
+class TestHtmlFetcher:
+    def test_reuse_session_per_host(self):
+        fetcher = HtmlFetcher()
+
+        session_1 = fetcher.get_session("https://www.example.com/page/1")
+        session_2 = fetcher.get_session("https://www.example.com/page/2")
+        session_3 = fetcher.get_session("https://www.example.org/page/1")
+
+        assert session_1 is session_2
+        assert session_1 is not session_3
+
+    def test_pool_size_and_headers(self):
+        fetcher = HtmlFetcher(pool_size=4, headers={"User-Agent": "test"})
+
+        session = fetcher.get_session("https://www.example.com/")
+
+        assert session.get_adapter("https://www.example.com/")._pool_maxsize == 4
+        assert session.headers["User-Agent"] == "test"
+
+    def test_get_html_with_timeout(self, mocker):
+        mock = mocker.Mock()
+        mock.status_code = HTTPStatus.OK
+        mock.text = "<html></html>"
+        fetcher = HtmlFetcher(connect_timeout=1.0, read_timeout=2.0)
+        session_get = mocker.patch.object(fetcher.get_session("https://www.example.com/"), "get", return_value=mock)
+
+        html, status_code = fetcher.get_html("https://www.example.com/")
+
+        assert (html, status_code) == ("<html></html>", HTTPStatus.OK)
+        session_get.assert_called_once_with("https://www.example.com/", headers={}, timeout=(1.0, 2.0))
+
+    def test_get_html_memoized(self, mocker):
+        mock = mocker.Mock()
+        mock.status_code = HTTPStatus.OK
+        mock.text = "<html></html>"
+        mock.headers = {}
+        fetcher = HtmlFetcher(cache=HttpCache())
+        session_get = mocker.patch.object(fetcher.get_session("https://www.example.com/"), "get", return_value=mock)
+
+        results = [fetcher.get_html("https://www.example.com/", use_cache=True) for _ in range(2)]
+
+        assert results == [("<html></html>", HTTPStatus.OK)] * 2
+        session_get.assert_called_once()
+
+    def test_memo_is_bounded(self):
+        cache = HttpCache(max_memo_entries=2)
+        cache.memoize("https://www.example.com/page/1", "1")
+        cache.memoize("https://www.example.com/page/2", "2")
+        # 最近使ったページは残す
+        assert cache.get_memo("https://www.example.com/page/1") == "1"
+
+        cache.memoize("https://www.example.com/page/3", "3")
+
+        assert cache.get_memo("https://www.example.com/page/1") == "1"
+        assert cache.get_memo("https://www.example.com/page/2") is None
+        assert cache.get_memo("https://www.example.com/page/3") == "3"
+
+    def test_get_html_not_modified(self, mocker, tmp_path):
+        url = "https://www.example.com/page/1"
+        mock_200 = mocker.Mock()
+        mock_200.status_code = HTTPStatus.OK
+        mock_200.text = "<html></html>"
+        mock_200.headers = {"ETag": '"abc"', "Last-Modified": "Wed, 21 Oct 2015 07:28:00 GMT"}
+        mock_304 = mocker.Mock()
+        mock_304.status_code = HTTPStatus.NOT_MODIFIED
+        fetcher_1 = HtmlFetcher(cache=HttpCache(str(tmp_path)))
+        mocker.patch.object(fetcher_1.get_session(url), "get", return_value=mock_200)
+        fetcher_1.get_html(url, use_cache=True)
+
+        # 別の実行でディスクのキャッシュを再検証する
+        fetcher_2 = HtmlFetcher(cache=HttpCache(str(tmp_path)))
+        session_get = mocker.patch.object(fetcher_2.get_session(url), "get", return_value=mock_304)
+        result = fetcher_2.get_html(url, use_cache=True)
+
+        assert result == ("<html></html>", HTTPStatus.OK)
+        assert session_get.call_args[1]["headers"] == {
+            "If-None-Match": '"abc"',
+            "If-Modified-Since": "Wed, 21 Oct 2015 07:28:00 GMT",
+        }
+
+    def test_get_html_without_cache(self, mocker, tmp_path):
+        mock = mocker.Mock()
+        mock.status_code = HTTPStatus.OK
+        mock.text = "<html></html>"
+        mock.headers = {"ETag": '"abc"'}
+        fetcher = HtmlFetcher(cache=HttpCache(str(tmp_path)))
+        session_get = mocker.patch.object(fetcher.get_session("https://www.example.com/"), "get", return_value=mock)
+
+        for _ in range(2):
+            fetcher.get_html("https://www.example.com/")
+
+        assert session_get.call_count == 2
+        assert list(tmp_path.iterdir()) == []
+
+
+class TestGetMainHtml:
+    @pytest.fixture
+    def fixture_stream(self, mocker):
+        """ストリーミングのレスポンスのFixture"""
+        with open(os.path.join(CASES_DIR, "article_basic.html"), "rb") as f:
+            content = f.read()
+        # main要素の後ろに大きなフッターが続くページ
+        content = content.replace(b"</footer>", b"<p>" + b"x" * 100000 + b"</p></footer>")
+        read_sizes = []
+
+        def iter_content(chunk_size):
+            for i in range(0, len(content), chunk_size):
+                read_sizes.append(chunk_size)
+                yield content[i:i + chunk_size]
+
+        mock = mocker.Mock()
+        mock.status_code = HTTPStatus.OK
+        mock.headers = {"Content-Type": "text/html"}
+        mock.iter_content.side_effect = iter_content
+        return mock, content, read_sizes
+
+    def test_stop_reading_after_main(self, mocker, fixture_stream):
+        mock, content, read_sizes = fixture_stream
+        fetcher = HtmlFetcher()
+        session_get = mocker.patch.object(fetcher.get_session("https://www.example.com/"), "get", return_value=mock)
+
+        main_html, status_code = fetcher.get_main_html("https://www.example.com/", chunk_size=1024)
+
+        assert status_code == HTTPStatus.OK
+        assert main_html == LxmlMainElementExtractor().extract(content.decode())
+        assert sum(read_sizes) < len(content) / 10, "main要素の後ろまで読み込んでいます"
+        assert session_get.call_args[1]["stream"] is True
+        mock.close.assert_called_once()
+
+    def test_unknown_charset(self, mocker, fixture_stream):
+        mock, content, _ = fixture_stream
+        mock.headers = {"Content-Type": "text/html; charset=x-bogus"}
+        fetcher = HtmlFetcher()
+        mocker.patch.object(fetcher.get_session("https://www.example.com/"), "get", return_value=mock)
+
+        main_html, status_code = fetcher.get_main_html("https://www.example.com/", chunk_size=1024)
+
+        assert status_code == HTTPStatus.OK
+        assert main_html == LxmlMainElementExtractor().extract(content.decode())
+
+    def test_not_found(self, mocker):
+        mock = mocker.Mock()
+        mock.status_code = HTTPStatus.NOT_FOUND
+        fetcher = HtmlFetcher()
+        mocker.patch.object(fetcher.get_session("https://www.example.com/"), "get", return_value=mock)
+
+        assert fetcher.get_main_html("https://www.example.com/") == ("", HTTPStatus.NOT_FOUND)
+        mock.iter_content.assert_not_called()
+
+    @pytest.mark.parametrize("content_type, head, encoding", [
+        ("text/html; charset=Shift_JIS", b'<meta charset="utf-8">', "Shift_JIS"),
+        # 知らない文字コードは使わない
+        ("text/html; charset=x-bogus", b'<meta charset="euc-jp">', "euc-jp"),
+        ("text/html; charset=x-bogus", b'<meta charset="x-bogus">', "utf-8"),
+        ("text/html", b'<html><head><meta charset="euc-jp">', "euc-jp"),
+        ("text/html", b'<meta http-equiv="Content-Type" content="text/html; charset=shift_jis">', "shift_jis"),
+        (None, b"<html>", "utf-8"),
+    ])
+    def test_detect_encoding(self, content_type, head, encoding):
+        assert _detect_encoding(content_type, head) == encoding
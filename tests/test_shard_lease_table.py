@@ -0,0 +1,117 @@
+import sqlite3
+
+from periodically_scraper.shared.shard_lease_table import ShardLeaseTable
+
+
+def test_create_shards_and_claim(tmp_path):
+    """create_shards(), claim() のテスト"""
+    lease_table = ShardLeaseTable(str(tmp_path / "lease.sqlite3"))
+    lease_table.create_shards("site", 25, 10)
+    # 作成済みのシャードはそのまま
+    lease_table.create_shards("site", 25, 10)
+
+    shards = [lease_table.claim("site", "worker-1") for _ in range(3)]
+
+    assert [(shard.start_page, shard.end_page) for shard in shards] == [(1, 10), (11, 20), (21, 25)]
+    assert lease_table.claim("site", "worker-2") is None
+    assert lease_table.count_remaining("site") == 3
+
+
+def test_complete(tmp_path):
+    """complete() したシャードはリースされないことのテスト"""
+    lease_table = ShardLeaseTable(str(tmp_path / "lease.sqlite3"))
+    lease_table.create_shards("site", 10, 10)
+    shard = lease_table.claim("site", "worker-1")
+
+    lease_table.complete(shard, "worker-1")
+
+    assert lease_table.count_remaining("site") == 0
+    assert lease_table.claim("site", "worker-2") is None
+
+
+def test_expired_lease_is_requeued(tmp_path):
+    """リースの期限が切れたシャードを他のワーカーがリースできることのテスト"""
+    db_path = str(tmp_path / "lease.sqlite3")
+    lease_table = ShardLeaseTable(db_path, lease_seconds=-1.0)
+    lease_table.create_shards("site", 10, 10)
+    shard = lease_table.claim("site", "worker-1")
+
+    other_table = ShardLeaseTable(db_path)
+    reclaimed = other_table.claim("site", "worker-2")
+
+    assert reclaimed.shard_id == shard.shard_id
+    assert reclaimed.attempts == 2
+    # 期限切れで他のワーカーに移ったシャードは延長・完了できない
+    assert not lease_table.renew(shard, "worker-1")
+    lease_table.complete(shard, "worker-1")
+    assert other_table.count_remaining("site") == 1
+    assert other_table.renew(reclaimed, "worker-2")
+
+
+def test_release_and_max_attempts(tmp_path):
+    """release() したシャードは最大回数までリースし直せることのテスト"""
+    lease_table = ShardLeaseTable(str(tmp_path / "lease.sqlite3"))
+    lease_table.create_shards("site", 10, 10)
+
+    for _ in range(2):
+        lease_table.release(lease_table.claim("site", "worker-1", max_attempts=2), "worker-1")
+
+    assert lease_table.claim("site", "worker-1", max_attempts=2) is None
+
+
+def test_claim_articles(tmp_path):
+    """claim_articles() で記事が最初のシャードに割り当てられることのテスト"""
+    lease_table = ShardLeaseTable(str(tmp_path / "lease.sqlite3"))
+    lease_table.create_shards("site", 2, 1)
+    shard_1 = lease_table.claim("site", "worker-1")
+    shard_2 = lease_table.claim("site", "worker-2")
+
+    assert lease_table.claim_articles(shard_1, ["a", "b"]) == ["a", "b"]
+    assert lease_table.claim_articles(shard_2, ["b", "c"]) == ["c"]
+    # 同じシャードをリースし直したワーカーには、割り当て済みの記事も返す
+    lease_table.release(shard_1, "worker-1")
+    reclaimed = lease_table.claim("site", "worker-3")
+    assert reclaimed.shard_id == shard_1.shard_id
+    assert lease_table.claim_articles(reclaimed, ["b", "a"]) == ["b", "a"]
+
+
+def test_pending_articles(tmp_path):
+    """mark_articles_done() していない記事を get_pending_articles() で取得できることのテスト"""
+    lease_table = ShardLeaseTable(str(tmp_path / "lease.sqlite3"))
+    lease_table.create_shards("site", 1, 1)
+    shard = lease_table.claim("site", "worker-1")
+    lease_table.claim_articles(shard, ["a", "b", "c"])
+
+    lease_table.mark_articles_done(shard, ["a", "c"])
+
+    assert lease_table.get_pending_articles(shard) == ["b"]
+    # 保存済みの記事は返さない
+    assert lease_table.claim_articles(shard, ["a", "b"]) == ["b"]
+
+
+def test_count_claimable(tmp_path):
+    """他のワーカーがリースしているシャードも count_claimable() で数えることのテスト"""
+    lease_table = ShardLeaseTable(str(tmp_path / "lease.sqlite3"))
+    lease_table.create_shards("site", 2, 1)
+    shard_1 = lease_table.claim("site", "worker-1", max_attempts=1)
+    lease_table.claim("site", "worker-2", max_attempts=1)
+
+    assert lease_table.claim("site", "worker-3", max_attempts=1) is None
+    assert lease_table.count_claimable("site", max_attempts=2) == 2
+    lease_table.complete(shard_1, "worker-1")
+    assert lease_table.count_claimable("site", max_attempts=2) == 1
+    # リースできる回数の上限に達したシャードは数えない
+    assert lease_table.count_claimable("site", max_attempts=1) == 0
+
+
+def test_rollback_journal(tmp_path):
+    """ネットワークファイルシステムでも使えるように、WALモードを使わないことのテスト"""
+    db_path = str(tmp_path / "lease.sqlite3")
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.close()
+
+    ShardLeaseTable(db_path).close()
+
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "delete"
@@ -0,0 +1,69 @@
+import json
+
+import pytest
+
+from periodically_scraper.shared.slack_client import SlackClient
+
+
+@pytest.fixture
+def fixture_session_post(mocker):
+    """Slack APIへの送信のFixture"""
+    session_post = mocker.patch("requests.Session.post")
+    session_post.return_value.json.return_value = {"ok": True}
+    return session_post
+
+
+def sent_payloads(session_post) -> list:
+    """送信したペイロードを取得する"""
+    return [json.loads(call[1]["data"]) for call in session_post.call_args_list]
+
+
+def test_post_message(fixture_session_post):
+    """post_message() のテスト"""
+    slack = SlackClient()
+
+    slack.post_message("test")
+
+    assert [payload["text"] for payload in sent_payloads(fixture_session_post)] == ["test"]
+    assert fixture_session_post.call_args[1]["timeout"] == (5.0, 10.0)
+
+
+def test_post_message_background(fixture_session_post):
+    """非同期モードではメッセージをまとめて送信することのテスト"""
+    slack = SlackClient()
+    slack.start_background(interval=0.5)
+
+    for i in range(3):
+        slack.post_message(f"test{i}")
+    slack.shutdown()
+
+    assert [payload["text"] for payload in sent_payloads(fixture_session_post)] == ["test0\ntest1\ntest2"]
+
+
+def test_post_message_background_split(fixture_session_post):
+    """まとめたメッセージが長すぎる場合は分割することのテスト"""
+    slack = SlackClient()
+    slack.start_background(interval=0.5)
+
+    for i in range(3):
+        slack.post_message(str(i) * (SlackClient.MAX_BATCH_CHARS // 2 - 10))
+    slack.shutdown()
+
+    assert len(sent_payloads(fixture_session_post)) == 2
+
+
+def test_post_error_after_pending_messages(fixture_session_post):
+    """post_error() は未送信のメッセージを送信した後に送信することのテスト"""
+    slack = SlackClient()
+    slack.start_background(interval=0.1)
+
+    slack.post_message("test")
+    try:
+        raise ValueError("error")
+    except ValueError:
+        slack.post_error()
+    slack.shutdown()
+
+    payloads = sent_payloads(fixture_session_post)
+    assert payloads[0]["text"] == "test"
+    assert "ValueError: error" in payloads[1]["blocks"][1]["text"]["text"]